@@ -0,0 +1,455 @@
+"""
+Headless GUI benchmarks for ryvencore-qt.
+
+Runs a number of scenarios against synthetic flows of configurable sizes on the offscreen Qt platform,
+stores the timings as JSON, and compares them with the results of a previous run to catch regressions.
+
+    python benchmarks/benchmarks.py --nodes 100 500 --output before.json
+    python benchmarks/benchmarks.py --nodes 100 500 --output after.json --compare before.json
+
+The exit code is 1 if any scenario got slower than the threshold allows.
+"""
+
+import os
+import sys
+import json
+import argparse
+import platform
+import subprocess
+from datetime import datetime
+from statistics import median
+from time import perf_counter
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+os.environ.setdefault('QT_API', 'pyside2')
+
+# benchmark the working tree, not some installed version
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from qtpy import API_NAME, QT_VERSION
+from qtpy.QtCore import Qt, QPointF, QEvent
+from qtpy.QtGui import QMouseEvent
+from qtpy.QtWidgets import QApplication, QMainWindow
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+import ryvencore_qt as rc
+from ryvencore_qt.src.flows.FlowCommands import Paste_Command
+
+from nodes import export_nodes, BenchNode, BenchWidgetNode
+
+
+WINDOW_SIZE = (1200, 800)
+GRID_COLUMNS = 25
+GRID_SPACING = (220, 140)
+
+
+#
+# HELPERS
+#
+
+def process_events():
+    app.processEvents()
+
+
+def new_session() -> rc.SessionGUI:
+    session = rc.SessionGUI(None)
+    session.core_session.register_node_types(export_nodes)
+    return session
+
+
+class Window:
+    """Shows a flow view in a main window, as an application would"""
+
+    def __init__(self, flow_view):
+        self.flow_view = flow_view
+        self.main_window = QMainWindow()
+        self.main_window.resize(*WINDOW_SIZE)
+        self.main_window.setCentralWidget(flow_view)
+        self.main_window.show()
+        process_events()
+
+    def repaint(self):
+        """Paints the view synchronously"""
+        self.flow_view.viewport().repaint()
+
+    def close(self):
+        self.main_window.close()
+        self.main_window.deleteLater()
+        process_events()
+
+
+_projects = {}
+
+
+def project(num_nodes: int) -> dict:
+    """Returns the serialized project of a flow with num_nodes nodes in a grid, every fourth node having
+    an input widget, and each node being connected to the next one"""
+
+    if num_nodes in _projects:
+        return _projects[num_nodes]
+
+    session = new_session()
+    flow = session.core_session.create_flow('benchmark')
+    flow_view = session.get_flow_view(flow)
+
+    with flow_view.bulk_insert():
+        for i in range(num_nodes):
+            flow_view._node_place_pos = QPointF(
+                100 + (i % GRID_COLUMNS) * GRID_SPACING[0],
+                100 + (i // GRID_COLUMNS) * GRID_SPACING[1],
+            )
+            flow.create_node(BenchWidgetNode if i % 4 == 0 else BenchNode)
+
+    nodes = flow.nodes
+    for n1, n2 in zip(nodes, nodes[1:]):
+        flow.connect_nodes(n1.outputs[0], n2.inputs[0])
+
+    _projects[num_nodes] = session.core_session.serialize()
+    return _projects[num_nodes]
+
+
+def loaded_flow_view(num_nodes: int):
+    session = new_session()
+    flow = session.core_session.load(project(num_nodes))[0]
+    return session, Window(session.get_flow_view(flow))
+
+
+def send_mouse_event(widget, type_, pos: QPointF, buttons):
+    # the scene finds the items under the mouse by the global position, which otherwise is the cursor's
+    event = QMouseEvent(
+        type_, pos,
+        QPointF(widget.mapTo(widget.window(), pos.toPoint())),
+        QPointF(widget.mapToGlobal(pos.toPoint())),
+        Qt.LeftButton, buttons, Qt.NoModifier
+    )
+    app.sendEvent(widget, event)
+
+
+#
+# SCENARIOS
+#
+# each scenario takes the number of nodes and returns the measured time in seconds
+#
+
+def session_startup(num_nodes: int) -> float:
+    t = perf_counter()
+    new_session()
+    return perf_counter() - t
+
+
+def flow_view_construction(num_nodes: int) -> float:
+    data = project(num_nodes)
+
+    session = new_session()
+    t = perf_counter()
+    flow = session.core_session.load(data)[0]
+    window = Window(session.get_flow_view(flow))
+    window.repaint()
+    dt = perf_counter() - t
+
+    window.close()
+    return dt
+
+
+def paste(num_nodes: int) -> float:
+    session, window = loaded_flow_view(num_nodes)
+    fv = window.flow_view
+    nodes = fv.flow.nodes
+    data = {
+        'nodes': fv._get_nodes_data(nodes),
+        'connections': fv._get_connections_data(nodes),
+        'output data': fv._get_output_data(nodes),
+        'drawings': [],
+    }
+    window.close()
+
+    target = Window(session.get_flow_view(session.core_session.create_flow('paste target')))
+
+    t = perf_counter()
+    target.flow_view._push_undo(Paste_Command(target.flow_view, data, QPointF(0, 0)))
+    process_events()
+    target.repaint()
+    dt = perf_counter() - t
+
+    target.close()
+    return dt
+
+
+def select_all(num_nodes: int) -> float:
+    session, window = loaded_flow_view(num_nodes)
+
+    t = perf_counter()
+    window.flow_view.select_all()
+    process_events()
+    window.repaint()
+    dt = perf_counter() - t
+
+    window.close()
+    return dt
+
+
+def drag_selection(num_nodes: int, steps: int = 20) -> float:
+    """Drags all nodes by mouse, repainting after every mouse move"""
+
+    session, window = loaded_flow_view(num_nodes)
+    fv = window.flow_view
+    fv.select_all()
+    process_events()
+
+    item = next(iter(fv.node_items.values()))
+    fv.centerOn(item)
+    process_events()
+    pos = grab_pos(fv, item)
+    selected_nodes = fv.selected_nodes()
+    positions_before = node_positions(fv, selected_nodes)
+
+    t = perf_counter()
+    send_mouse_event(fv.viewport(), QEvent.MouseButtonPress, pos, Qt.LeftButton)
+    for _ in range(steps):
+        pos += QPointF(5, 3)
+        send_mouse_event(fv.viewport(), QEvent.MouseMove, pos, Qt.LeftButton)
+        window.repaint()
+    send_mouse_event(fv.viewport(), QEvent.MouseButtonRelease, pos, Qt.NoButton)
+    process_events()
+    dt = perf_counter() - t
+
+    positions_after = node_positions(fv, selected_nodes)
+    unmoved = [n for n in selected_nodes if positions_after[n] == positions_before[n]]
+    if len(selected_nodes) != num_nodes or unmoved:
+        raise RuntimeError(f'drag selection: {len(selected_nodes)} of {num_nodes} nodes selected, '
+                           f'{len(unmoved)} of them not moved')
+
+    window.close()
+    return dt
+
+
+def grab_pos(flow_view, item) -> QPointF:
+    """Returns the position of item's title in view coordinates, where the user grabs a node to drag it"""
+
+    title_label = item.widget.title_label
+    pos = flow_view.mapFromScene(title_label.sceneBoundingRect().center())
+    if flow_view.itemAt(pos) is not title_label:
+        raise RuntimeError(f'the title of {item} is covered')
+    return QPointF(pos)
+
+
+def node_positions(flow_view, nodes: list) -> dict:
+    """Returns the positions of the nodes, which may be virtualized"""
+
+    return {
+        n: QPointF((flow_view.node_items.get(n) or flow_view.node_placeholders[n]).pos())
+        for n in nodes
+    }
+
+
+def zoom_sweep(num_nodes: int, steps: int = 20) -> float:
+    """Zooms out and in again, repainting after every step"""
+
+    session, window = loaded_flow_view(num_nodes)
+    fv = window.flow_view
+
+    t = perf_counter()
+    for zoom in (fv.zoom_out, fv.zoom_in):
+        for _ in range(steps):
+            zoom(300)
+            window.repaint()
+    process_events()
+    dt = perf_counter() - t
+
+    window.close()
+    return dt
+
+
+def theme_switch(num_nodes: int) -> float:
+    """Switches through all flow themes, repainting after every switch"""
+
+    session, window = loaded_flow_view(num_nodes)
+    design = session.design
+
+    t = perf_counter()
+    for theme in design.flow_themes:
+        design.set_flow_theme(theme)
+        process_events()
+        window.repaint()
+    dt = perf_counter() - t
+
+    window.close()
+    return dt
+
+
+def serialization(num_nodes: int) -> float:
+    session, window = loaded_flow_view(num_nodes)
+
+    t = perf_counter()
+    session.core_session.serialize()
+    dt = perf_counter() - t
+
+    window.close()
+    return dt
+
+
+def unopened_flow_loading(num_nodes: int) -> float:
+    """Builds the view of a flow loaded from a project saved without its view ever having been built,
+    so the project contains no frontend data of the nodes"""
+
+    session = new_session()
+    flow = session.core_session.create_flow('api')
+    nodes = [flow.create_node(BenchWidgetNode if i % 4 == 0 else BenchNode) for i in range(num_nodes)]
+    for n1, n2 in zip(nodes, nodes[1:]):
+        flow.connect_nodes(n1.outputs[0], n2.inputs[0])
+    data = session.core_session.serialize()
+
+    session = new_session()
+    t = perf_counter()
+    flow = session.core_session.load(data)[0]
+    window = Window(session.get_flow_view(flow))
+    window.repaint()
+    dt = perf_counter() - t
+
+    window.close()
+    return dt
+
+
+def flow_deletion(num_nodes: int) -> float:
+    """Deletes a flow whose view is shown, one that was loaded but never opened, and one
+    whose nodes were created through the API without the view being built"""
+
+    session, window = loaded_flow_view(num_nodes)
+    core_session = session.core_session
+    unopened_flow = core_session.load(project(num_nodes))[0]
+    api_flow = core_session.create_flow('api')
+    api_flow.create_node(BenchNode)
+    flows = [window.flow_view.flow, unopened_flow, api_flow]
+
+    t = perf_counter()
+    for flow in flows:
+        core_session.delete_flow(flow)
+    process_events()
+    dt = perf_counter() - t
+
+    if core_session.flows:
+        raise RuntimeError(f'flow deletion: {len(core_session.flows)} flows left')
+
+    window.close()
+    return dt
+
+
+SCENARIOS = {
+    'session startup': session_startup,
+    'flow view construction': flow_view_construction,
+    'paste': paste,
+    'select all': select_all,
+    'drag selection': drag_selection,
+    'zoom sweep': zoom_sweep,
+    'theme switch': theme_switch,
+    'serialization': serialization,
+    'unopened flow loading': unopened_flow_loading,
+    'flow deletion': flow_deletion,
+}
+
+
+#
+# RUNNING AND COMPARING
+#
+
+def run(scenarios: list, sizes: list, repeat: int) -> dict:
+    results = {}
+    for name in scenarios:
+        results[name] = {}
+        for num_nodes in sizes:
+            times = [SCENARIOS[name](num_nodes) for _ in range(repeat)]
+            results[name][str(num_nodes)] = {
+                'min': min(times),
+                'median': median(times),
+                'mean': sum(times) / len(times),
+                'runs': times,
+            }
+            print(f'{name:>24} {num_nodes:>6} nodes: {min(times) * 1000:10.1f}ms min, '
+                  f'{median(times) * 1000:10.1f}ms median')
+    return results
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'qt api': API_NAME,
+        'qt': QT_VERSION,
+        'qpa platform': os.environ['QT_QPA_PLATFORM'],
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Prints the relative change of the min times of all scenarios and sizes contained in both,
+    and returns the ones that got slower by more than threshold"""
+
+    regressions = []
+    print(f'\ncomparison with {baseline["environment"].get("commit")} ({baseline["environment"]["date"]}):')
+    for name, sizes in results.items():
+        for num_nodes, r in sizes.items():
+            b = baseline['results'].get(name, {}).get(num_nodes)
+            if b is None:
+                continue
+
+            change = r['min'] / b['min'] - 1 if b['min'] > 0 else 0
+            regressed = change > threshold
+            if regressed:
+                regressions.append((name, num_nodes, change))
+            print(f'{name:>24} {num_nodes:>6} nodes: {b["min"] * 1000:10.1f}ms -> {r["min"] * 1000:10.1f}ms '
+                  f'({change:+7.1%}){"  REGRESSION" if regressed else ""}')
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='headless GUI benchmarks for ryvencore-qt')
+    parser.add_argument('-n', '--nodes', type=int, nargs='+', default=[100, 500],
+                        help='numbers of nodes of the synthetic flows')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='runs per scenario and size')
+    parser.add_argument('-s', '--scenarios', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS),
+                        metavar='SCENARIO', help='scenarios to run, default: all')
+    parser.add_argument('-o', '--output', help='JSON file to store the results in')
+    parser.add_argument('-c', '--compare', help='JSON file of a previous run to compare with')
+    parser.add_argument('-t', '--threshold', type=float, default=0.2,
+                        help='relative slowdown considered a regression, default: 0.2')
+    parser.add_argument('-l', '--list', action='store_true', help='list all scenarios and exit')
+    args = parser.parse_args()
+
+    if args.list:
+        print('\n'.join(SCENARIOS))
+        return 0
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    data = {
+        'environment': environment(),
+        'nodes': args.nodes,
+        'repeat': args.repeat,
+        'results': run(args.scenarios, args.nodes, args.repeat),
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(data, f, indent=4)
+
+    if baseline is not None and compare(data['results'], baseline, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Node types the synthetic benchmark flows are made of.
+"""
+
+from qtpy.QtWidgets import QLineEdit
+
+import ryvencore_qt as rc
+from ryvencore import NodeInputType, NodeOutputType
+
+
+class LineEditInputWidget(rc.NodeInputWidget, QLineEdit):
+    """A minimal input widget, so flows also contain proxy widgets like real projects"""
+
+    def __init__(self, params):
+        rc.NodeInputWidget.__init__(self, params)
+        QLineEdit.__init__(self)
+
+        self.setFixedWidth(60)
+        self.textEdited.connect(lambda text: self.update_node_input(text))
+
+    def get_state(self) -> dict:
+        return {'text': self.text()}
+
+    def set_state(self, data: dict):
+        self.setText(data['text'])
+
+
+class BenchNodeGUI(rc.NodeGUI):
+    color = '#3f8fd2'
+
+
+class BenchNode(rc.Node):
+    """Passes its input on"""
+
+    title = 'Bench'
+    init_inputs = [
+        NodeInputType(),
+        NodeInputType(),
+    ]
+    init_outputs = [
+        NodeOutputType(),
+    ]
+    GUI = BenchNodeGUI
+
+    def update_event(self, inp=-1):
+        self.set_output_val(0, self.input(0))
+
+
+class BenchWidgetNodeGUI(rc.NodeGUI):
+    color = '#d2893f'
+    input_widget_classes = {
+        'line edit': LineEditInputWidget,
+    }
+    init_input_widgets = {
+        1: {'name': 'line edit', 'pos': 'besides'},
+    }
+
+
+class BenchWidgetNode(rc.Node):
+    """Passes its input on, and has an input widget"""
+
+    title = 'Bench Widget'
+    init_inputs = [
+        NodeInputType(),
+        NodeInputType(),
+    ]
+    init_outputs = [
+        NodeOutputType(),
+    ]
+    GUI = BenchWidgetNodeGUI
+
+    def update_event(self, inp=-1):
+        self.set_output_val(0, self.input(0))
+
+
+export_nodes = [
+    BenchNode,
+    BenchWidgetNode,
+]
@@ -19,3 +19,4 @@ from .src.flows.nodes.WidgetBaseClasses import NodeMainWidget, NodeInputWidget
 # gui classes
 from .src.widgets import *
 from .src.flows.FlowTheme import flow_themes
+from .src.ValuePreviews import register_preview_formatter
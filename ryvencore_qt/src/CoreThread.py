@@ -0,0 +1,176 @@
+import threading
+import traceback
+from collections import deque
+
+from qtpy.QtCore import QObject, QThread, Signal, Qt
+
+
+class CoreThread(QObject):
+    """
+    Runs the flow executions of a session in a worker thread, see SessionGUI(threaded=True).
+
+    Jobs are run one after another, each holding the session's core lock. Changes the GUI makes to the
+    flows are applied between jobs, see run_between_jobs(): while a job is running, they are queued, and
+    the worker pauses after the job until the GUI thread applied them, so the GUI thread never waits for
+    a job.
+    """
+
+    _job_submitted = Signal(object, object)
+    _paused = Signal(object)
+
+    def __init__(self, core_lock):
+        super().__init__()
+
+        self._core_lock = core_lock
+        self._edits = deque()  # [(f, args)], changes of the GUI waiting for the running job to finish
+        self._applying_edits = False
+        self._resume: threading.Event = None
+        self._stopped = False
+
+        self._thread = QThread()
+        self._thread.setObjectName('ryvencore')
+        self._worker = _CoreWorker(core_lock)
+        self._worker.moveToThread(self._thread)
+        self._job_submitted.connect(self._worker.run_job, Qt.QueuedConnection)
+        self._paused.connect(self._apply_edits, Qt.QueuedConnection)
+        self._thread.start()
+
+    def in_core_thread(self) -> bool:
+        return QThread.currentThread() == self._thread
+
+    def run(self, f, *args):
+        """Runs f(*args) in the worker thread, or right away if called from there"""
+
+        if self.in_core_thread():
+            f(*args)
+        else:
+            self._job_submitted.emit(f, args)
+
+    def run_between_jobs(self, f, *args):
+        """Runs f(*args) in the GUI thread while no job is running, so f can change the flows. If a job
+        is running, f is queued and called once it finished, without blocking. Queued calls keep their
+        order, and calls made by f itself are run right away."""
+
+        if self._applying_edits:
+            f(*args)
+            return
+
+        if not self._edits and self._core_lock.acquire(blocking=False):
+            try:
+                self._apply(f, args)
+            finally:
+                self._core_lock.release()
+            return
+
+        self._edits.append((f, args))
+        if len(self._edits) == 1:
+            # the worker pauses for all edits queued until then
+            self._job_submitted.emit(self._pause, ())
+
+    def edits_pending(self) -> bool:
+        """Whether calls of run_between_jobs() are queued"""
+        return len(self._edits) > 0
+
+    def _apply(self, f, args):
+        self._applying_edits = True
+        try:
+            f(*args)
+        finally:
+            self._applying_edits = False
+
+    def _pause(self):
+        """Run by the worker as a job; waits until the GUI thread applied the queued edits"""
+
+        resume = threading.Event()
+        self._resume = resume
+        if self._stopped:
+            return
+        self._paused.emit(resume)
+        resume.wait()
+
+    def _apply_edits(self, resume: threading.Event = None):
+        try:
+            while self._edits:
+                f, args = self._edits.popleft()
+                try:
+                    self._apply(f, args)
+                except Exception:
+                    traceback.print_exc()
+        finally:
+            if resume is not None:
+                resume.set()
+
+    def stop(self):
+        """Finishes the pending jobs and stops the thread, then applies the remaining edits"""
+
+        self._stopped = True
+        if self._resume is not None:
+            self._resume.set()
+        self._thread.quit()
+        self._thread.wait()
+        self._apply_edits()
+
+
+class _CoreWorker(QObject):
+
+    def __init__(self, core_lock):
+        super().__init__()
+        self.core_lock = core_lock
+
+    def run_job(self, f, args):
+        with self.core_lock:
+            try:
+                f(*args)
+            except Exception:
+                traceback.print_exc()
+
+
+class GUIThreadInvoker(QObject):
+    """Calls functions in the GUI thread. Calls from other threads are queued, in the order they were made."""
+
+    _call_requested = Signal(object, object)
+
+    def __init__(self):
+        super().__init__()
+        self._call_requested.connect(self._call, Qt.QueuedConnection)
+
+    def wrap(self, f):
+        """Returns a function calling f in the GUI thread, used to subscribe to ryvencore events"""
+
+        def f_in_gui_thread(*args):
+            if QThread.currentThread() == self.thread():
+                f(*args)
+            else:
+                self._call_requested.emit(f, args)
+
+        return f_in_gui_thread
+
+    @staticmethod
+    def _call(f, args):
+        f(*args)
+
+
+class ThreadedExecutor:
+    """
+    Wraps a flow's executor, so executions started in the GUI thread, e.g. by input widgets or new
+    connections, are run in the core thread.
+    """
+
+    def __init__(self, executor, core_thread: CoreThread):
+        object.__setattr__(self, 'executor', executor)
+        object.__setattr__(self, 'core_thread', core_thread)
+
+    def update_node(self, node, inp):
+        self.core_thread.run(self.executor.update_node, node, inp)
+
+    def set_output_val(self, node, index, val):
+        self.core_thread.run(self.executor.set_output_val, node, index, val)
+
+    def exec_output(self, node, index):
+        self.core_thread.run(self.executor.exec_output, node, index)
+
+    def __getattr__(self, name):
+        return getattr(self.executor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.executor, name, value)
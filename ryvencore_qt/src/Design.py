@@ -4,6 +4,7 @@ from qtpy.QtCore import QObject, Signal
 from qtpy.QtGui import QFontDatabase
 
 from .flows.FlowTheme import FlowTheme, flow_themes
+from .flows.nodes.NodeItemRenderCache import NodeItemRenderCache
 from .GlobalAttributes import Location
 
 
@@ -25,12 +26,32 @@ class Design(QObject):
         self.performance_mode: str = None
         self.node_item_shadows_enabled: bool = None
         self.animations_enabled: bool = None
+        self.lod_enabled: bool = None
+        self.lod_scales: list = None   # [simplified below, flat below], see FlowView.lod_for_scale()
+        self.virtualization_threshold: int = None
+        self.virtualization_max_items: int = None
+        self.connection_layer_threshold: int = None
+        self.minimap_enabled: bool = None
+        self.node_render_cache_size: int = None  # MB
+        self.node_render_cache = NodeItemRenderCache()
+        self.max_gui_refresh_rate: float = None
+        self.widget_creation_scale: float = None
+        self.item_cache_size: int = None
         self.node_selection_stylesheet: str = None
 
         # load standard default values
         self._default_flow_theme = self.flow_themes[-1]
         self.set_performance_mode('pretty')
         self.set_animations_enabled(True)
+        self.set_lod_enabled(True)
+        self.set_lod_scales(0.5, 0.25)
+        self.set_virtualization(2000, 1000)
+        self.set_connection_layer_threshold(5000)
+        self.set_minimap_enabled(False)
+        self.set_node_render_cache_size(32)
+        self.set_max_gui_refresh_rate(60)
+        self.set_widget_creation_scale(0.5)
+        self.set_item_cache_size(200)
         self.default_flow_size = [1000, 700]
         self.set_flow_theme(self._default_flow_theme)
 
@@ -72,6 +93,33 @@ class Design(QObject):
         if 'init animations enabled' in IMPORT_DATA:
             self.set_animations_enabled(IMPORT_DATA['init animations enabled'])
 
+        if 'init lod enabled' in IMPORT_DATA:
+            self.set_lod_enabled(IMPORT_DATA['init lod enabled'])
+
+        if 'lod scales' in IMPORT_DATA:
+            self.set_lod_scales(*IMPORT_DATA['lod scales'])
+
+        if 'virtualization' in IMPORT_DATA:
+            self.set_virtualization(*IMPORT_DATA['virtualization'])
+
+        if 'init connection layer threshold' in IMPORT_DATA:
+            self.set_connection_layer_threshold(IMPORT_DATA['init connection layer threshold'])
+
+        if 'init minimap enabled' in IMPORT_DATA:
+            self.set_minimap_enabled(IMPORT_DATA['init minimap enabled'])
+
+        if 'init node render cache size' in IMPORT_DATA:
+            self.set_node_render_cache_size(IMPORT_DATA['init node render cache size'])
+
+        if 'init max gui refresh rate' in IMPORT_DATA:
+            self.set_max_gui_refresh_rate(IMPORT_DATA['init max gui refresh rate'])
+
+        if 'init widget creation scale' in IMPORT_DATA:
+            self.set_widget_creation_scale(IMPORT_DATA['init widget creation scale'])
+
+        if 'init item cache size' in IMPORT_DATA:
+            self.set_item_cache_size(IMPORT_DATA['init item cache size'])
+
         if 'default flow size' in IMPORT_DATA:
             self.default_flow_size = IMPORT_DATA['default flow size']
 
@@ -94,6 +142,7 @@ class Design(QObject):
             return
 
         self.node_selection_stylesheet = self.flow_theme.build_node_selection_stylesheet()
+        self.node_render_cache.clear()
 
         self.flow_theme_changed.emit(self.flow_theme.name)
 
@@ -113,6 +162,56 @@ class Design(QObject):
     def set_node_item_shadows(self, b: bool):
         self.node_item_shadows_enabled = b
 
+    def set_lod_enabled(self, b: bool):
+        """Enables level-of-detail rendering of node items at low zoom levels"""
+        self.lod_enabled = b
+
+    def set_lod_scales(self, simplified: float, flat: float):
+        """Node items are drawn simplified below the first, and as flat rects without any
+        ports or widgets below the second flow view scale"""
+        self.lod_scales = [simplified, flat]
+
+    def set_virtualization(self, threshold: int, max_items: int):
+        """Flow views of flows with at least threshold nodes only build full node items for the nodes
+        around the visible area, at most max_items of them, and draw placeholders for all others.
+        A threshold of 0 disables virtualization."""
+        self.virtualization_threshold = threshold
+        self.virtualization_max_items = max_items
+
+    def set_connection_layer_threshold(self, threshold: int):
+        """Flow views of flows with at least threshold connections when the view gets built draw all connections
+        with a single ConnectionLayer item instead of one item per connection, without gradients.
+        0 disables it."""
+        self.connection_layer_threshold = threshold
+
+    def set_minimap_enabled(self, b: bool):
+        """Whether new flow views show a minimap, see FlowView.set_minimap_visible()"""
+        self.minimap_enabled = b
+
+    def set_node_render_cache_size(self, mb: int):
+        """Memory budget of the render cache shared by all node items of the session, see NodeItemRenderCache.
+        0 disables it, node items then use their own device coordinate caches. Existing node items switch
+        between both on the next design update."""
+        self.node_render_cache_size = mb
+        self.node_render_cache.set_budget(mb * 1024 * 1024)
+
+    def set_max_gui_refresh_rate(self, rate: float):
+        """Maximum number of times per second input widgets and animations are refreshed after node updates,
+        see RefreshScheduler. 0 refreshes on every single update."""
+        self.max_gui_refresh_rate = rate
+
+    def set_widget_creation_scale(self, scale: float):
+        """Main widgets and input widgets of new node items are only created once the item gets shown at a flow
+        view scale of at least scale, gets hovered, or the widget is requested through the NodeGUI. Until then,
+        placeholders are drawn and the widgets' states from the loaded data are kept. 0 creates them right away."""
+        self.widget_creation_scale = scale
+
+    def set_item_cache_size(self, n: int):
+        """Maximum number of node items, and of connection items, of removed components a flow view keeps for
+        undoing the removal, see ItemCache. Items referenced by undo commands are kept anyway, and items are
+        released as soon as no undo command can restore their component anymore."""
+        self.item_cache_size = n
+
 
 
 
@@ -1,3 +1,5 @@
+import weakref
+
 from ryvencore.Base import Base
 
 
@@ -6,9 +8,13 @@ class GUIBase:
 
     # every frontend GUI object that represents some specific component from the backend
     # is stored there under the the global id of the represented component.
-    # used for completing data (serialization)
+    # used for completing data (serialization). GUI objects are removed explicitly by
+    # unregister() when they get torn down, e.g. when their flow gets deleted
     FRONTEND_COMPONENT_ASSIGNMENTS = {}  # component global id : GUI object
 
+    # all GUI objects alive, for diagnostics, see live_gui_objects()
+    _instances = weakref.WeakSet()
+
     @staticmethod
     def get_complete_data_function(session):
         """
@@ -42,10 +48,33 @@ class GUIBase:
 
         return analyze
 
+    @staticmethod
+    def live_gui_objects(registered_only: bool = False) -> dict:
+        """Returns the number of GUI objects alive per type name, or only of those currently
+        registered as representatives of backend components"""
+
+        objects = GUIBase.FRONTEND_COMPONENT_ASSIGNMENTS.values() if registered_only else GUIBase._instances
+        counts = {}
+        for obj in list(objects):
+            name = type(obj).__name__
+            counts[name] = counts.get(name, 0) + 1
+        return counts
+
     def __init__(self, representing_component: Base = None):
         """parameter `representing` indicates representation of a specific backend component"""
+        self.representing_component_id = None
+        GUIBase._instances.add(self)
         if representing_component is not None:
-            GUIBase.FRONTEND_COMPONENT_ASSIGNMENTS[representing_component.global_id] = self
+            self.representing_component_id = representing_component.global_id
+            GUIBase.FRONTEND_COMPONENT_ASSIGNMENTS[self.representing_component_id] = self
+
+    def unregister(self):
+        """Removes the object from the frontend component assignments, unless another object
+        represents the component by now"""
+
+        gid = self.representing_component_id
+        if gid is not None and GUIBase.FRONTEND_COMPONENT_ASSIGNMENTS.get(gid) is self:
+            del GUIBase.FRONTEND_COMPONENT_ASSIGNMENTS[gid]
 
     # OVERRIDE
     def complete_data(self, data: dict) -> dict:
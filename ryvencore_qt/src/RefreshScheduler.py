@@ -0,0 +1,86 @@
+import threading
+from time import perf_counter
+
+from qtpy.QtCore import QObject, QThread, QTimer, Qt, Signal
+
+
+class RefreshScheduler(QObject):
+    """
+    Rate-limits the GUI refreshes caused by node updates, see Design.set_max_gui_refresh_rate().
+
+    Instead of refreshing input widgets and starting animations on every update of a node, the updated
+    nodes and inputs are recorded, and refreshed together at most max_gui_refresh_rate times per second.
+    Each refresh shows the latest values and gives every node one animation pulse, no matter how often
+    it updated in the meantime. A rate of 0 refreshes synchronously on every update.
+    Updates can be recorded from any thread, the refreshes happen in the GUI thread.
+    """
+
+    _schedule_requested = Signal()
+
+    def __init__(self, design):
+        QObject.__init__(self)
+
+        self.design = design
+        self._dirty = {}  # {NodeGUI: {updated inputs}}, in the order of the first update
+        self._lock = threading.Lock()  # for _dirty and _schedule_pending
+        self._schedule_pending = False  # a request from another thread is on its way
+        self._last_refresh = 0  # ms
+        self._schedule_requested.connect(self._schedule, Qt.QueuedConnection)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self.refresh)
+
+    def node_updating(self, node_gui, inp=None):
+        """Records the update of a node, inp is the updated input or None"""
+
+        in_gui_thread = QThread.currentThread() == self.thread()
+        if in_gui_thread and not self.design.max_gui_refresh_rate:
+            node_gui.refresh({inp} if inp is not None else set())
+            return
+
+        with self._lock:
+            inputs = self._dirty.get(node_gui)
+            if inputs is None:
+                inputs = self._dirty[node_gui] = set()
+            if inp is not None:
+                inputs.add(inp)
+
+            if not in_gui_thread:
+                # one request is enough, no matter how many updates follow until the refresh
+                if self._schedule_pending:
+                    return
+                self._schedule_pending = True
+
+        if in_gui_thread:
+            self._schedule()
+        else:
+            self._schedule_requested.emit()
+
+    def _schedule(self):
+        with self._lock:
+            self._schedule_pending = False
+        if self._timer.isActive():
+            return
+
+        rate = self.design.max_gui_refresh_rate
+        interval = 1000 / rate if rate else 0
+        # an isolated update is shown right away, in the next event loop iteration
+        self._timer.start(max(0, int(self._last_refresh + interval - perf_counter() * 1000)))
+
+    def pending(self) -> int:
+        """Number of nodes waiting for a refresh"""
+        return len(self._dirty)
+
+    def refresh(self):
+        """Refreshes all recorded nodes now"""
+
+        self._timer.stop()
+        self._last_refresh = perf_counter() * 1000
+
+        # refreshing might cause further updates, which are shown in the next refresh
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+        for node_gui, inputs in dirty.items():
+            node_gui.refresh(inputs)
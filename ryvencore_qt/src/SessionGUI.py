@@ -1,3 +1,4 @@
+import threading
 from typing import List
 
 from qtpy.QtCore import QObject, Signal, Qt
@@ -6,8 +7,12 @@ from qtpy.QtWidgets import QWidget, QApplication
 import ryvencore
 
 from .flows.FlowView import FlowView
+from .CoreThread import CoreThread, GUIThreadInvoker, ThreadedExecutor
 from .Design import Design
+from .RefreshScheduler import RefreshScheduler
+from .ValuePreviews import ValuePreviewer
 from .GUIBase import GUIBase
+from .utils import merge_node_frontend_data
 
 
 class SessionGUI(GUIBase, QObject):
@@ -19,14 +24,17 @@ class SessionGUI(GUIBase, QObject):
     :code:`gui` attribute. Once instantiated, you can simply use
     the :code:`session` directly to create, rename, delete flows,
     register nodes, etc.
+    With :code:`threaded=True`, the flows are executed in a worker
+    thread, so the GUI stays responsive while nodes update.
     """
 
     flow_created = Signal(object)
     flow_deleted = Signal(object)
     flow_renamed = Signal(object, str)
     flow_view_created = Signal(object, object)
+    flow_view_requested = Signal(object, object)
 
-    def __init__(self, gui_parent: QWidget):
+    def __init__(self, gui_parent: QWidget, threaded: bool = False):
         GUIBase.__init__(self)
         QObject.__init__(self)
 
@@ -35,8 +43,17 @@ class SessionGUI(GUIBase, QObject):
 
         self.gui_parent = gui_parent
 
-        # flow views
-        self.flow_views = {}  # {Flow : FlowView}
+        # threading, see run_core()
+        self.core_lock = threading.RLock()
+        self.core_thread: CoreThread = CoreThread(self.core_lock) if threaded else None
+        self.gui_thread_invoker = GUIThreadInvoker()
+        if self.core_thread is not None:
+            QApplication.instance().aboutToQuit.connect(self.core_thread.stop)
+
+        # flow views, built on first access, see get_flow_view()
+        self.flow_views = FlowViewsDict(self)  # {Flow : FlowView}
+        self._unbuilt_flow_views = {}  # {Flow : UnbuiltFlowView}
+        self._algorithm_mode_callbacks = {}  # {Flow : callback}, in threaded sessions
 
         # register complete_data function
         ryvencore.set_complete_data_func(self.get_complete_data_function(self))
@@ -47,36 +64,169 @@ class SessionGUI(GUIBase, QObject):
         Design.register_fonts()
         self.design = Design()
 
+        # rate-limits GUI refreshes caused by node updates
+        self.refresh_scheduler = RefreshScheduler(self.design)
+
+        # bounded previews of port values for tooltips
+        self.value_previewer = ValuePreviewer()
+
         # connect to session
-        self.core_session.flow_created.sub(self._flow_created)
-        self.core_session.flow_deleted.sub(self._flow_deleted)
-        self.core_session.flow_renamed.sub(self._flow_renamed)
+        self.core_session.flow_created.sub(self.in_gui_thread(self._flow_created))
+        self.core_session.flow_deleted.sub(self.in_gui_thread(self._flow_deleted))
+        self.core_session.flow_renamed.sub(self.in_gui_thread(self._flow_renamed))
+
+    def run_core(self, f, *args):
+        """
+        Runs f(*args) in the core thread if the session is threaded,
+        otherwise right away.
+        """
+        if self.core_thread is not None:
+            self.core_thread.run(f, *args)
+        else:
+            f(*args)
+
+    def run_between_jobs(self, f, *args):
+        """
+        Runs f(*args), which changes the flows, in the GUI thread while
+        the core thread is not executing a job. If it is, f is called
+        once the job finished, without blocking the GUI.
+        """
+        if self.core_thread is not None:
+            self.core_thread.run_between_jobs(f, *args)
+        else:
+            f(*args)
+
+    def edits_pending(self) -> bool:
+        """
+        Whether calls of run_between_jobs() are waiting for the core
+        thread's running job to finish.
+        """
+        return self.core_thread is not None and self.core_thread.edits_pending()
+
+    def in_gui_thread(self, f):
+        """
+        Returns a function that calls f in the GUI thread, used for all
+        subscriptions to ryvencore events, which might be emitted by the
+        core thread.
+        """
+        return self.gui_thread_invoker.wrap(f)
+
+    def _threaded_executor(self, flow: ryvencore.Flow):
+        if not isinstance(flow.executor, ThreadedExecutor):
+            flow.executor = ThreadedExecutor(flow.executor, self.core_thread)
 
     def _flow_created(self, flow: ryvencore.Flow):
         """
-        Builds the flow view for a newly created flow, saves it in
-        self.flow_views, and emits the flow_view_created signal.
+        Registers a newly created flow. Its flow view is only built
+        once it is accessed, see get_flow_view().
         """
-        self.flow_created.emit(flow)
+        # keeps the flow's frontend data until then
+        self._unbuilt_flow_views[flow] = UnbuiltFlowView(flow)
 
-        self.flow_views[flow] = FlowView(
-            session_gui=self,
-            flow=flow,
-            parent=self.gui_parent,
-        )
-        self.flow_view_created.emit(flow, self.flow_views[flow])
+        if self.core_thread is not None:
+            # executions started from the GUI run in the core thread
+            self._threaded_executor(flow)
+            callback = self._algorithm_mode_callbacks[flow] = lambda mode: self._threaded_executor(flow)
+            flow.algorithm_mode_changed.sub(callback)
+
+        self.flow_created.emit(flow)
 
         return flow
 
+    def get_flow_view(self, flow: ryvencore.Flow):
+        """
+        Returns the flow view of the flow. If it doesn't exist yet, it
+        is built, saved in self.flow_views, and the flow_view_created
+        signal is emitted.
+        """
+        flow_view = self.flow_views.get(flow)
+        if flow_view is None:
+            flow_view = FlowView(
+                session_gui=self,
+                flow=flow,
+                parent=self.gui_parent,
+            )
+            self.flow_views[flow] = flow_view
+            self._unbuilt_flow_views.pop(flow, None)
+            self.flow_view_created.emit(flow, flow_view)
+
+        return flow_view
+
+    def request_flow_view(self, flow: ryvencore.Flow):
+        """
+        Requests the flow view of the flow to be shown, e.g. when the
+        user selects the flow in a list, by emitting the
+        flow_view_requested signal.
+        """
+        self.flow_view_requested.emit(flow, self.get_flow_view(flow))
+
     def _flow_deleted(self, flow: ryvencore.Flow):
         """
-        Removes the flow view for a deleted flow from self.flow_views.
+        Removes the flow view for a deleted flow from self.flow_views
+        and tears it down, see FlowView.release(), and unsubscribes
+        the GUIs of the flow's nodes, if any, from the nodes.
         """
-        self.flow_views.pop(flow)
+        flow_view = self.flow_views.pop(flow, None)
+        if flow_view is not None:
+            flow_view.release()
+        else:
+            unbuilt_flow_view = self._unbuilt_flow_views.pop(flow, None)
+            if unbuilt_flow_view is not None:
+                unbuilt_flow_view.unregister()
+
+        # the nodes of flows whose view was never built don't have GUIs
+        for node in flow.nodes:
+            gui = getattr(node, 'gui', None)
+            if gui is not None:
+                gui.release()
+
+        callback = self._algorithm_mode_callbacks.pop(flow, None)
+        if callback is not None:
+            flow.algorithm_mode_changed.unsub(callback)
+
         self.flow_deleted.emit(flow)
 
     def _flow_renamed(self, flow: ryvencore.Flow, new_name: str):
         """
         Renames the flow view for a renamed flow.
         """
-        self.flow_renamed.emit(flow, new_name)
\ No newline at end of file
+        self.flow_renamed.emit(flow, new_name)
+
+class FlowViewsDict(dict):
+    """
+    The {Flow: FlowView} dict of a session. It only contains the
+    flow views built so far, but indexing it with a flow of the
+    session builds the flow's view, see SessionGUI.get_flow_view().
+    """
+
+    def __init__(self, session_gui: SessionGUI):
+        super().__init__()
+        self.session_gui = session_gui
+
+    def __missing__(self, flow):
+        if flow not in self.session_gui.core_session.flows:
+            raise KeyError(flow)
+        return self.session_gui.get_flow_view(flow)
+
+
+class UnbuiltFlowView(GUIBase):
+    """
+    Represents a flow whose flow view hasn't been built yet, and
+    completes its data by the frontend data it was loaded from.
+    """
+
+    def __init__(self, flow: ryvencore.Flow):
+        GUIBase.__init__(self, representing_component=flow)
+        self.flow = flow
+
+    def complete_data(self, data: dict) -> dict:
+        load_data = self.flow.load_data
+        if load_data is not None and 'flow view' in load_data:
+            data['flow view'] = load_data['flow view']
+
+        data['nodes'] = [
+            merge_node_frontend_data(node_data, node.load_data) if node.load_data is not None else node_data
+            for node, node_data in zip(self.flow.nodes, data['nodes'])
+        ]
+
+        return data
@@ -0,0 +1,227 @@
+import reprlib
+import sys
+import weakref
+from typing import Optional
+
+from qtpy.QtCore import QObject, QRunnable, QThreadPool, Signal, Qt
+
+from .utils import shorten
+
+
+# {qualified type name: (formatter, threaded)}
+_formatters = {}
+
+
+def register_preview_formatter(type_name: str, formatter, threaded: bool = False):
+    """
+    Registers formatter(value, max_chars) -> str to preview values of the type with the given qualified
+    name, e.g. 'numpy.ndarray', and of its subclasses. Types are referenced by name, so their modules
+    don't need to be imported. Formatters which might take a while should be registered as threaded,
+    they are then run in a worker thread by the ValuePreviewer.
+    """
+    _formatters[type_name] = (formatter, threaded)
+
+
+def qualified_name(cls: type) -> str:
+    return f'{cls.__module__}.{cls.__qualname__}'
+
+
+def preview_formatter(value) -> tuple:
+    """Returns the (formatter, threaded) registered for the type of value or its closest base class"""
+
+    for cls in type(value).__mro__:
+        f = _formatters.get(qualified_name(cls))
+        if f is not None:
+            return f
+    return _formatters['builtins.object']
+
+
+def preview(value, max_chars: int = 1000) -> str:
+    """Returns a preview of value of at most max_chars characters, computed in the calling thread"""
+
+    formatter, _ = preview_formatter(value)
+    try:
+        s = formatter(value, max_chars)
+    except Exception as e:
+        s = f'<{qualified_name(type(value))}, no preview: {e}>'
+    return shorten(s, max_chars, line_break=True)
+
+
+class ValuePreviewer(QObject):
+    """
+    Computes bounded previews of port values, e.g. for tooltips, see register_preview_formatter().
+
+    The latest preview per key (e.g. a port) is cached as long as the owner of the value (e.g. the
+    ryvencore Data object) stays the same. Previews of types registered as threaded are computed in a
+    worker thread, in which case preview() returns None and preview_ready is emitted when it's done.
+    """
+
+    preview_ready = Signal(object, str)  # key, preview
+
+    _computed = Signal(object, object, str)  # key, owner ref, preview
+
+    def __init__(self, max_chars: int = 1000):
+        QObject.__init__(self)
+
+        self.max_chars = max_chars
+        self._cache = weakref.WeakKeyDictionary()  # {key: (owner ref, preview)}
+        self._pending = weakref.WeakKeyDictionary()  # {key: owner ref}, previews being computed
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self._computed.connect(self._on_computed, Qt.QueuedConnection)
+
+    def preview(self, key, value, owner=None) -> Optional[str]:
+        """
+        Returns the preview of value, which is currently held by owner (defaults to value) for key, or
+        None if it is being computed in the background.
+        """
+
+        if owner is None:
+            owner = value
+        try:
+            ref = weakref.ref(owner)
+        except TypeError:
+            ref = None  # not cached
+
+        cached = self._cache.get(key)
+        if cached is not None and ref is not None and cached[0]() is owner:
+            return cached[1]
+
+        formatter, threaded = preview_formatter(value)
+        if not threaded:
+            text = preview(value, self.max_chars)
+            if ref is not None:
+                self._cache[key] = (ref, text)
+            return text
+
+        pending = self._pending.get(key)
+        if pending is None or pending() is not owner:
+            self._pending[key] = ref if ref is not None else (lambda: owner)
+            self._pool.start(_PreviewJob(self, key, value, self._pending[key]))
+        return None
+
+    def _on_computed(self, key, ref, text):
+        if self._pending.get(key) is not ref:
+            return  # outdated
+
+        del self._pending[key]
+        if isinstance(ref, weakref.ref):
+            if ref() is None:
+                return
+            self._cache[key] = (ref, text)
+        self.preview_ready.emit(key, text)
+
+
+class _PreviewJob(QRunnable):
+
+    def __init__(self, previewer: ValuePreviewer, key, value, ref):
+        QRunnable.__init__(self)
+        self.previewer = previewer
+        self.key = key
+        self.value = value
+        self.ref = ref
+
+    def run(self):
+        text = preview(self.value, self.previewer.max_chars)
+        self.previewer._computed.emit(self.key, self.ref, text)
+        self.value = None
+
+
+#
+# FORMATTERS
+#
+
+PREVIEW_ITEMS = 6   # items of containers
+PREVIEW_ROWS = 5    # rows of tables
+PREVIEW_COLUMNS = 8  # columns of tables
+
+
+def _str_preview(value, max_chars):
+    return shorten(value, max_chars, line_break=True)
+
+
+def _builtin_preview(value, max_chars):
+    return str(value)
+
+
+class _PreviewRepr(reprlib.Repr):
+    """
+    Repr of containers which previews their items by the registered formatters instead of repr(), whose
+    cost is unknown, and only names the types of items whose formatters are threaded.
+    """
+
+    _container_modules = ('builtins', 'collections', 'array')
+
+    def __init__(self, max_chars):
+        reprlib.Repr.__init__(self)
+        self.maxlevel = 3
+        self.maxtuple = self.maxlist = self.maxarray = self.maxdict = self.maxset = self.maxfrozenset = \
+            self.maxdeque = PREVIEW_ITEMS
+        self.maxstring = self.maxother = max_chars
+
+    def repr1(self, x, level):
+        # subclasses of containers are represented like the containers, their repr() might take a while
+        for cls in type(x).__mro__:
+            if cls.__module__ in self._container_modules and hasattr(self, 'repr_' + cls.__name__):
+                return getattr(self, 'repr_' + cls.__name__)(x, level)
+        return self.repr_instance(x, level)
+
+    def repr_instance(self, x, level):
+        formatter, threaded = preview_formatter(x)
+        if threaded:
+            return f'<{qualified_name(type(x))}>'
+        try:
+            s = formatter(x, self.maxother)
+        except Exception:
+            return f'<{qualified_name(type(x))}>'
+        return shorten(s, self.maxother)
+
+
+def _repr_preview(value, max_chars):
+    return _PreviewRepr(max_chars).repr(value)
+
+
+def _bytes_preview(value, max_chars):
+    if len(value) <= max_chars:
+        return repr(value)
+    return f'{type(value).__name__} of {len(value)} bytes\n' + repr(value[:max_chars])
+
+
+def _object_preview(value, max_chars):
+    # the cost of str() is unknown, therefore registered as threaded
+    return str(value)
+
+
+def _array_preview(value, max_chars):
+    np = sys.modules['numpy']
+    head = f'{type(value).__name__} {value.shape} {value.dtype}'
+    if value.size == 0:
+        return head
+    return head + '\n' + np.array2string(
+        value, threshold=PREVIEW_ITEMS ** 2, edgeitems=PREVIEW_ITEMS // 2, max_line_width=80
+    )
+
+
+def _table_preview(value, max_chars):
+    rows, cols = value.shape
+    return f'{type(value).__name__} {rows} rows x {cols} columns\n' + \
+        value.head(PREVIEW_ROWS).to_string(max_cols=PREVIEW_COLUMNS)
+
+
+def _series_preview(value, max_chars):
+    return f'{type(value).__name__} {len(value)} rows {value.dtype}\n' + \
+        value.head(PREVIEW_ROWS).to_string()
+
+
+for t in ('int', 'float', 'complex', 'bool', 'NoneType'):
+    register_preview_formatter(f'builtins.{t}', _builtin_preview)
+for t in ('bytes', 'bytearray'):
+    register_preview_formatter(f'builtins.{t}', _bytes_preview)
+for t in ('list', 'tuple', 'dict', 'set', 'frozenset', 'collections.deque'):
+    register_preview_formatter(t if '.' in t else f'builtins.{t}', _repr_preview)
+register_preview_formatter('builtins.str', _str_preview)
+register_preview_formatter('builtins.object', _object_preview, threaded=True)
+register_preview_formatter('numpy.ndarray', _array_preview)
+register_preview_formatter('pandas.core.frame.DataFrame', _table_preview, threaded=True)
+register_preview_formatter('pandas.core.series.Series', _series_preview, threaded=True)
@@ -8,6 +8,7 @@ from qtpy.QtWidgets import QUndoCommand
 
 from .drawings.DrawingObject import DrawingObject
 from .nodes.NodeItem import NodeItem
+from .nodes.NodeItemPlaceholder import NodeItemPlaceholder
 from typing import Tuple
 from ryvencore.NodePort import NodePort, NodeInput, NodeOutput
 
@@ -18,8 +19,13 @@ class FlowUndoCommand(QObject, QUndoCommand):
     undo command to the undo stack before redo() is called. This is important since some of these commands can cause
     other commands to be added while they are performing redo(), so to prevent those commands to be added to the
     undo stack before the parent command, it is here blocked at first.
+    Commands changing the flow (edits_core) are applied between the jobs of a threaded session's core thread,
+    so they might be applied after a running job finished, see SessionGUI.run_between_jobs(). Other commands
+    are then queued behind them, so the commands are always applied in the order of the undo stack.
     """
 
+    edits_core = True
+
     def __init__(self, flow_view):
 
         self.flow_view = flow_view
@@ -36,11 +42,19 @@ class FlowUndoCommand(QObject, QUndoCommand):
     def redo(self) -> None:
         if not self._activated:
             return
-        else:
-            self.redo_()
+        self._run(self.redo_)
 
     def undo(self) -> None:
-        self.undo_()
+        self._run(self.undo_)
+
+    def _run(self, f):
+        session_gui = self.flow_view.session_gui
+        if self.edits_core or session_gui.edits_pending():
+            # changes to the flow are not made while the core thread is executing it,
+            # and no command overtakes the ones waiting for that
+            session_gui.run_between_jobs(f)
+        else:
+            f()
 
     def redo_(self):
         """subclassed"""
@@ -50,8 +64,21 @@ class FlowUndoCommand(QObject, QUndoCommand):
         """subclassed"""
         pass
 
+    def referenced_items(self) -> list:
+        """subclassed; returns the graphics items the command operates on, which therefore must not
+        be replaced by the flow view as long as the command is on the undo stack"""
+        return []
+
+    def restorable_components(self) -> list:
+        """subclassed; returns the nodes and connections the command might add back to the flow, whose
+        removed items the flow view therefore keeps as long as the command is on the undo stack"""
+        return []
+
 
 class MoveComponents_Command(FlowUndoCommand):
+
+    edits_core = False
+
     def __init__(self, flow_view, items_list, p_from, p_to):
         super(MoveComponents_Command, self).__init__(flow_view)
 
@@ -61,19 +88,38 @@ class MoveComponents_Command(FlowUndoCommand):
         self.last_item_group_pos = p_to
 
     def undo_(self):
-        items_group = self.items_group()
-        items_group.setPos(self.p_from)
-        self.last_item_group_pos = items_group.pos()
-        self.destroy_items_group(items_group)
+        with self.flow_view.bulk_move():
+            items_group = self.items_group()
+            items_group.setPos(self.p_from)
+            self.last_item_group_pos = items_group.pos()
+            self.destroy_items_group(items_group)
 
     def redo_(self):
-        items_group = self.items_group()
-        items_group.setPos(self.p_to - self.last_item_group_pos)
-        self.destroy_items_group(items_group)
+        with self.flow_view.bulk_move():
+            items_group = self.items_group()
+            items_group.setPos(self.p_to - self.last_item_group_pos)
+            self.destroy_items_group(items_group)
 
 
+    def referenced_items(self) -> list:
+        return self.items_list
+
     def items_group(self):
-        return self.flow_view.scene().createItemGroup(self.items_list)
+        return self.flow_view.scene().createItemGroup(self.current_items())
+
+    def current_items(self) -> list:
+        """In virtualized flow views, node items and placeholders replace each other, so the moved
+        nodes are represented by whichever of them is in the scene now. Items removed from the scene
+        in the meantime, e.g. by a removal queued before the move, are not moved"""
+
+        fv = self.flow_view
+        items = []
+        for i in self.items_list:
+            if isinstance(i, (NodeItem, NodeItemPlaceholder)):
+                i = fv.node_items.get(i.node) or fv.node_placeholders.get(i.node) or i
+            if i.scene() is not None:
+                items.append(i)
+        return items
 
     def destroy_items_group(self, items_group):
         self.flow_view.scene().destroyItemGroup(items_group)
@@ -97,8 +143,14 @@ class PlaceNode_Command(FlowUndoCommand):
         else:
             self.node = self.flow.create_node(self.node_class)
 
+    def restorable_components(self) -> list:
+        return [self.node] if self.node else []
+
 
 class PlaceDrawing_Command(FlowUndoCommand):
+
+    edits_core = False
+
     def __init__(self, flow_view, posF, drawing):
         super().__init__(flow_view)
 
@@ -135,9 +187,15 @@ class RemoveComponents_Command(FlowUndoCommand):
             if isinstance(i, NodeItem):
                 self.node_items.append(i)
                 self.nodes.append(i.node)
+            elif isinstance(i, NodeItemPlaceholder):
+                # the flow view builds the node's item when the node gets removed
+                self.nodes.append(i.node)
             elif isinstance(i, DrawingObject):
                 self.drawings.append(i)
 
+        # removing drawings only doesn't change the flow
+        self.edits_core = len(self.nodes) > 0
+
         for n in self.nodes:
             for i in n.inputs:
                 cp = n.flow.connected_output(i)
@@ -157,17 +215,18 @@ class RemoveComponents_Command(FlowUndoCommand):
 
     def undo_(self):
 
-        # add nodes
-        for n in self.nodes:
-            self.flow.add_node(n)
+        with self.flow_view.bulk_insert():
+            # add nodes
+            for n in self.nodes:
+                self.flow.add_node(n)
 
-        # add drawings
-        for d in self.drawings:
-            self.flow_view.add_drawing(d)
+            # add drawings
+            for d in self.drawings:
+                self.flow_view.add_drawing(d)
 
-        # add connections
-        self.restore_broken_connections()
-        self.restore_internal_connections()
+            # add connections
+            self.restore_broken_connections()
+            self.restore_internal_connections()
 
     def redo_(self):
 
@@ -183,6 +242,13 @@ class RemoveComponents_Command(FlowUndoCommand):
         for d in self.drawings:
             self.flow_view.remove_drawing(d)
 
+    def referenced_items(self) -> list:
+        # node items are not needed, the nodes get added back
+        return self.drawings
+
+    def restorable_components(self) -> list:
+        return self.nodes + self.broken_connections + list(self.internal_connections)
+
     def restore_internal_connections(self):
         for c in self.internal_connections:
             self.flow.add_connection(c)
@@ -237,6 +303,9 @@ class ConnectPorts_Command(FlowUndoCommand):
             # remove existing connection
             self.flow.remove_connection(self.connection)
 
+    def restorable_components(self) -> list:
+        return [self.connection] if self.connection else []
+
 
 
 
@@ -261,22 +330,28 @@ class Paste_Command(FlowUndoCommand):
             drawing['pos y'] = drawing['pos y'] + offset.y()
 
     def redo_(self):
-        if self.pasted_components is None:
-            self.pasted_components = {}
+        with self.flow_view.bulk_insert():
+            if self.pasted_components is None:
+                self.pasted_components = {}
 
-            # create components
-            self.create_drawings()
+                # create components
+                self.create_drawings()
 
-            self.pasted_components['nodes'], self.pasted_components['connections'] = \
-                self.flow.load_components(
-                    nodes_data=self.data['nodes'],
-                    conns_data=self.data['connections'],
-                    output_data=self.data['output data'],
-                )
+                self.pasted_components['nodes'], self.pasted_components['connections'] = \
+                    self.flow.load_components(
+                        nodes_data=self.data['nodes'],
+                        conns_data=self.data['connections'],
+                        output_data=self.data['output data'],
+                    )
 
-            self.select_new_components_in_view()
-        else:
-            self.add_existing_components()
+                self.select_new_components_in_view()
+            else:
+                self.add_existing_components()
+
+    def restorable_components(self) -> list:
+        if self.pasted_components is None:
+            return []
+        return list(self.pasted_components['nodes']) + list(self.pasted_components['connections'])
 
     def undo_(self):
         # remove components and their items from flow
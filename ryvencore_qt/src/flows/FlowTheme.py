@@ -42,6 +42,7 @@ NodeWidget {
     flow_highlight_pen_color = QColor('#245d75')
 
     node_item_shadow_color = QColor('#2b2b2b')
+    node_item_shadow_corner_radii = {'normal': 5, 'small': 8}  # {node style: corner radius}, see NodeItemShadow
 
     EXPORT = []
 
@@ -111,6 +112,21 @@ NodeWidget {
                       painter: QPainter, c: QColor, w, h, bounding_rect, background_color=None):
         pass
 
+    def paint_NI_lod(self, node_gui, selected: bool, painter: QPainter, color: QColor, bounding_rect, lod: str):
+        """Cheap replacement for paint_NI() at low zoom levels. 'simplified' node items are drawn as a plain
+        rect in the node's color (the title is still drawn by the title label), 'flat' ones as an opaque rect."""
+
+        c = QColor(color)
+        if selected:
+            c = c.lighter()
+        if lod == 'simplified':
+            c.setAlpha(180)
+
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(c)
+        painter.drawRect(bounding_rect)
+
     def paint_NI_selection_border(self, ni, painter: QPainter, color: QColor, w, h, bounding_rect):
         pen = QPen(self.flow_highlight_pen_color)
         pen.setWidth(3)
@@ -220,6 +236,7 @@ NodeWidget {
 
 class FlowTheme_Toy(FlowTheme):
     name = 'Toy'
+    node_item_shadow_corner_radii = {'normal': 12, 'small': 8}
 
     node_selection_stylesheet = ''
 
@@ -663,6 +680,7 @@ class FlowTheme_Ghost(FlowTheme):
 
 class FlowTheme_Blender(FlowTheme):
     name = 'Blender'
+    node_item_shadow_corner_radii = {'normal': 5, 'small': 10}
 
     node_selection_stylesheet = ''
 
@@ -798,6 +816,7 @@ class FlowTheme_Blender(FlowTheme):
 class FlowTheme_Simple(FlowTheme):
     name = 'Simple'
     type_ = 'dark'
+    node_item_shadow_corner_radii = {'normal': 9, 'small': 10}
 
     node_selection_stylesheet = ''
 
@@ -1230,6 +1249,7 @@ NodeWidget {
 
 class FlowTheme_Colorful(FlowTheme):
     name = 'colorful dark'
+    node_item_shadow_corner_radii = {'normal': 7, 'small': 8}
 
     header_padding = (12, 0, 2, 2)
 
@@ -1407,6 +1427,7 @@ class FlowTheme_Industrial(FlowTheme):
 
     node_color = QColor(10, 10, 10, 250)
     node_item_shadow_color = QColor(0, 0, 0)
+    node_item_shadow_corner_radii = {'normal': 2, 'small': 2}
 
     def paint_NI_title_label(self, node_gui, selected, hovering, painter, option, node_style, node_title, node_color,
                              node_item_bounding_rect):
@@ -1535,6 +1556,7 @@ class FlowTheme_Fusion(FlowTheme):
     port_pin_pen_color = QColor('#1f1f1f')
 
     node_item_shadow_color = QColor('#cccccc')
+    node_item_shadow_corner_radii = {'normal': 3, 'small': 4}
 
 
     def paint_NI_title_label(self, node_gui, selected, hovering, painter, option, node_style, node_title, node_color,
@@ -1,9 +1,11 @@
 import json
+from contextlib import contextmanager
 
 from typing import Tuple
 
-from qtpy.QtCore import Qt, QPointF, QPoint, QRectF, QSizeF, Signal, QTimer, QTimeLine, QEvent
-from qtpy.QtGui import QPainter, QPen, QColor, QKeySequence, QTabletEvent, QImage, QGuiApplication, QFont, QTouchEvent
+from qtpy.QtCore import Qt, QPointF, QPoint, QRectF, QSizeF, QMarginsF, Signal, QTimer, QEvent
+from qtpy.QtGui import QPainter, QPen, QColor, QKeySequence, QTabletEvent, QImage, QGuiApplication, QFont, QTouchEvent, \
+    QPixmap
 from qtpy.QtWidgets import QGraphicsView, QGraphicsScene, QShortcut, QMenu, QGraphicsItem, QUndoStack
 
 from ryvencore.Flow import Flow
@@ -18,14 +20,21 @@ from ..GUIBase import GUIBase
 from ..utils import *
 from .FlowCommands import MoveComponents_Command, PlaceNode_Command, \
     PlaceDrawing_Command, RemoveComponents_Command, ConnectPorts_Command, Paste_Command, FlowUndoCommand
+from .FlowViewClock import FlowViewClock
+from .FlowViewExporter import FlowViewExporter
+from .FlowViewMinimap import FlowViewMinimap
+from .FlowViewProfiler import FlowViewProfiler
 from .FlowViewProxyWidget import FlowViewProxyWidget
 from .FlowViewStylusModesWidget import FlowViewStylusModesWidget
+from .ItemCache import ItemCache
 from .node_list_widget.NodeListWidget import NodeListWidget
 from .nodes.NodeGUI import NodeGUI
 from .nodes.NodeItem import NodeItem
+from .nodes.NodeItemPlaceholder import NodeItemPlaceholder
 from .nodes.PortItem import PortItemPin, PortItem
 from .connections.ConnectionItem import default_cubic_connection_path, ConnectionItem, DataConnectionItem, \
-    ExecConnectionItem
+    ExecConnectionItem, recompute_connections
+from .connections.ConnectionLayer import ConnectionLayer, LayerConnection
 from .drawings.DrawingObject import DrawingObject
 
 
@@ -47,6 +56,18 @@ class FlowView(GUIBase, QGraphicsView):
 
     viewport_update_mode_changed = Signal(str)
 
+    # in 'auto' item index mode, the scene uses a BSP tree index once it contains at least
+    # BSP_INDEX_MIN_ITEMS node and connection items, but falls back to no index while more
+    # than BSP_INDEX_MAX_MOVING_ITEMS items are being moved, since every move of an indexed
+    # item also updates the tree
+    BSP_INDEX_MIN_ITEMS = 500
+    BSP_INDEX_MAX_MOVING_ITEMS = 100
+
+    # in virtualized views, node items are built and replaced by placeholders at most this often (ms)
+    VIRTUALIZATION_UPDATE_INTERVAL = 50
+    # the scene rect always contains all components plus this margin, see _update_scene_rect()
+    SCENE_RECT_MARGIN = 1000
+
     def __init__(self, session_gui, flow, parent=None):
         GUIBase.__init__(self, representing_component=flow)
         QGraphicsView.__init__(self, parent=parent)
@@ -63,12 +84,14 @@ class FlowView(GUIBase, QGraphicsView):
 
         # GENERAL ATTRIBUTES
         self.session_gui = session_gui
+        self.clock = FlowViewClock(self)  # drives all animations in the view
 
         self.flow: Flow = flow
         self.node_items: dict = {}  # {Node: NodeItem}
-        self.node_items__cache: dict = {}
+        self.node_items__cache = ItemCache()  # items of removed nodes, see _prune_item_caches()
         self.connection_items: dict = {}  # {Connection: ConnectionItem}
-        self.connection_items__cache: dict = {}
+        self.connection_items__cache = ItemCache()
+        self.node_placeholders: dict = {}  # {Node: NodeItemPlaceholder}, see Design.set_virtualization()
 
         # PRIVATE FIELDS
         self._tmp_data = None
@@ -92,7 +115,43 @@ class FlowView(GUIBase, QGraphicsView):
             'viewport pos': None,
             'scene pos': None,
             'delta': 0,
+            'steps': 0,
+            'time': None,
         }
+        self._item_index_mode = 'auto'
+        self._moving_items_count = 0
+        self._lod = 'full'
+        self._background_grid_tiles = {}  # {(theme name, resolution): QPixmap}
+        self._virtualized = self._virtualization_wanted()
+        self._virtualization_timer = QTimer(self)
+        self._virtualization_timer.setSingleShot(True)
+        self._virtualization_timer.setInterval(self.VIRTUALIZATION_UPDATE_INTERVAL)
+        self._virtualization_timer.timeout.connect(self._update_virtualization)
+        self._selected_node_items = {}  # used as ordered set, maintained by node_item_selection_changed()
+        self._selected_placeholders = {}  # used as ordered set, like above
+        self._selection_changed_timer = QTimer(self)
+        self._selection_changed_timer.setSingleShot(True)
+        self._selection_changed_timer.setInterval(0)
+        self._selection_changed_timer.timeout.connect(self._emit_nodes_selection_changed)
+        self._widget_requests = {}  # {NodeItem: None}, see request_widgets()
+        self._widget_creation_timer = QTimer(self)
+        self._widget_creation_timer.setSingleShot(True)
+        self._widget_creation_timer.setInterval(0)
+        self._widget_creation_timer.timeout.connect(self._create_requested_widgets)
+        self._item_cache_timer = QTimer(self)
+        self._item_cache_timer.setSingleShot(True)
+        self._item_cache_timer.setInterval(0)
+        self._item_cache_timer.timeout.connect(self._prune_item_caches)
+        self._undo_stack.indexChanged.connect(self._schedule_item_cache_pruning)
+        self._bulk_insert_depth = 0
+        self._bulk_move_depth = 0
+        self._moved_connection_items = {}  # used as ordered set, see connection_items_moved()
+        self._bulk_insert_selection_changed = False
+        self._bulk_insert_viewport_update_mode = None
+        self._minimap: FlowViewMinimap = None
+        self._items_rect = QRectF()  # cached bounding rect of all nodes and drawings, see items_bounding_rect()
+        self._items_rect_outdated = False
+        self.profiler: FlowViewProfiler = None  # see set_profiling_enabled()
 
         # CONNECTIONS TO FLOW
         self.create_node_request.connect(self.flow.create_node)
@@ -104,16 +163,22 @@ class FlowView(GUIBase, QGraphicsView):
         self.get_flow_data_request.connect(self.flow.data)
 
         # CONNECTIONS FROM FLOW
-        self.flow.node_added.sub(self.add_node)
-        self.flow.node_removed.sub(self.remove_node)
-        self.flow.connection_added.sub(self.add_connection)
-        self.flow.connection_removed.sub(self.remove_connection)
-        self.flow.connection_request_valid.sub(self.connection_request_valid)
+        in_gui_thread = self.session_gui.in_gui_thread
+        self._flow_subscriptions = [  # [(event, callback)], see release()
+            (self.flow.node_added, in_gui_thread(self.add_node)),
+            (self.flow.node_removed, in_gui_thread(self.remove_node)),
+            (self.flow.connection_added, in_gui_thread(self.add_connection)),
+            (self.flow.connection_removed, in_gui_thread(self.remove_connection)),
+            (self.flow.connection_request_valid, in_gui_thread(self.connection_request_valid)),
+        ]
+        for event, callback in self._flow_subscriptions:
+            event.sub(callback)
 
         # CREATE UI
         scene = QGraphicsScene(self)
         scene.setItemIndexMethod(QGraphicsScene.NoIndex)
-        scene.setSceneRect(0, 0, 10000, 7000)
+        # grows with the components, see _update_scene_rect()
+        scene.setSceneRect(0, 0, *self.session_gui.design.default_flow_size)
 
         self.setScene(scene)
         self.setCacheMode(QGraphicsView.CacheBackground)
@@ -126,9 +191,6 @@ class FlowView(GUIBase, QGraphicsView):
 
         self.centerOn(QPointF(self.viewport().width() / 2, self.viewport().height() / 2))
 
-        self.scene_rect_width = self.mapFromScene(self.sceneRect()).boundingRect().width()
-        self.scene_rect_height = self.mapFromScene(self.sceneRect()).boundingRect().height()
-
         # NODE LIST WIDGET
         self._node_list_widget = NodeListWidget(self.session_gui)
         self._node_list_widget.setMinimumWidth(260)
@@ -179,20 +241,32 @@ class FlowView(GUIBase, QGraphicsView):
 
         # DATA
         data = self.flow.load_data
-        if data is not None:
+        if data is not None and 'flow view' in data:  # the flow might have been loaded without GUI data
             view_data = data['flow view']
             if 'drawings' in view_data:  # not all (old) project files have drawings arr
                 self.place_drawings_from_data(view_data['drawings'])
-            if 'view size' in view_data:
-                self.setSceneRect(0, 0, view_data['view size'][0], view_data['view size'][1])
+            # 'view size' of old project files is ignored, the scene rect is computed from the components
 
             self._undo_stack.clear()
 
+        # CONNECTION LAYER
+        self._connection_layer: ConnectionLayer = None
+        if self._connection_layer_wanted():
+            self._connection_layer = ConnectionLayer(self, self.session_gui.design)
+            self.scene().addItem(self._connection_layer)
+
         # CATCH UP ON FLOW
-        for node in self.flow.nodes:
-            self.add_node(node)
-        for c in [(o, i) for o, conns in self.flow.graph_adj.items() for i in conns]:
-            self.add_connection(c)
+        with self.bulk_insert():
+            for node in self.flow.nodes:
+                self.add_node(node)
+            for c in [(o, i) for o, conns in self.flow.graph_adj.items() for i in conns]:
+                self.add_connection(c)
+
+        self._update_item_index_method()
+
+        # MINIMAP
+        if self.session_gui.design.minimap_enabled:
+            self.set_minimap_visible(True)
 
     def _init_shortcuts(self):
         place_new_node_shortcut = QShortcut(QKeySequence('Shift+P'), self)
@@ -221,10 +295,12 @@ class FlowView(GUIBase, QGraphicsView):
 
     def _theme_changed(self, t):
         self._node_list_widget.setStyleSheet(self.session_gui.design.node_selection_stylesheet)
-        for n, ni in self.node_items.items():
-            ni.widget.rebuild_ui()
+        # the node items update themselves, see NodeItem.update_design()
 
-        # TODO: repaint background. how?
+        self._background_grid_tiles.clear()
+        self.resetCachedContent()
+        if self._minimap is not None:
+            self._minimap.rebuild()
         self.viewport().update()
         self.scene().update(self.sceneRect())
 
@@ -240,8 +316,28 @@ class FlowView(GUIBase, QGraphicsView):
         self.scene().update(self.sceneRect())
 
     def _scene_selection_changed(self):
+        """Schedules the nodes_selection_changed signal, so it's emitted at most once per event loop
+        iteration, no matter how many items changed their selection state"""
+
+        if self._bulk_insert_depth > 0:
+            self._bulk_insert_selection_changed = True
+            return
+
+        if not self._selection_changed_timer.isActive():
+            self._selection_changed_timer.start()
+
+    def _emit_nodes_selection_changed(self):
         self.nodes_selection_changed.emit(self.selected_nodes())
 
+    def node_item_selection_changed(self, item, selected: bool):
+        """Called by node items and node item placeholders when they got (de)selected"""
+
+        selection = self._selected_placeholders if isinstance(item, NodeItemPlaceholder) else self._selected_node_items
+        if selected and item.scene() is self.scene():
+            selection[item] = None
+        else:
+            selection.pop(item, None)
+
     def contextMenuEvent(self, event):
         QGraphicsView.contextMenuEvent(self, event)
         # in the case of the menu already being shown by a widget under the mouse, the event is accepted here
@@ -269,6 +365,22 @@ class FlowView(GUIBase, QGraphicsView):
         self._undo_stack.redo()
         self.viewport().update()
 
+    def scrollContentsBy(self, dx, dy):
+        QGraphicsView.scrollContentsBy(self, dx, dy)
+        self._schedule_virtualization_update()
+        if self._minimap is not None:
+            self._minimap.update()
+
+    def resizeEvent(self, event):
+        QGraphicsView.resizeEvent(self, event)
+        self._schedule_virtualization_update()
+        if self._minimap is not None:
+            self._place_minimap()
+
+    def showEvent(self, event):
+        QGraphicsView.showEvent(self, event)
+        self._schedule_virtualization_update()
+
     def mousePressEvent(self, event):
         # InfoMsgs.write('mouse press event received, point:', event.pos())
 
@@ -297,7 +409,11 @@ class FlowView(GUIBase, QGraphicsView):
 
     def mouseMoveEvent(self, event):
 
-        QGraphicsView.mouseMoveEvent(self, event)
+        with self.bulk_move():  # all selected items move
+            QGraphicsView.mouseMoveEvent(self, event)
+
+        if self._connection_layer is not None and event.buttons() == Qt.NoButton:
+            self._connection_layer.hover(self.mapToScene(event.pos()))
 
         if self._right_mouse_pressed_in_flow:  # PAN
 
@@ -403,21 +519,31 @@ class FlowView(GUIBase, QGraphicsView):
             if self._zoom_data['delta'] * event.delta() < 0:
                 self._zoom_data['delta'] = event.delta()
 
-            anim = QTimeLine(100, self)
-            anim.setUpdateInterval(10)
-            anim.valueChanged.connect(self._scaling_time)
-            anim.start()
+            self._zoom_data['steps'] += 10  # per wheel event, zoom for 100ms
+
+            if not self.clock.is_running(self._advance_zoom):
+                self._zoom_data['time'] = self.clock.now()
+                self.clock.add(self._advance_zoom)
 
         else:
             super().wheelEvent(event)
 
-    def _scaling_time(self, x):
-        delta = self._zoom_data['delta'] / 8
-        if abs(delta) <= 5:
+    def _advance_zoom(self, now: float) -> bool:
+        """Zoom easing, driven by the clock: every 10ms step zooms by 1/8 of the remaining wheel delta"""
+
+        steps = min(self._zoom_data['steps'], (now - self._zoom_data['time']) / 10)
+        self._zoom_data['steps'] -= steps
+        self._zoom_data['time'] = now
+
+        delta = self._zoom_data['delta'] * (1 - (7 / 8) ** steps)
+        if abs(self._zoom_data['delta']) / 8 <= 5:
             delta = self._zoom_data['delta']
         self._zoom_data['delta'] -= delta
 
-        self.zoom(self._zoom_data['viewport pos'], self._zoom_data['scene pos'], delta)
+        if delta != 0:
+            self.zoom(self._zoom_data['viewport pos'], self._zoom_data['scene pos'], delta)
+
+        return self._zoom_data['steps'] > 0
 
     def viewportEvent(self, event: QEvent) -> bool:
         """handling some touch features here"""
@@ -455,6 +581,13 @@ class FlowView(GUIBase, QGraphicsView):
             self.setDragMode(QGraphicsView.RubberBandDrag)
             return True
 
+        elif event.type() == QEvent.Paint and self.profiler is not None:
+            self.profiler.frame_started()
+            try:
+                return super().viewportEvent(event)
+            finally:
+                self.profiler.frame_finished()
+
         else:
             return super().viewportEvent(event)
 
@@ -554,31 +687,71 @@ class FlowView(GUIBase, QGraphicsView):
     # PAINTING
     def drawBackground(self, painter, rect):
 
-        painter.setBrush(self.session_gui.design.flow_theme.flow_background_brush)
-        painter.drawRect(rect.intersected(self.sceneRect()))
-        painter.setPen(Qt.NoPen)
-        painter.drawRect(self.sceneRect())
+        # rect is only the exposed part of the scene; it can reach beyond the scene rect when zoomed out
+        painter.fillRect(rect, self.session_gui.design.flow_theme.flow_background_brush)
 
         if self.session_gui.design.performance_mode == 'pretty':
             theme = self.session_gui.design.flow_theme
             if theme.flow_background_grid and self._current_scale >= 0.7:
                 if theme.flow_background_grid[0] == 'points':
-                    color = theme.flow_background_grid[1]
-                    pen_width = theme.flow_background_grid[2]
-                    diff_x = theme.flow_background_grid[3]
-                    diff_y = theme.flow_background_grid[4]
-
-                    pen = QPen(color)
-                    pen.setWidthF(pen_width)
-                    painter.setPen(pen)
-
-                    for x in range(diff_x, self.sceneRect().toRect().width(), diff_x):
-                        for y in range(diff_y, self.sceneRect().toRect().height(), diff_y):
-                            painter.drawPoint(x, y)
+                    self._draw_background_grid(painter, rect, theme)
 
         self.set_stylus_proxy_pos()  # has to be called here instead of in drawForeground to prevent lagging
         # self.set_zoom_proxy_pos()
 
+    def _draw_background_grid(self, painter, rect, theme):
+        """Tiles the exposed rect with a cached pixmap of the theme's grid"""
+
+        diff_x = theme.flow_background_grid[3]
+        diff_y = theme.flow_background_grid[4]
+
+        # the tile is rendered at the resolution of the current zoom level, rounded to quarters,
+        # and covers a multiple of 4 grid cells in each direction so its pixel size is integral
+        res = max(round(self._current_scale * self.devicePixelRatioF() * 4) / 4, 0.25)
+        tile_w = diff_x * 4 * max(1, round(64 / diff_x))
+        tile_h = diff_y * 4 * max(1, round(64 / diff_y))
+
+        key = (theme.name, res)
+        tile = self._background_grid_tiles.get(key)
+        if tile is None:
+            tile = self._render_background_grid_tile(theme, res, tile_w, tile_h)
+            self._background_grid_tiles[key] = tile
+
+        # the tile's grid points are shifted by half a cell, so points on the tile's border don't get cut
+        offset = QPointF(
+            ((rect.left() + diff_x / 2) % tile_w) * res,
+            ((rect.top() + diff_y / 2) % tile_h) * res,
+        )
+
+        painter.save()
+        painter.scale(1 / res, 1 / res)
+        painter.drawTiledPixmap(
+            QRectF(rect.left() * res, rect.top() * res, rect.width() * res, rect.height() * res),
+            tile,
+            offset
+        )
+        painter.restore()
+
+    @staticmethod
+    def _render_background_grid_tile(theme, res, tile_w, tile_h) -> QPixmap:
+        _, color, pen_width, diff_x, diff_y = theme.flow_background_grid
+
+        tile = QPixmap(round(tile_w * res), round(tile_h * res))
+        tile.fill(Qt.transparent)
+
+        pen = QPen(color)
+        pen.setWidthF(pen_width * res)
+
+        painter = QPainter(tile)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(pen)
+        for x in range(tile_w // diff_x):
+            for y in range(tile_h // diff_y):
+                painter.drawPoint(QPointF((x + 0.5) * diff_x * res, (y + 0.5) * diff_y * res))
+        painter.end()
+
+        return tile
+
     def drawForeground(self, painter, rect):
 
         # DRAW CURRENTLY DRAGGED CONNECTION
@@ -628,6 +801,10 @@ class FlowView(GUIBase, QGraphicsView):
             painter.drawRoundedRect(x, y, w, h, 6, 6)
             painter.drawEllipse(p_o.pos().x(), p_o.pos().y(), 2, 2)
 
+        # PROFILING HUD
+        if self.profiler is not None:
+            self.profiler.draw_hud(painter)
+
     def get_viewport_img(self) -> QImage:
         """Returns a clear image of the viewport"""
 
@@ -646,27 +823,24 @@ class FlowView(GUIBase, QGraphicsView):
         return img
 
     def get_whole_scene_img(self) -> QImage:
-        """Returns an image of the whole scene, scaled accordingly to current scale factor.
-        Due to a bug this only works from the viewport position down and right, so the user has to scroll to
-        the top left corner in order to get the full scene"""
+        """Returns an image of the whole scene, scaled accordingly to current scale factor"""
 
-        self.hide_proxies()
-        img = QImage(self.sceneRect().width() / self._total_scale_div,
-                     self.sceneRect().height() / self._total_scale_div,
-                     QImage.Format_RGB32)
-        img.fill(Qt.transparent)
+        return FlowViewExporter(self, scale=1 / self._total_scale_div, margin=0).render_image(self.sceneRect())
 
-        painter = QPainter(img)
-        painter.setRenderHint(QPainter.Antialiasing)
-        rect = QRectF()
-        rect.setLeft(-self.viewport().pos().x())
-        rect.setTop(-self.viewport().pos().y())
-        rect.setWidth(img.rect().width())
-        rect.setHeight(img.rect().height())
-        # rect is right... but it only renders from the viewport's point down-and rightwards, not from topleft (0,0) ...
-        self.render(painter, rect, rect.toRect())
-        self.show_proxies()
-        return img
+    def export(self, filepath: str, scale: float = 1, background: bool = True) -> bool:
+        """Exports all components of the flow into a .png, .svg or .pdf file, see FlowViewExporter"""
+
+        exporter = FlowViewExporter(self, scale=scale, background=background)
+        ext = filepath.rsplit('.', 1)[-1].lower()
+        if ext == 'png':
+            return exporter.export_png(filepath)
+        elif ext == 'svg':
+            return exporter.export_svg(filepath)
+        elif ext == 'pdf':
+            return exporter.export_pdf(filepath)
+
+        print('Unsupported export format:', ext)
+        return False
 
     # PROXY POSITIONS
 
@@ -770,7 +944,10 @@ class FlowView(GUIBase, QGraphicsView):
                 self.scale(by, by)
                 self._current_scale *= by
         else:
-            if self.scene_rect_width * by >= self.viewport().size().width() and self.scene_rect_height * by >= self.viewport().size().height():
+            # zoom out until the whole scene fits into the viewport
+            scene_size = self.mapFromScene(self.sceneRect()).boundingRect().size()
+            if scene_size.width() * by >= self.viewport().width() or \
+                    scene_size.height() * by >= self.viewport().height():
                 self.scale(by, by)
                 self._current_scale *= by
 
@@ -789,6 +966,578 @@ class FlowView(GUIBase, QGraphicsView):
 
         self.ensureVisible(target_rect, 0, 0)
 
+        self.update_lod()
+        self._schedule_virtualization_update()
+        if self._minimap is not None:
+            self._minimap.update()
+
+    # MINIMAP
+    def set_minimap_visible(self, b: bool):
+        """Shows or hides an overview of the whole flow in the bottom right corner, see FlowViewMinimap"""
+
+        if b and self._minimap is None:
+            self._minimap = FlowViewMinimap(self)
+            for node in self.flow.nodes:
+                self._update_minimap_node(node)
+            self._place_minimap()
+
+        if self._minimap is not None:
+            self._minimap.setVisible(b)
+
+    def minimap_visible(self) -> bool:
+        return self._minimap is not None and self._minimap.isVisible()
+
+    def _place_minimap(self):
+        margin = 10
+        vp = self.viewport().geometry()
+        self._minimap.move(
+            vp.right() - self._minimap.width() - margin,
+            vp.bottom() - self._minimap.height() - margin,
+        )
+        self._minimap.raise_()
+
+    def node_item_geometry_changed(self, item):
+        """Called by node items when they got moved or resized"""
+        self._update_minimap_node(item.node)
+        self._component_geometry_changed(item)
+
+    def _update_minimap_node(self, node):
+        if self._minimap is None:
+            return
+
+        item = self.node_items.get(node) or self.node_placeholders.get(node)
+        if item is None or item.scene() is None:
+            self._minimap.remove_node(node)
+        else:
+            self._minimap.set_node(node, item.sceneBoundingRect(), QColor(node.gui.color))
+
+    # SCENE BOUNDS
+    def items_bounding_rect(self) -> QRectF:
+        """Returns the bounding rect of all nodes and drawings in scene coordinates. It's cached, and only
+        recomputed if components got removed since the last call."""
+
+        if self._items_rect_outdated:
+            self._items_rect_outdated = False
+            rect = QRectF()
+            for items in (self.node_items.values(), self.node_placeholders.values(), self.drawings):
+                for item in items:
+                    rect = rect.united(item.sceneBoundingRect())
+            self._items_rect = rect
+
+        return self._items_rect
+
+    def drawing_geometry_changed(self, drawing):
+        """Called by drawings when they got moved"""
+        self._component_geometry_changed(drawing)
+
+    def _component_geometry_changed(self, item):
+        if item.scene() is None:
+            return
+
+        if not self._items_rect_outdated:
+            self._items_rect = self._items_rect.united(item.sceneBoundingRect())
+
+        if self._bulk_insert_depth == 0:
+            self._update_scene_rect()
+
+    def _component_removed(self):
+        # the bounding rect can only shrink, which happens lazily in items_bounding_rect()
+        self._items_rect_outdated = True
+
+    def _update_scene_rect(self):
+        """Grows the scene rect, so it contains all components plus SCENE_RECT_MARGIN. The scene rect never
+        shrinks automatically, since that would make the view jump."""
+
+        items_rect = self.items_bounding_rect()
+        if items_rect.isNull():
+            return
+
+        m = self.SCENE_RECT_MARGIN
+        wanted = items_rect.marginsAdded(QMarginsF(m, m, m, m))
+        scene_rect = self.sceneRect()
+        if not scene_rect.contains(wanted):
+            self.scene().setSceneRect(scene_rect.united(wanted))
+
+    # PROFILING
+    def set_profiling_enabled(self, b: bool):
+        """Enables timing of all painting in the view, with a HUD showing the results, see FlowViewProfiler"""
+
+        if b and self.profiler is None:
+            self.profiler = FlowViewProfiler(self)
+            self.profiler.start()
+        elif not b and self.profiler is not None:
+            self.profiler.stop()
+            self.profiler = None
+
+        self.viewport().update()
+
+    def export_profiling_data(self, filepath: str) -> bool:
+        """Exports the data collected since profiling was enabled as JSON"""
+
+        if self.profiler is None:
+            print('Profiling is not enabled in this flow view.')
+            return False
+        return self.profiler.export_json(filepath)
+
+    # LEVEL OF DETAIL
+    def lod_for_scale(self, scale: float) -> str:
+        """Returns the level of detail node items are drawn with at the given scale"""
+
+        design = self.session_gui.design
+        if not design.lod_enabled:
+            return 'full'
+
+        simplified_below, flat_below = design.lod_scales
+        if scale < flat_below:
+            return 'flat'
+        elif scale < simplified_below:
+            return 'simplified'
+        else:
+            return 'full'
+
+    def lod(self) -> str:
+        return self._lod
+
+    def update_lod(self):
+        """Applies the level of detail for the current scale to all node items, if it changed"""
+
+        lod = self.lod_for_scale(self._current_scale)
+        if lod == self._lod:
+            return
+
+        self._lod = lod
+        for ni in self.node_items.values():
+            ni.set_lod(lod)
+
+    # ITEM INDEXING
+    def set_item_index_mode(self, mode: str):
+        """Sets how the scene indexes its items for lookups (selection, hovering, repaints).
+        'auto' switches between a BSP tree index and no index depending on the number of items
+        and on how many of them are currently being moved, 'bsp' and 'none' force either one."""
+
+        if mode not in ('auto', 'bsp', 'none'):
+            print('Unknown item index mode:', mode)
+            return
+
+        self._item_index_mode = mode
+        self._update_item_index_method()
+
+    def item_index_mode(self) -> str:
+        return self._item_index_mode
+
+    def _update_item_index_method(self):
+        if self._bulk_insert_depth > 0:
+            # updated once the bulk insertion ends
+            return
+
+        if self._item_index_mode == 'bsp':
+            use_index = True
+        elif self._item_index_mode == 'none':
+            use_index = False
+        else:
+            # the connections of a connection layer aren't scene items, the layer is a single one
+            num_connection_items = 1 if self.uses_connection_layer() else len(self.connection_items)
+            num_items = len(self.node_items) + len(self.node_placeholders) + num_connection_items
+            use_index = \
+                num_items >= self.BSP_INDEX_MIN_ITEMS and \
+                self._moving_items_count <= self.BSP_INDEX_MAX_MOVING_ITEMS
+
+        method = QGraphicsScene.BspTreeIndex if use_index else QGraphicsScene.NoIndex
+        if self.scene().itemIndexMethod() != method:
+            # switching rebuilds the index, so only do it when the method actually changes
+            self.scene().setItemIndexMethod(method)
+
+    def items_move_started(self, num_items: int):
+        """Called by items when the user starts dragging num_items items"""
+
+        self._moving_items_count = num_items
+        self._update_item_index_method()
+
+    def items_move_finished(self):
+        self._moving_items_count = 0
+        self._update_item_index_method()
+
+    # VIRTUALIZATION
+    def is_virtualized(self) -> bool:
+        """Whether the view only builds node items for the nodes around the visible area,
+        see Design.set_virtualization()"""
+        return self._virtualized
+
+    def _virtualization_wanted(self) -> bool:
+        threshold = self.session_gui.design.virtualization_threshold
+        if not threshold:
+            return False
+
+        num_nodes = len(self.flow.nodes)
+        if self.flow.load_data is not None:
+            # the flow might be loading its nodes right now
+            num_nodes = max(num_nodes, len(self.flow.load_data['nodes']))
+
+        return num_nodes >= threshold
+
+    def _connection_layer_wanted(self) -> bool:
+        threshold = self.session_gui.design.connection_layer_threshold
+        if not threshold:
+            return False
+
+        num_conns = sum(len(inputs) for inputs in self.flow.graph_adj.values())
+        if self.flow.load_data is not None:
+            # the flow might be loading its connections right now
+            num_conns = max(num_conns, len(self.flow.load_data['connections']))
+
+        return num_conns >= threshold
+
+    def uses_connection_layer(self) -> bool:
+        """Whether the connections are drawn by a ConnectionLayer instead of connection items,
+        see Design.set_connection_layer_threshold()"""
+        return self._connection_layer is not None
+
+    def _virtualize_new_node(self) -> bool:
+        if not self._virtualized:
+            self._virtualized = self._virtualization_wanted()
+        return self._virtualized
+
+    def _schedule_virtualization_update(self):
+        if self._virtualized and not self._virtualization_timer.isActive():
+            self._virtualization_timer.start()
+
+    def _update_virtualization(self):
+        """Builds the items of the nodes around the visible area (and of their neighbours, so their connections
+        are drawn), and replaces the items of the farthest nodes by placeholders once there are more than
+        Design.virtualization_max_items of them"""
+
+        if self._dragging_connection or self._moving_items_count > 0:
+            self._schedule_virtualization_update()
+            return
+
+        max_items = self.session_gui.design.virtualization_max_items
+
+        rect = self.mapToScene(self.viewport().rect()).boundingRect()
+        margin = max(rect.width(), rect.height()) / 4
+        rect.adjust(-margin, -margin, margin, margin)
+        center = rect.center()
+
+        def distance(node):
+            item = self.node_items.get(node) or self.node_placeholders[node]
+            return (item.pos() - center).manhattanLength()
+
+        visible_nodes = sorted(
+            {i.node for i in self.scene().items(rect) if isinstance(i, (NodeItem, NodeItemPlaceholder))},
+            key=distance
+        )
+
+        wanted_nodes = {}  # used as ordered set
+        for node in visible_nodes:
+            wanted_nodes[node] = None
+            for out, inp in self._node_connections(node):
+                wanted_nodes[out.node] = None
+                wanted_nodes[inp.node] = None
+        wanted_nodes = list(wanted_nodes)[:max_items]
+
+        if self._lod == 'flat':
+            # node items look just like placeholders then
+            new_nodes = []
+        else:
+            new_nodes = [n for n in wanted_nodes if n in self.node_placeholders]
+
+        excess = len(self.node_items) + len(new_nodes) - max_items
+        if excess > 0:
+            # items referenced by undo commands must stay
+            referenced_items = set()
+            for i in range(self._undo_stack.count()):
+                referenced_items.update(self._undo_stack.command(i).referenced_items())
+
+            kept_nodes = set(wanted_nodes)
+            releasable_nodes = [
+                n for n, item in self.node_items.items()
+                if n not in kept_nodes and not item.isSelected() and item not in referenced_items
+            ]
+            releasable_nodes.sort(key=distance, reverse=True)
+            for node in releasable_nodes[:excess]:
+                self._release_node_item(node)
+
+        for node in new_nodes:
+            self._materialize_node(node)
+
+        self._update_item_index_method()
+
+    def _add_node_placeholder(self, node, data: dict = None, size: QSizeF = None):
+        placeholder = NodeItemPlaceholder(node, self, data, size)
+        if data is None or 'pos x' not in data:
+            placeholder.setPos(self._node_place_pos)
+
+        self.node_placeholders[node] = placeholder
+        self.scene().addItem(placeholder)
+        self._update_minimap_node(node)
+        self._component_geometry_changed(placeholder)
+
+    def _materialize_node(self, node) -> NodeItem:
+        """Replaces the node's placeholder by a full node item, and creates the items of all its connections
+        to other nodes that have items"""
+
+        placeholder = self.node_placeholders.pop(node)
+        self.scene().removeItem(placeholder)
+        self._selected_placeholders.pop(placeholder, None)
+
+        if placeholder.data is not None:
+            self._load_node_data(node, placeholder.data)
+
+        item = NodeItem(
+            node=node,
+            node_gui=node.gui,
+            flow_view=self,
+            design=self.session_gui.design,
+        )
+        item.initialize()
+
+        self.node_items[node] = item
+        item.set_lod(self._lod)
+        self.scene().addItem(item)
+        item.setPos(placeholder.pos())
+        item.setSelected(placeholder.isSelected())
+        self._update_minimap_node(node)
+
+        for c in self._node_connections(node):
+            self.add_connection(c)
+
+        return item
+
+    def _release_node_item(self, node):
+        """Replaces the node's item (and the items of its connections) by a placeholder
+        storing the node's frontend data"""
+
+        data = self._get_nodes_data([node])[0]
+        item = self.node_items[node]
+
+        for conn_item in list(item.connection_items):
+            self._detach_connection_item(conn_item)
+            self.connection_items.pop(conn_item.connection)
+            self._discard_connection_item(conn_item)
+            conn_item.release()
+
+        del self.node_items[node]
+        self.scene().removeItem(item)
+        self._selected_node_items.pop(item, None)
+        self._drop_node_item(item)
+
+        self._add_node_placeholder(node, data, item.boundingRect().size())
+        self.node_placeholders[node].setSelected(item.isSelected())
+
+    def _drop_node_item(self, item: NodeItem):
+        """Releases a node item which is not in the scene, and the cached items of its connections"""
+
+        node = item.node
+        for c in [c for c in self.connection_items__cache if node in (c[0].node, c[1].node)]:
+            # cached connection items refer to the port items of the node
+            self.connection_items__cache.evict(c).release()
+
+        item.release()
+        item.deleteLater()
+
+    @staticmethod
+    def _load_node_data(node, data: dict):
+        # the node item loads its frontend state from there
+        node.load_data = data
+        for inp, inp_data in zip(node.inputs, data['inputs']):
+            inp.load_data = inp_data
+
+    # ITEM CACHES
+    def _schedule_item_cache_pruning(self):
+        if not self._item_cache_timer.isActive():
+            self._item_cache_timer.start()
+
+    def _prune_item_caches(self):
+        """Releases the cached items of removed components no undo command can restore anymore (e.g. after
+        the undo stack got cleared, or redo commands got discarded by a new command), and the least recently
+        removed ones beyond Design.item_cache_size. Of evicted node items, the frontend data is kept, so the
+        node gets a new item with the same state if its removal gets undone."""
+
+        restorable = set()
+        referenced_items = set()
+        for i in range(self._undo_stack.count()):
+            cmd = self._undo_stack.command(i)
+            restorable.update(cmd.restorable_components())
+            referenced_items.update(cmd.referenced_items())
+
+        max_items = self.session_gui.design.item_cache_size
+
+        # nodes
+        cache = self.node_items__cache
+        for node, item in cache.items():
+            if node not in restorable and item not in referenced_items:
+                self._drop_node_item(cache.pop(node))
+        for node in [n for n in cache.evicted if n not in restorable]:
+            del cache.evicted[node]
+
+        excess = len(cache) - max_items
+        if excess > 0:
+            for node in [n for n, item in cache.items() if item not in referenced_items][:excess]:
+                data = self._get_nodes_data([node])[0]
+                self._drop_node_item(cache.evict(node, data))
+
+        # connections
+        cache = self.connection_items__cache
+        for c in [c for c in cache if c not in restorable]:
+            cache.pop(c).release()
+        for c in [c for c in cache.evicted if c not in restorable]:
+            del cache.evicted[c]
+
+        excess = len(cache) - max_items
+        if excess > 0:
+            for c in list(cache)[:excess]:
+                cache.evict(c).release()
+
+    def release(self):
+        """Tears the view down once its flow got deleted: unsubscribes from the flow, disconnects all items
+        from their nodes and the design, deletes them, unregisters everything as frontend components, and
+        finally deletes the view itself"""
+
+        for event, callback in self._flow_subscriptions:
+            event.unsub(callback)
+        self._flow_subscriptions.clear()
+
+        self.setParent(None)
+        self.session_gui.design.flow_theme_changed.disconnect(self._theme_changed)
+        self.session_gui.design.performance_mode_changed.disconnect(self._perf_mode_changed)
+
+        # the commands reference nodes and items
+        self._undo_stack.clear()
+        for timer in (self._virtualization_timer, self._selection_changed_timer, self._widget_creation_timer,
+                      self._item_cache_timer):
+            timer.stop()
+
+        for item in self.node_items.values():
+            item.release()
+        for item in self.node_placeholders.values():
+            item.unregister()
+        for item in self.connection_items.values():
+            item.release()
+        if self._connection_layer is not None:
+            self._connection_layer.release()
+
+        # the cached items of removed components are deleted along with the scene's items
+        for cache in (self.node_items__cache, self.connection_items__cache):
+            for key in list(cache):
+                item = cache.pop(key)
+                item.release()
+                self.scene().addItem(item)
+        self.scene().clear()
+        self.node_items.clear()
+        self.node_placeholders.clear()
+        self.connection_items.clear()
+        self.drawings.clear()
+        self._selected_node_items.clear()
+        self._selected_placeholders.clear()
+        self._moved_connection_items.clear()
+
+        GUIBase.unregister(self)
+        self.deleteLater()
+
+    def item_cache_stats(self) -> dict:
+        """Returns the number of cached items of removed nodes and connections, their estimated memory in
+        bytes, and the hits, misses and evictions of both caches so far, see ItemCache"""
+
+        return {
+            'node items': self.node_items__cache.stats(),
+            'connection items': self.connection_items__cache.stats(),
+        }
+
+    # DEFERRED WIDGETS
+    def request_widgets(self, item: NodeItem):
+        """Schedules the creation of the deferred widgets of a node item for the next event loop iteration,
+        see Design.set_widget_creation_scale()"""
+
+        self._widget_requests[item] = None
+        if not self._widget_creation_timer.isActive():
+            self._widget_creation_timer.start()
+
+    def _create_requested_widgets(self):
+        requests, self._widget_requests = self._widget_requests, {}
+        for item in requests:
+            if self.node_items.get(item.node) is item:
+                item.create_widgets()
+
+    def create_deferred_widgets(self, rect: QRectF = None):
+        """Creates the deferred widgets of all node items, or of the ones intersecting rect,
+        e.g. before rendering them into an image"""
+
+        for item in list(self.node_items.values()):
+            if item.widgets_deferred and (rect is None or item.sceneBoundingRect().intersects(rect)):
+                item.create_widgets()
+
+    # BULK INSERTION
+    def begin_bulk_insert(self):
+        """Starts inserting many components at once. Until the matching end_bulk_insert(), new node items
+        don't get selected, selection changes are not signaled, and neither the viewport nor the scene's
+        item index are updated. Calls can be nested."""
+
+        self._bulk_insert_depth += 1
+        if self._bulk_insert_depth > 1:
+            return
+
+        self._bulk_insert_selection_changed = False
+        self._bulk_insert_viewport_update_mode = self.viewportUpdateMode()
+        self.setViewportUpdateMode(QGraphicsView.NoViewportUpdate)
+        if self.scene().itemIndexMethod() != QGraphicsScene.NoIndex:
+            self.scene().setItemIndexMethod(QGraphicsScene.NoIndex)
+
+    def end_bulk_insert(self):
+        """Applies everything suspended since begin_bulk_insert() in one batch"""
+
+        if self._bulk_insert_depth == 0:
+            print('end_bulk_insert() called without begin_bulk_insert()')
+            return
+
+        self._bulk_insert_depth -= 1
+        if self._bulk_insert_depth > 0:
+            return
+
+        self._update_item_index_method()
+        self._update_scene_rect()
+        self.setViewportUpdateMode(self._bulk_insert_viewport_update_mode)
+        self.viewport().update()
+
+        if self._bulk_insert_selection_changed:
+            self._bulk_insert_selection_changed = False
+            self._scene_selection_changed()
+
+    @contextmanager
+    def bulk_insert(self):
+        """Context manager for begin_bulk_insert() and end_bulk_insert()"""
+
+        self.begin_bulk_insert()
+        try:
+            yield
+        finally:
+            self.end_bulk_insert()
+
+    def is_bulk_inserting(self) -> bool:
+        return self._bulk_insert_depth > 0
+
+    # CONNECTION UPDATES
+    def connection_items_moved(self, items):
+        """Recomputes the connection items after (one of) their pins moved. During bulk_move(), each of
+        them is only recomputed once at its end, no matter how many of their pins moved."""
+
+        if self._bulk_move_depth > 0:
+            self._moved_connection_items.update(dict.fromkeys(items))
+        else:
+            for item in list(items):
+                item.recompute()
+
+    @contextmanager
+    def bulk_move(self):
+        """Context manager for moving many node items at once, see connection_items_moved(). Calls can be nested."""
+
+        self._bulk_move_depth += 1
+        try:
+            yield
+        finally:
+            self._bulk_move_depth -= 1
+            if self._bulk_move_depth == 0:
+                items, self._moved_connection_items = self._moved_connection_items, {}
+                recompute_connections(items)
+
     # NODES
     def create_node__cmd(self, node_class):
         self._push_undo(
@@ -800,17 +1549,34 @@ class FlowView(GUIBase, QGraphicsView):
         # create item
         item: NodeItem = None
 
-        if node in self.node_items__cache.keys():  # load from cache
-            # print('using a cached item')
-            item = self.node_items__cache[node]
+        cached_item = self.node_items__cache.take(node)
+        if cached_item is not None:  # load from cache
+            item = cached_item
             self._add_node_item(item)
 
+        elif node in self.node_items__cache.evicted:
+            # the cached item was released, build a new one from its data
+            data = self.node_items__cache.evicted.pop(node)
+            self._load_node_data(node, data)
+            item = NodeItem(
+                node=node,
+                node_gui=node.gui,
+                flow_view=self,
+                design=self.session_gui.design,
+            )
+            item.initialize()
+            self._add_node_item(item, QPointF(data['pos x'], data['pos y']))
+
+        elif not self.isVisible() and self._virtualize_new_node():
+            # the item gets built once the view is shown and the node is close to the visible area
+            self._create_node_gui(node)
+            self._add_node_placeholder(node, node.load_data)
+            return
+
         else:  # create new item
             item = NodeItem(
                 node=node,
-                node_gui=
-                    (node.GUI if hasattr(node, 'GUI') else NodeGUI)     # use custom GUI class if available
-                    ((node, self.session_gui)),                         # calls __init__ of NodeGUI class with tuple arg
+                node_gui=self._create_node_gui(node),
                 flow_view=self,
                 design=self.session_gui.design,
             )
@@ -831,26 +1597,51 @@ class FlowView(GUIBase, QGraphicsView):
             self.auto_connect(self._auto_connection_pin.port,
                               node)
 
+    def _create_node_gui(self, node) -> NodeGUI:
+        return (node.GUI if hasattr(node, 'GUI') else NodeGUI)(     # use custom GUI class if available
+            (node, self.session_gui)                                # calls __init__ of NodeGUI class with tuple arg
+        )
+
     def _add_node_item(self, item: NodeItem, pos=None):
         self.node_items[item.node] = item
+        item.set_lod(self._lod)
 
         self.scene().addItem(item)
+        if item.isSelected():
+            # items keep their selection state while not in the scene, e.g. in the cache
+            self._selected_node_items[item] = None
         if pos:
             item.setPos(pos)
+        self._update_minimap_node(item.node)
+        self._component_geometry_changed(item)
 
         # select new item
-        self.clear_selection()
-        item.setSelected(True)
+        if self._bulk_insert_depth == 0:
+            self.clear_selection()
+            item.setSelected(True)
+
+        self._update_item_index_method()
 
     def remove_node(self, node):
+        if node in self.node_placeholders:
+            # build the item, so the removal can be undone like for any other node
+            self._materialize_node(node)
+
         item = self.node_items[node]
         self._remove_node_item(item)
         del self.node_items[node]
 
+        self._update_item_index_method()
+
     def _remove_node_item(self, item: NodeItem):
         # store item in case the remove action gets undone later
-        self.node_items__cache[item.node] = item
+        self.node_items__cache.insert(item.node, item)
+        self._schedule_item_cache_pruning()
         self.scene().removeItem(item)
+        self._selected_node_items.pop(item, None)
+        if self._minimap is not None:
+            self._minimap.remove_node(item.node)
+        self._component_removed()
 
     # CONNECTIONS
     def connect_node_ports__cmd(self, p1: NodePort, p2: NodePort):
@@ -897,13 +1688,18 @@ class FlowView(GUIBase, QGraphicsView):
     def add_connection(self, c: Tuple[NodeOutput, NodeInput]):
         out, inp = c
 
-        #TODO: need to verify that connection_items_cache still works fine with new connection object
-        item: ConnectionItem = None
-        if c in self.connection_items__cache.keys():
-            item = self.connection_items__cache[c]
+        if out.node not in self.node_items or inp.node not in self.node_items:
+            # one of the nodes is virtualized, the item gets created once both nodes have items
+            if inp.node in self.node_items:
+                self._input_item(inp).port_connected()
+            return
 
-        else:
-            if inp.type_ == 'data':
+        item: ConnectionItem = self.connection_items__cache.take(c)
+        if item is None:
+            self.connection_items__cache.evicted.pop(c, None)
+            if self._connection_layer is not None:
+                item = LayerConnection(c, self._connection_layer)
+            elif inp.type_ == 'data':
                 # item = self.CLASSES['data conn item'](c, self.session.design)
                 item = DataConnectionItem(c, self.session_gui.design)
             else:
@@ -917,11 +1713,25 @@ class FlowView(GUIBase, QGraphicsView):
 
     def _add_connection_item(self, item: ConnectionItem):
         self.connection_items[item.connection] = item
-        self.scene().addItem(item)
-        item.setZValue(10)
+        item.out_item.node_item.connection_items[item] = None
+        item.inp_item.node_item.connection_items[item] = None
+        if self._connection_layer is not None:
+            self._connection_layer.add(item)
+        else:
+            self.scene().addItem(item)
+            item.setZValue(10)
         # self.viewport().repaint()
 
+        self._update_item_index_method()
+
     def remove_connection(self, c: Tuple[NodeOutput, NodeInput]):
+        if c not in self.connection_items:
+            # one of the nodes is virtualized, so there is no item
+            out, inp = c
+            if inp.node in self.node_items:
+                self._input_item(inp).port_disconnected()
+            return
+
         item = self.connection_items[c]
         self._remove_connection_item(item)
 
@@ -930,9 +1740,39 @@ class FlowView(GUIBase, QGraphicsView):
 
         del self.connection_items[c]
 
+        self._update_item_index_method()
+
+    def _detach_connection_item(self, item: ConnectionItem):
+        item.out_item.node_item.connection_items.pop(item, None)
+        item.inp_item.node_item.connection_items.pop(item, None)
+        self._moved_connection_items.pop(item, None)
+
     def _remove_connection_item(self, item: ConnectionItem):
-        self.connection_items__cache[item.connection] = item
-        self.scene().removeItem(item)
+        self._detach_connection_item(item)
+        if self._connection_layer is None:
+            # layer connections are cheap to rebuild
+            self.connection_items__cache.insert(item.connection, item)
+            self._schedule_item_cache_pruning()
+        self._discard_connection_item(item)
+
+    def _discard_connection_item(self, item: ConnectionItem):
+        if self._connection_layer is not None:
+            self._connection_layer.remove(item)
+        else:
+            self.scene().removeItem(item)
+
+    def _input_item(self, inp: NodeInput):
+        return self.node_items[inp.node].inputs[inp.node.inputs.index(inp)]
+
+    def _node_connections(self, node) -> list:
+        """Returns all connections from and to the node"""
+
+        conns = [(o, i) for o in node.outputs for i in self.flow.connected_inputs(o)]
+        for i in node.inputs:
+            o = self.flow.connected_output(i)
+            if o is not None:
+                conns.append((o, i))
+        return conns
 
     def auto_connect(self, p: NodePort, n: Node):
         if p.io_pos == PortObjPos.OUTPUT:
@@ -950,7 +1790,6 @@ class FlowView(GUIBase, QGraphicsView):
 
     def update_conn_item(self, c: Tuple[NodeOutput, NodeInput]):
         if c in self.connection_items:
-            self.connection_items[c].changed = True
             self.connection_items[c].update()
 
     # DRAWINGS
@@ -967,6 +1806,7 @@ class FlowView(GUIBase, QGraphicsView):
         if posF:
             drawing_obj.setPos(posF)
         self.drawings.append(drawing_obj)
+        self._component_geometry_changed(drawing_obj)
 
     def add_drawings(self, drawings):
         """Adds a list of DrawingObjects to the scene."""
@@ -981,6 +1821,7 @@ class FlowView(GUIBase, QGraphicsView):
 
         self.scene().removeItem(drawing)
         self.drawings.remove(drawing)
+        self._component_removed()
 
     def place_drawings_from_data(self, drawings_data: list, offset_pos=QPoint(0, 0)):
         """Creates and places drawings from drawings. The same list is returned by the data_() method
@@ -1032,29 +1873,16 @@ class FlowView(GUIBase, QGraphicsView):
     def _move_selected_copmonents__cmd(self, x, y):
         new_rel_pos = QPointF(x, y)
 
-        # if one node item would leave the scene (f.ex. pos.x < 0), stop
-        left = False
-        for i in self.scene().selectedItems():
-            new_pos = i.pos() + new_rel_pos
-            w = i.boundingRect().width()
-            h = i.boundingRect().height()
-            if new_pos.x() - w / 2 < 0 or \
-                    new_pos.x() + w / 2 > self.scene().width() or \
-                    new_pos.y() - h / 2 < 0 or \
-                    new_pos.y() + h / 2 > self.scene().height():
-                left = True
-                break
-
-        if not left:
-            # moving the items
+        # moving the items, the scene grows with them (see _update_scene_rect())
+        with self.bulk_move():
             items_group = self.scene().createItemGroup(self.scene().selectedItems())
             items_group.moveBy(new_rel_pos.x(), new_rel_pos.y())
             self.scene().destroyItemGroup(items_group)
 
-            # saving the command
-            self._push_undo(
-                MoveComponents_Command(self, self.scene().selectedItems(), p_from=-new_rel_pos, p_to=QPointF(0, 0))
-            )
+        # saving the command
+        self._push_undo(
+            MoveComponents_Command(self, self.scene().selectedItems(), p_from=-new_rel_pos, p_to=QPointF(0, 0))
+        )
 
         self.viewport().repaint()
 
@@ -1081,14 +1909,12 @@ class FlowView(GUIBase, QGraphicsView):
     def selected_node_items(self) -> [NodeItem]:
         """Returns a list of the currently selected NodeItems."""
 
-        selected_NIs = []
-        for i in self.scene().selectedItems():
-            if isinstance(i, NodeItem):
-                selected_NIs.append(i)
-        return selected_NIs
+        return list(self._selected_node_items)
 
     def selected_nodes(self) -> [Node]:
-        return [item.node for item in self.selected_node_items()]
+        """Returns a list of the currently selected nodes, including the virtualized ones."""
+
+        return [item.node for item in self.selected_node_items()] + [p.node for p in self._selected_placeholders]
 
     def selected_drawings(self) -> [DrawingObject]:
         """Returns a list of the currently selected drawings."""
@@ -1176,7 +2002,6 @@ class FlowView(GUIBase, QGraphicsView):
 
         data['flow view'] = {
             'drawings': self._get_drawings_data(self.drawings),
-            'view size': [self.sceneRect().size().width(), self.sceneRect().size().height()]
         }
 
         return data
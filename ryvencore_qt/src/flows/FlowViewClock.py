@@ -0,0 +1,66 @@
+from qtpy.QtCore import QObject, QTimer, QElapsedTimer, Qt
+from qtpy.QtGui import QGuiApplication
+
+
+class FlowViewClock(QObject):
+    """
+    Drives all animations of a flow view (zooming, node item animations) from one timer ticking at the
+    display's refresh rate, instead of one timer per animation. Animations are callables taking the current
+    time in ms and returning whether they are still running; all of them are advanced in one pass per tick,
+    so the item updates they cause get coalesced by the scene into a single viewport update per frame.
+    The timer only runs while there are running animations.
+    """
+
+    DEFAULT_FRAME_RATE = 60
+
+    def __init__(self, flow_view):
+        super().__init__(flow_view)
+
+        self.flow_view = flow_view
+        self._animations = {}  # used as ordered set
+
+        self._elapsed = QElapsedTimer()
+        self._elapsed.start()
+
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.setInterval(self.frame_interval())
+        self._timer.timeout.connect(self._tick)
+
+    @staticmethod
+    def frame_interval() -> int:
+        """The tick interval in ms, according to the refresh rate of the primary screen"""
+
+        screen = QGuiApplication.primaryScreen()
+        rate = screen.refreshRate() if screen is not None else 0
+        if rate <= 0:
+            rate = FlowViewClock.DEFAULT_FRAME_RATE
+        return max(1, int(1000 / rate))
+
+    def now(self) -> float:
+        """Current time in ms"""
+        return self._elapsed.nsecsElapsed() / 1e6
+
+    def add(self, animation):
+        """Adds a callable animation(now: float) -> bool, which is called every tick until it returns False"""
+
+        self._animations[animation] = None
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def remove(self, animation):
+        self._animations.pop(animation, None)
+        if not self._animations:
+            self._timer.stop()
+
+    def is_running(self, animation) -> bool:
+        return animation in self._animations
+
+    def _tick(self):
+        now = self.now()
+        for animation in list(self._animations):
+            if not animation(now):
+                self._animations.pop(animation, None)
+
+        if not self._animations:
+            self._timer.stop()
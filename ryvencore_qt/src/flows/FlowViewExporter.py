@@ -0,0 +1,274 @@
+import struct
+import zlib
+from math import ceil
+
+from qtpy.QtCore import Qt, QRectF, QSizeF, QMarginsF
+from qtpy.QtGui import QImage, QPainter, QPdfWriter, QPageSize, QPageLayout
+from qtpy.QtSvg import QSvgGenerator
+
+
+class FlowViewExporter:
+    """
+    Renders a region of a flow view's scene (by default everything in it) into PNG, SVG or PDF files of
+    arbitrary size. Images are rendered band by band, and for PNG every band tile by tile, so the peak
+    memory only depends on the tile size and on the width of the image. Nodes of virtualized flow views
+    get their items built only while the band they are in is rendered. SVG and PDF files are rendered in
+    one pass, as items crossing band edges would get written once per band.
+    Only QImage and QPainter are used, so this works on the offscreen QPA platform as well.
+    """
+
+    # upper bound for the pixel data of one band of a PNG export
+    MAX_BAND_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, flow_view, scale: float = 1, margin: float = 50, tile_size: int = 2048,
+                 background: bool = True):
+        self.flow_view = flow_view
+        self.scale = scale
+        self.margin = margin
+        self.tile_size = tile_size
+        self.background = background    # if False, PNGs get a transparent background
+
+    def components_rect(self) -> QRectF:
+        """Returns the scene rect containing all nodes, connections and drawings, plus the margin"""
+
+        rect = self.flow_view.items_bounding_rect()
+        for item in self.flow_view.connection_items.values():
+            # connections can bend beyond the nodes
+            rect = rect.united(item.sceneBoundingRect())
+
+        return rect.marginsAdded(QMarginsF(self.margin, self.margin, self.margin, self.margin))
+
+    def image_size(self, rect: QRectF = None) -> QSizeF:
+        """Returns the pixel size of the exported image of rect"""
+
+        if rect is None:
+            rect = self.components_rect()
+        return QSizeF(ceil(rect.width() * self.scale), ceil(rect.height() * self.scale))
+
+    def render_image(self, rect: QRectF = None) -> QImage:
+        """Renders rect (by default all components) into a single image, only use this for small regions"""
+
+        if rect is None:
+            rect = self.components_rect()
+        size = self.image_size(rect)
+
+        img = QImage(int(size.width()), int(size.height()), QImage.Format_ARGB32)
+        img.fill(Qt.transparent)
+
+        painter = QPainter(img)
+        self._render_bands(painter, rect, QRectF(0, 0, size.width(), size.height()))
+        painter.end()
+
+        return img
+
+    def export_png(self, filepath: str, rect: QRectF = None) -> bool:
+        """Renders rect (by default all components) tile by tile and streams it into a PNG file"""
+
+        if rect is None:
+            rect = self.components_rect()
+        size = self.image_size(rect)
+        width, height = int(size.width()), int(size.height())
+        if width <= 0 or height <= 0:
+            print('Nothing to export.')
+            return False
+
+        alpha = not self.background
+        img_format = QImage.Format_RGBA8888 if alpha else QImage.Format_RGB888
+        bytes_per_pixel = 4 if alpha else 3
+
+        band_height = max(1, min(self.tile_size, self.MAX_BAND_BYTES // (width * bytes_per_pixel)))
+
+        try:
+            f = open(filepath, 'wb')
+        except OSError as e:
+            print('Couldn\'t open', filepath, 'for the export:', e)
+            return False
+
+        with f:
+            png = PNGWriter(f, width, height, alpha)
+
+            self._begin()
+            try:
+                for band_top in range(0, height, band_height):
+                    h = min(band_height, height - band_top)
+                    band_rect = self._source_rect(rect, 0, band_top, width, h)
+                    built_nodes = self._build_items_in(band_rect)
+
+                    tiles = []
+                    for tile_left in range(0, width, self.tile_size):
+                        w = min(self.tile_size, width - tile_left)
+                        tile = QImage(w, h, img_format)
+                        tile.fill(Qt.transparent)
+                        painter = QPainter(tile)
+                        self._render(painter, self._source_rect(rect, tile_left, band_top, w, h),
+                                     QRectF(0, 0, w, h))
+                        painter.end()
+                        tiles.append((image_bytes(tile), tile.bytesPerLine(), w * bytes_per_pixel))
+
+                    self._release_items(built_nodes)
+
+                    png.write_rows(
+                        b''.join(data[y*bpl:y*bpl + line_len] for data, bpl, line_len in tiles)
+                        for y in range(h)
+                    )
+            finally:
+                self._end()
+
+            png.finish()
+
+        return True
+
+    def export_svg(self, filepath: str, rect: QRectF = None) -> bool:
+        """Renders rect (by default all components) into an SVG file"""
+
+        if rect is None:
+            rect = self.components_rect()
+        size = self.image_size(rect)
+
+        generator = QSvgGenerator()
+        generator.setFileName(filepath)
+        generator.setSize(size.toSize())
+        generator.setViewBox(QRectF(0, 0, size.width(), size.height()))
+        generator.setTitle(self.flow_view.flow.title)
+
+        painter = QPainter()
+        if not painter.begin(generator):
+            print('Couldn\'t open', filepath, 'for the export')
+            return False
+        self._render_whole(painter, rect, QRectF(0, 0, size.width(), size.height()))
+        painter.end()
+
+        return True
+
+    def export_pdf(self, filepath: str, rect: QRectF = None) -> bool:
+        """Renders rect (by default all components) into a single page PDF file, one scene pixel
+        at scale 1 corresponds to one point"""
+
+        if rect is None:
+            rect = self.components_rect()
+        size = self.image_size(rect)
+
+        writer = QPdfWriter(filepath)
+        writer.setResolution(72)
+        writer.setTitle(self.flow_view.flow.title)
+        writer.setPageLayout(QPageLayout(
+            QPageSize(size, QPageSize.Point), QPageLayout.Portrait, QMarginsF(0, 0, 0, 0)
+        ))
+
+        painter = QPainter()
+        if not painter.begin(writer):
+            print('Couldn\'t open', filepath, 'for the export')
+            return False
+        self._render_whole(painter, rect, QRectF(0, 0, size.width(), size.height()))
+        painter.end()
+
+        return True
+
+    def _render_bands(self, painter: QPainter, source: QRectF, target: QRectF):
+        """Renders the source rect of the scene into the target rect of the painter, band by band"""
+
+        band_height = self.tile_size / self.scale  # in scene coordinates
+
+        self._begin()
+        try:
+            top = 0
+            while top < source.height():
+                h = min(band_height, source.height() - top)
+                band_source = QRectF(source.left(), source.top() + top, source.width(), h)
+                band_target = QRectF(
+                    target.left(), target.top() + top * self.scale,
+                    target.width(), h * self.scale
+                )
+
+                built_nodes = self._build_items_in(band_source)
+                self._render(painter, band_source, band_target)
+                self._release_items(built_nodes)
+
+                top += h
+        finally:
+            self._end()
+
+    def _render_whole(self, painter: QPainter, source: QRectF, target: QRectF):
+        """Renders the source rect of the scene into the target rect of the painter in one pass"""
+
+        self._begin()
+        try:
+            built_nodes = self._build_items_in(source)
+            self._render(painter, source, target)
+            self._release_items(built_nodes)
+        finally:
+            self._end()
+
+    def _render(self, painter: QPainter, source: QRectF, target: QRectF):
+        painter.setRenderHint(QPainter.Antialiasing)
+        if self.background:
+            painter.fillRect(target, self.flow_view.session_gui.design.flow_theme.flow_background_brush)
+        self.flow_view.create_deferred_widgets(source)
+        self.flow_view.scene().render(painter, target, source, Qt.IgnoreAspectRatio)
+
+    def _source_rect(self, rect: QRectF, x: int, y: int, w: int, h: int) -> QRectF:
+        """maps a rect in image pixels to the scene"""
+        return QRectF(rect.left() + x / self.scale, rect.top() + y / self.scale, w / self.scale, h / self.scale)
+
+    def _begin(self):
+        self.flow_view.hide_proxies()
+
+    def _end(self):
+        self.flow_view.show_proxies()
+
+    def _build_items_in(self, rect: QRectF) -> list:
+        """Builds the items of virtualized nodes close to rect, and returns those nodes"""
+
+        fv = self.flow_view
+        if not fv.node_placeholders:
+            return []
+
+        # placeholders only approximate the node items' sizes
+        search_rect = rect.marginsAdded(QMarginsF(self.margin, self.margin, self.margin, self.margin))
+        nodes = [p.node for p in fv.node_placeholders.values() if p.sceneBoundingRect().intersects(search_rect)]
+        for node in nodes:
+            fv._materialize_node(node)
+
+        return nodes
+
+    def _release_items(self, nodes: list):
+        for node in nodes:
+            if node in self.flow_view.node_items:
+                self.flow_view._release_node_item(node)
+
+
+class PNGWriter:
+    """Minimal streaming PNG encoder for 8 bit RGB(A) images, written row by row"""
+
+    def __init__(self, f, width: int, height: int, alpha: bool):
+        self.f = f
+        self._compressor = zlib.compressobj(6)
+
+        f.write(b'\x89PNG\r\n\x1a\n')
+        self._write_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6 if alpha else 2, 0, 0, 0))
+
+    def write_rows(self, rows):
+        """writes an iterable of rows, each being the raw pixel bytes of one row"""
+
+        data = self._compressor.compress(b''.join(b'\x00' + row for row in rows))  # filter type: none
+        if data:
+            self._write_chunk(b'IDAT', data)
+
+    def finish(self):
+        self._write_chunk(b'IDAT', self._compressor.flush())
+        self._write_chunk(b'IEND', b'')
+
+    def _write_chunk(self, chunk_type: bytes, data: bytes):
+        self.f.write(struct.pack('>I', len(data)))
+        self.f.write(chunk_type)
+        self.f.write(data)
+        self.f.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(chunk_type)) & 0xffffffff))
+
+
+def image_bytes(img: QImage) -> bytes:
+    """Returns the raw data of the image"""
+
+    bits = img.constBits()
+    if hasattr(bits, 'setsize'):  # PyQt returns a sip.voidptr
+        bits.setsize(img.bytesPerLine() * img.height())
+    return bytes(bits)
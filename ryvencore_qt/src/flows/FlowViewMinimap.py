@@ -0,0 +1,230 @@
+from qtpy.QtCore import Qt, QRectF, QRect, QPointF, QMarginsF, QTimer
+from qtpy.QtGui import QImage, QPainter, QColor, QPen, QRegion
+from qtpy.QtWidgets import QWidget
+
+
+class FlowViewMinimap(QWidget):
+    """
+    An overview of the whole flow in a corner of a flow view, which can be clicked and dragged to navigate.
+    The nodes are drawn as rects in their colors into a cached image. The minimap keeps its own list of the
+    nodes' scene rects, which the flow view updates on node adds, removals and moves, and only the regions
+    of the image that got dirtied by those are redrawn, never the scene itself. Painting the widget then only
+    draws the cached image and the visible area.
+    """
+
+    # dirty regions of the cached image are redrawn at most this often (ms)
+    UPDATE_INTERVAL = 50
+
+    def __init__(self, flow_view, width: int = 200, height: int = 140):
+        super().__init__(parent=flow_view)
+
+        self.setObjectName('FlowViewMinimap')
+        self.setFixedSize(width, height)
+        self.setCursor(Qt.PointingHandCursor)
+        # the cached image covers the whole widget, so the flow view below never needs to be repainted
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+
+        self.flow_view = flow_view
+        self._node_rects = {}  # {Node: (QRectF, QColor)}, in scene coordinates
+        self._scene_area = QRectF()  # the part of the scene the minimap shows
+        self._scale = 1
+        self._offset = QPointF()
+        self._cache: QImage = None
+        self._dirty_scene_rects = []
+        self._needs_rebuild = True
+
+        self._update_timer = QTimer(self)
+        self._update_timer.setSingleShot(True)
+        self._update_timer.setInterval(self.UPDATE_INTERVAL)
+        self._update_timer.timeout.connect(self._update_cache)
+
+    # MODEL
+
+    def set_node(self, node, rect: QRectF, color: QColor):
+        """Sets (or updates) the scene rect of a node"""
+
+        old = self._node_rects.get(node)
+        if old is not None:
+            if old[0] == rect:
+                return
+            self._mark_dirty(old[0])
+
+        self._node_rects[node] = (QRectF(rect), color)
+        self._mark_dirty(rect)
+
+    def remove_node(self, node):
+        old = self._node_rects.pop(node, None)
+        if old is not None:
+            self._mark_dirty(old[0])
+
+    def clear(self):
+        self._node_rects.clear()
+        self.rebuild()
+
+    def rebuild(self):
+        """Redraws the whole cached image, for example after a theme change"""
+
+        self._needs_rebuild = True
+        self._schedule_cache_update()
+
+    def _mark_dirty(self, scene_rect: QRectF):
+        if self._needs_rebuild:
+            return
+        if not self._scene_area.contains(scene_rect):
+            # the area shown needs to grow
+            self._needs_rebuild = True
+        else:
+            self._dirty_scene_rects.append(QRectF(scene_rect))
+        self._schedule_cache_update()
+
+    def _schedule_cache_update(self):
+        if not self._update_timer.isActive():
+            self._update_timer.start()
+
+    # CACHE
+
+    def _update_cache(self):
+        if not self.isVisible():
+            # done once the minimap is shown again
+            self._needs_rebuild = True
+            return
+
+        if self._needs_rebuild or self._cache is None:
+            self._rebuild_cache()
+        elif self._dirty_scene_rects:
+            dirty_region = QRegion()
+            for r in self._dirty_scene_rects:
+                # the antialiased edges reach one pixel further
+                dirty_region += self._map_from_scene(r).toAlignedRect().adjusted(-1, -1, 1, 1)
+            self._dirty_scene_rects.clear()
+
+            self._paint_cache(dirty_region)
+            self.update(dirty_region)
+
+    def _rebuild_cache(self):
+        self._needs_rebuild = False
+        self._dirty_scene_rects.clear()
+        self._update_scene_area()
+
+        dpr = self.devicePixelRatioF()
+        self._cache = QImage(int(self.width() * dpr), int(self.height() * dpr), QImage.Format_ARGB32_Premultiplied)
+        self._cache.setDevicePixelRatio(dpr)
+
+        self._paint_cache(QRegion(self.rect()))
+        self.update()
+
+    def _update_scene_area(self):
+        """Fits the nodes' bounding rect, and some space around it to move nodes into, into the widget"""
+
+        area = QRectF()
+        for rect, _ in self._node_rects.values():
+            area = area.united(rect)
+
+        if area.isEmpty():
+            area = self.flow_view.mapToScene(self.flow_view.viewport().rect()).boundingRect()
+        else:
+            margin = max(area.width(), area.height()) / 4
+            area = area.marginsAdded(QMarginsF(margin, margin, margin, margin))
+
+        # keep the aspect ratio of the widget, centering the nodes
+        self._scale = min(self.width() / area.width(), self.height() / area.height())
+        w = self.width() / self._scale
+        h = self.height() / self._scale
+        self._scene_area = QRectF(area.center().x() - w / 2, area.center().y() - h / 2, w, h)
+        self._offset = self._scene_area.topLeft()
+
+    def _paint_cache(self, region: QRegion):
+        """Redraws the region (in widget coordinates) of the cached image"""
+
+        theme = self.flow_view.session_gui.design.flow_theme
+
+        painter = QPainter(self._cache)
+        painter.setClipRegion(region)
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        painter.fillRect(region.boundingRect(), theme.flow_background_brush)
+        painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+
+        scene_rect = self._map_to_scene(QRectF(region.boundingRect()))
+        for rect, color in self._node_rects.values():
+            if rect.intersects(scene_rect):
+                painter.setBrush(color)
+                painter.drawRect(self._map_from_scene(rect))
+
+        painter.end()
+
+    def _map_from_scene(self, rect: QRectF) -> QRectF:
+        return QRectF(
+            (rect.left() - self._offset.x()) * self._scale,
+            (rect.top() - self._offset.y()) * self._scale,
+            rect.width() * self._scale,
+            rect.height() * self._scale,
+        )
+
+    def _map_to_scene(self, rect: QRectF) -> QRectF:
+        return QRectF(
+            rect.left() / self._scale + self._offset.x(),
+            rect.top() / self._scale + self._offset.y(),
+            rect.width() / self._scale,
+            rect.height() / self._scale,
+        )
+
+    # WIDGET
+
+    def showEvent(self, event):
+        QWidget.showEvent(self, event)
+        self.rebuild()
+
+    def resizeEvent(self, event):
+        QWidget.resizeEvent(self, event)
+        self.rebuild()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+
+        if self._cache is not None:
+            painter.drawImage(event.rect(), self._cache, self._cache_rect(event.rect()))
+        else:
+            painter.fillRect(event.rect(), self.flow_view.session_gui.design.flow_theme.flow_background_brush)
+
+        # visible area
+        visible_rect = self._map_from_scene(
+            self.flow_view.mapToScene(self.flow_view.viewport().rect()).boundingRect()
+        )
+        highlight = self.palette().highlight().color()
+        painter.setPen(QPen(highlight, 1))
+        fill = QColor(highlight)
+        fill.setAlpha(40)
+        painter.setBrush(fill)
+        painter.drawRect(visible_rect.intersected(QRectF(self.rect()).adjusted(0, 0, -1, -1)))
+
+        painter.setPen(QPen(self.palette().mid().color(), 1))
+        painter.setBrush(Qt.NoBrush)
+        painter.drawRect(self.rect().adjusted(0, 0, -1, -1))
+
+    def _cache_rect(self, rect: QRect) -> QRect:
+        dpr = self._cache.devicePixelRatio()
+        return QRect(int(rect.x() * dpr), int(rect.y() * dpr), int(rect.width() * dpr), int(rect.height() * dpr))
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self._navigate_to(event.pos())
+        event.accept()
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.LeftButton:
+            self._navigate_to(event.pos())
+        event.accept()
+
+    def mouseReleaseEvent(self, event):
+        event.accept()
+
+    def wheelEvent(self, event):
+        event.accept()
+
+    def _navigate_to(self, pos):
+        self.flow_view.centerOn(QPointF(
+            pos.x() / self._scale + self._offset.x(),
+            pos.y() / self._scale + self._offset.y(),
+        ))
@@ -0,0 +1,281 @@
+import json
+import inspect
+from collections import deque
+from functools import wraps
+from time import perf_counter
+
+from qtpy.QtCore import Qt, QRectF
+from qtpy.QtGui import QColor, QFont, QFontMetricsF, QPainter
+
+from .FlowTheme import FlowTheme, flow_themes
+from .connections.ConnectionItem import ConnectionItem
+from .connections.ConnectionLayer import ConnectionLayer, LayerConnection
+from .nodes.NodeItem import NodeItem
+from .nodes.PortItem import PortItemPin
+
+
+class FlowViewProfiler:
+    """
+    Opt-in profiling of a flow view's painting, see FlowView.set_profiling_enabled().
+
+    While any profiler is active, the paint methods of node items, port pins and flow themes, the
+    drawBackground() and drawForeground() methods of flow views, ConnectionLayer.paint(), and the recompute()
+    methods of connection items and layer connections get wrapped by timing functions, and the times are
+    aggregated per method, item type and flow theme. The times of a method don't include the time spent in
+    the instrumented methods it calls (e.g. NodeItem.paint() calling the flow theme's paint methods), so
+    they add up to the total painting time. Nothing is wrapped as long as no profiler is active,
+    so profiling costs nothing when disabled.
+    The profiler draws a HUD with the frame times, item counts and the most expensive methods into the
+    view, and the collected data can be exported as JSON.
+    """
+
+    # number of the most recent frames the frame time stats are computed from
+    FRAMES_WINDOW = 120
+    # number of methods listed in the HUD
+    HUD_TOP_OFFENDERS = 5
+
+    # the profiler of the flow view that is currently painting, used for the flow theme's methods
+    painting = None
+
+    _num_active = 0
+    _originals = {}  # {(class, method name): original function}
+
+    def __init__(self, flow_view):
+        self.flow_view = flow_view
+        self.hud_visible = True
+        self.active = False
+
+        self.stats = {}  # {(method, type, theme): [calls, total time, max time]}, self times in seconds
+        self._call_stack = []  # [time spent in instrumented calls], one entry per running instrumented call
+        self.frame_times = deque(maxlen=self.FRAMES_WINDOW)
+        self.num_frames = 0
+        self._frame_start = None
+        self._time_started = None
+
+    def start(self):
+        if self.active:
+            return
+        self.active = True
+        self._time_started = perf_counter()
+
+        if FlowViewProfiler._num_active == 0:
+            FlowViewProfiler._instrument(type(self.flow_view))
+        FlowViewProfiler._num_active += 1
+
+    def stop(self):
+        if not self.active:
+            return
+        self.active = False
+
+        FlowViewProfiler._num_active -= 1
+        if FlowViewProfiler._num_active == 0:
+            FlowViewProfiler._uninstrument()
+
+    def reset(self):
+        self.stats.clear()
+        self.frame_times.clear()
+        self.num_frames = 0
+        self._time_started = perf_counter()
+
+    # RECORDING
+
+    def record(self, method: str, type_: str, dt: float):
+        key = (method, type_, self.flow_view.session_gui.design.flow_theme.name)
+        s = self.stats.get(key)
+        if s is None:
+            self.stats[key] = [1, dt, dt]
+        else:
+            s[0] += 1
+            s[1] += dt
+            if dt > s[2]:
+                s[2] = dt
+
+    def frame_started(self):
+        FlowViewProfiler.painting = self
+        self._frame_start = perf_counter()
+
+    def frame_finished(self):
+        self.frame_times.append(perf_counter() - self._frame_start)
+        self.num_frames += 1
+        FlowViewProfiler.painting = None
+
+    # RESULTS
+
+    def frame_time_stats(self) -> dict:
+        """Frame time stats (in ms) of the most recent frames"""
+
+        if not self.frame_times:
+            return {'frames': 0, 'mean': 0, 'max': 0, 'fps': 0}
+
+        mean = sum(self.frame_times) / len(self.frame_times)
+        return {
+            'frames': len(self.frame_times),
+            'mean': mean * 1000,
+            'max': max(self.frame_times) * 1000,
+            'fps': 1 / mean if mean > 0 else 0,
+        }
+
+    def item_counts(self) -> dict:
+        fv = self.flow_view
+        return {
+            'node items': len(fv.node_items),
+            'node placeholders': len(fv.node_placeholders),
+            'connection items': len(fv.connection_items),
+            'drawings': len(fv.drawings),
+            'scene items': len(fv.scene().items()),
+        }
+
+    def entries(self) -> list:
+        """All recorded stats, most expensive first"""
+
+        entries = [
+            {
+                'method': method,
+                'type': type_,
+                'theme': theme,
+                'calls': calls,
+                'total ms': total * 1000,
+                'mean ms': total / calls * 1000,
+                'max ms': max_ * 1000,
+            }
+            for (method, type_, theme), (calls, total, max_) in self.stats.items()
+        ]
+        entries.sort(key=lambda e: e['total ms'], reverse=True)
+        return entries
+
+    def aggregated(self, by: str) -> dict:
+        """Total times (in ms) and calls aggregated by 'method', 'type' or 'theme'"""
+
+        result = {}
+        for e in self.entries():
+            r = result.setdefault(e[by], {'calls': 0, 'total ms': 0})
+            r['calls'] += e['calls']
+            r['total ms'] += e['total ms']
+        return result
+
+    def data(self) -> dict:
+        return {
+            'flow': self.flow_view.flow.title,
+            'duration s': perf_counter() - self._time_started if self._time_started is not None else 0,
+            'frames': self.num_frames,
+            'frame times': self.frame_time_stats(),
+            'item counts': self.item_counts(),
+            'by type': self.aggregated('type'),
+            'by theme': self.aggregated('theme'),
+            'entries': self.entries(),
+        }
+
+    def export_json(self, filepath: str) -> bool:
+        try:
+            with open(filepath, 'w') as f:
+                json.dump(self.data(), f, indent=4)
+        except OSError as e:
+            print('Couldn\'t export the profiling data to', filepath, ':', e)
+            return False
+        return True
+
+    # HUD
+
+    def draw_hud(self, painter):
+        """Draws the HUD into the top left corner of the view, called by FlowView.drawForeground()"""
+
+        if not self.hud_visible:
+            return
+
+        ft = self.frame_time_stats()
+        counts = self.item_counts()
+        lines = [
+            f'frame: {ft["mean"]:.2f}ms mean, {ft["max"]:.2f}ms max ({ft["fps"]:.0f} fps)',
+            f'nodes: {counts["node items"]} items, {counts["node placeholders"]} placeholders, '
+            f'connections: {counts["connection items"]}, scene items: {counts["scene items"]}',
+        ]
+        for e in self.entries()[:self.HUD_TOP_OFFENDERS]:
+            lines.append(
+                f'{e["total ms"]:9.1f}ms {e["calls"]:7d}x  {e["method"]} [{e["type"]}, {e["theme"]}]'
+            )
+
+        font = QFont('Source Code Pro', 9)
+        fm = QFontMetricsF(font)
+        line_h = fm.height()
+        w = max(fm.width(l) for l in lines) + 16
+        h = line_h * len(lines) + 12
+
+        painter.save()
+        painter.resetTransform()  # draw in viewport coordinates
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(0, 0, 0, 170))
+        painter.drawRect(QRectF(5, 5, w, h))
+        painter.setFont(font)
+        painter.setPen(QColor('#e0e0e0'))
+        for i, line in enumerate(lines):
+            painter.drawText(QRectF(13, 11 + i * line_h, w, line_h), Qt.AlignLeft | Qt.AlignVCenter, line)
+        painter.restore()
+
+    # INSTRUMENTATION
+
+    @staticmethod
+    def _instrumented_methods(flow_view_class) -> list:
+        """Returns [(class, method name, function returning the profiler for the object)]"""
+
+        methods = [
+            (NodeItem, 'paint', lambda i: i.flow_view.profiler),
+            (PortItemPin, 'paint', lambda i: i.flow_view.profiler),
+            (ConnectionItem, 'recompute', lambda i: i.out_item.node_item.flow_view.profiler),
+            (ConnectionLayer, 'paint', lambda i: i.flow_view.profiler),
+            (LayerConnection, 'recompute', lambda e: e.layer.flow_view.profiler),
+        ]
+
+        for name in ('drawBackground', 'drawForeground'):
+            cls = next(c for c in flow_view_class.__mro__ if name in c.__dict__)
+            methods.append((cls, name, lambda v: v.profiler))
+
+        theme_classes = {}  # used as ordered set
+        for theme in flow_themes:
+            for cls in type(theme).__mro__:
+                if issubclass(cls, FlowTheme):
+                    theme_classes[cls] = None
+        for cls in theme_classes:
+            for name, f in cls.__dict__.items():
+                if name.startswith('paint_') and inspect.isfunction(f):
+                    methods.append((cls, name, lambda t: FlowViewProfiler.painting))
+
+        return methods
+
+    @staticmethod
+    def _instrument(flow_view_class):
+        for cls, name, get_profiler in FlowViewProfiler._instrumented_methods(flow_view_class):
+            original = cls.__dict__[name]
+            FlowViewProfiler._originals[(cls, name)] = original
+            setattr(cls, name, FlowViewProfiler._timed(original, f'{cls.__name__}.{name}', get_profiler))
+
+    @staticmethod
+    def _uninstrument():
+        for (cls, name), original in FlowViewProfiler._originals.items():
+            setattr(cls, name, original)
+        FlowViewProfiler._originals.clear()
+
+    @staticmethod
+    def _timed(f, method: str, get_profiler):
+        """Wraps f to record its execution times, without the times of the instrumented calls it makes,
+        as method, under the type of the object it's called on"""
+
+        @wraps(f)
+        def timed_f(self, *args, **kwargs):
+            profiler = get_profiler(self)
+            if profiler is None or not profiler.active:
+                return f(self, *args, **kwargs)
+
+            stack = profiler._call_stack
+            stack.append(0)
+            t = perf_counter()
+            try:
+                return f(self, *args, **kwargs)
+            finally:
+                dt = perf_counter() - t
+                nested_dt = stack.pop()
+                if stack:
+                    stack[-1] += dt
+                profiler.record(method, type(self).__name__, dt - nested_dt)
+
+        return timed_f
@@ -0,0 +1,99 @@
+from collections import OrderedDict
+
+from qtpy.QtWidgets import QGraphicsItem, QGraphicsProxyWidget
+
+
+# rough costs of a graphics item and of an embedded widget, in bytes
+ITEM_BYTES = 1024
+WIDGET_BYTES = 16 * 1024
+
+
+def estimated_size(item: QGraphicsItem) -> int:
+    """Returns a rough estimate of the memory held by item and its children, in bytes"""
+
+    size = 0
+    items = [item]
+    while items:
+        i = items.pop()
+        size += ITEM_BYTES
+        if i.cacheMode() != QGraphicsItem.NoCache:
+            r = i.boundingRect()
+            size += int(r.width() * r.height()) * 4
+        if isinstance(i, QGraphicsProxyWidget) and i.widget() is not None:
+            size += WIDGET_BYTES
+        items.extend(i.childItems())
+    return size
+
+
+class ItemCache:
+    """
+    Keeps the graphics items of components removed from a flow view, so they can be reused when the
+    removal gets undone, see FlowView._prune_item_caches() and Design.set_item_cache_size().
+
+    Items are ordered by their removal, least recent first. When an item is evicted, the data needed to
+    build a new one can be kept in evicted; asking for an evicted item later counts as a miss.
+    """
+
+    def __init__(self):
+        self._items = OrderedDict()  # {component: item}, least recently removed first
+        self._sizes = {}  # {component: estimated size in bytes}
+        self.evicted = {}  # {component: data or None}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def __len__(self):
+        return len(self._items)
+
+    def items(self):
+        return list(self._items.items())
+
+    def insert(self, key, item):
+        self._items[key] = item
+        self._items.move_to_end(key)
+        self._sizes[key] = estimated_size(item)
+        self.evicted.pop(key, None)
+
+    def take(self, key):
+        """Removes and returns the cached item of key for reuse, or None"""
+
+        item = self._items.pop(key, None)
+        if item is not None:
+            del self._sizes[key]
+            self.hits += 1
+        elif key in self.evicted:
+            self.misses += 1
+        return item
+
+    def pop(self, key):
+        """Removes and returns the item of key without counting it as hit or eviction"""
+
+        del self._sizes[key]
+        return self._items.pop(key)
+
+    def evict(self, key, data=None):
+        """Removes and returns the item of key, and keeps data for rebuilding it"""
+
+        self.evictions += 1
+        self.evicted[key] = data
+        return self.pop(key)
+
+    def memory(self) -> int:
+        """Estimated memory held by the cached items, in bytes"""
+        return sum(self._sizes.values())
+
+    def stats(self) -> dict:
+        return {
+            'items': len(self._items),
+            'evicted': len(self.evicted),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'memory': self.memory(),
+        }
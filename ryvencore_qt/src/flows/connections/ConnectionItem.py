@@ -1,4 +1,6 @@
 # import math
+from collections import OrderedDict
+
 from qtpy.QtCore import QMarginsF
 from qtpy.QtCore import QRectF, QPointF, Qt
 from qtpy.QtGui import QPainter, QColor, QRadialGradient, QPainterPath, QPen
@@ -7,6 +9,7 @@ from qtpy.QtWidgets import QGraphicsPathItem, QGraphicsItem, QStyleOptionGraphic
 from ...GUIBase import GUIBase
 from ...utils import sqrt
 from ...utils import pythagoras
+from .ConnectionPaths import connection_path_segments, bulk_connection_path_segments, path_from_segments
 
 
 class ConnectionItem(GUIBase, QGraphicsPathItem):
@@ -14,6 +17,11 @@ class ConnectionItem(GUIBase, QGraphicsPathItem):
     for reimplementation later, so users can add GUI for the enhancements of DataConnection and ExecConnection,
     like input fields for weights."""
 
+    # see styled_pen()
+    PEN_CACHE_BUCKET = 4
+    PEN_CACHE_SIZE = 4096
+    _pen_cache = OrderedDict()  # {(item class, color, width, style, path end bucket): QPen}
+
     def __init__(self, connection, session_design):
         #GUIBase.__init__(self, representing_component=connection) # ConnectionItem doesn't have a representing component
         QGraphicsPathItem.__init__(self)
@@ -37,66 +45,91 @@ class ConnectionItem(GUIBase, QGraphicsPathItem):
 
         self.recompute()
 
+    def release(self):
+        """Disconnects the item from the design, so it can be dropped for good"""
+
+        self.session_design.flow_theme_changed.disconnect(self.recompute)
+        self.session_design.performance_mode_changed.disconnect(self.recompute)
+
     def recompute(self):
         """Updates scene position and recomputes path, pen and gradient"""
 
+        pos = self.out_pos()
+        self.set_path(pos, self.connection_path(QPointF(0, 0), self.inp_pos() - pos))
+
+    def set_path(self, pos: QPointF, path: QPainterPath):
+        """Moves the item to the scene position pos and sets the path, relative to pos"""
+
         # position
-        self.setPos(self.out_pos())
+        self.setPos(pos)
 
         # path
-        self.setPath(
-            self.connection_path(
-                QPointF(0, 0),
-                self.inp_pos()-self.scenePos()
-            )
-        )
+        self.setPath(path)
+
+        # brush
+        self.setBrush(Qt.NoBrush)
 
         # pen
+        self.setPen(self.styled_pen())
+
+    def styled_pen(self) -> QPen:
+        """Returns the pen for the current path, with a gradient in 'pretty' mode. Pens with gradients are
+        cached per pen and path size, rounded to PEN_CACHE_BUCKET, since most connections look alike."""
+
         pen = self.get_pen()
+        if self.session_design.performance_mode != 'pretty':
+            return pen
 
-        # brush
-        self.setBrush(Qt.NoBrush)
+        end = self.path().currentPosition()
+        b = self.PEN_CACHE_BUCKET
+        key = (type(self), pen.color().rgba(), pen.widthF(), int(pen.style()), round(end.x() / b), round(end.y() / b))
+        cached = ConnectionItem._pen_cache.get(key)
+        if cached is not None:
+            ConnectionItem._pen_cache.move_to_end(key)
+            return cached
 
         #   gradient
-        if self.session_design.performance_mode == 'pretty':
-            c = pen.color()
-            w = self.path().boundingRect().width()
-            h = self.path().boundingRect().height()
-            gradient = QRadialGradient(
-                self.boundingRect().center(),
-                pythagoras(w, h) / 2
-            )
+        c = pen.color()
+        w = self.path().boundingRect().width()
+        h = self.path().boundingRect().height()
+        gradient = QRadialGradient(
+            self.boundingRect().center(),
+            pythagoras(w, h) / 2
+        )
 
-            c_r = c.red()
-            c_g = c.green()
-            c_b = c.blue()
-
-            # this offset will be 1 if inp.x >> out.x and 0 if inp.x < out.x
-            # hence, no fade for the gradient if the connection goes backwards
-            offset_mult: float = max(
-                0,
-                min(
-                    (self.inp_pos().x() - self.out_pos().x()) / 200,
-                    1
-                )
+        c_r = c.red()
+        c_g = c.green()
+        c_b = c.blue()
+
+        # this offset will be 1 if inp.x >> out.x and 0 if inp.x < out.x
+        # hence, no fade for the gradient if the connection goes backwards
+        offset_mult: float = max(
+            0,
+            min(
+                end.x() / 200,
+                1
             )
+        )
 
-            # and if the input is very far away from the output, decrease the gradient fade so the connection
-            # doesn't fully disappear at the ends and stays visible
-            if self.inp_pos().x() > self.out_pos().x():
-                offset_mult = min(
-                    offset_mult,
-                    2000 / (self.dist(self.inp_pos(), self.out_pos()))
-                )
-                # zucker.
+        # and if the input is very far away from the output, decrease the gradient fade so the connection
+        # doesn't fully disappear at the ends and stays visible
+        if end.x() > 0:
+            offset_mult = min(
+                offset_mult,
+                2000 / (self.dist(end, QPointF(0, 0)))
+            )
+            # zucker.
 
-            gradient.setColorAt(0.0, QColor(c_r, c_g, c_b, 255))
-            gradient.setColorAt(0.75, QColor(c_r, c_g, c_b, 255 - round(55 * offset_mult)))
-            gradient.setColorAt(0.95, QColor(c_r, c_g, c_b, 255 - round(255 * offset_mult)))
+        gradient.setColorAt(0.0, QColor(c_r, c_g, c_b, 255))
+        gradient.setColorAt(0.75, QColor(c_r, c_g, c_b, 255 - round(55 * offset_mult)))
+        gradient.setColorAt(0.95, QColor(c_r, c_g, c_b, 255 - round(255 * offset_mult)))
 
-            pen.setBrush(gradient)
+        pen.setBrush(gradient)
 
-        self.setPen(pen)
+        ConnectionItem._pen_cache[key] = pen
+        if len(ConnectionItem._pen_cache) > self.PEN_CACHE_SIZE:
+            ConnectionItem._pen_cache.popitem(last=False)
+        return pen
     
     def out_pos(self) -> QPointF:
         """The current global scene position of the pin of the output port"""
@@ -181,35 +214,27 @@ class DataConnectionItem(ConnectionItem):
 def default_cubic_connection_path(p1: QPointF, p2: QPointF):
     """Returns the nice looking QPainterPath from p1 to p2"""
 
-    path = QPainterPath()
-
-    path.moveTo(p1)
-
-    dx = p2.x() - p1.x()
-    adx = abs(dx)
-    dy = p2.y() - p1.y()
-    ady = abs(dy)
-    distance = sqrt((dx ** 2) + (dy ** 2))
-    x1, y1 = p1.x(), p1.y()
-    x2, y2 = p2.x(), p2.y()
-
-    if ((x1 < x2 - 30) or distance < 100) and (x1 < x2):
-        # STANDARD FORWARD
-        path.cubicTo(x1 + ((x2 - x1) / 2), y1,
-                     x1 + ((x2 - x1) / 2), y2,
-                     x2, y2)
-    elif x2 < x1 - 100 and adx > ady * 2:
-        # STRONG BACKWARDS
-        path.cubicTo(x1 + 100 + (x1 - x2) / 10, y1,
-                     x1 + 100 + (x1 - x2) / 10, y1 + (dy / 2),
-                     x1 + (dx / 2), y1 + (dy / 2))
-        path.cubicTo(x2 - 100 - (x1 - x2) / 10, y2 - (dy / 2),
-                     x2 - 100 - (x1 - x2) / 10, y2,
-                     x2, y2)
-    else:
-        # STANDARD BACKWARDS
-        path.cubicTo(x1 + 100 + (x1 - x2) / 3, y1,
-                     x2 - 100 - (x1 - x2) / 3, y2,
-                     x2, y2)
-    
-    return path
+    return path_from_segments(p1.x(), p1.y(), connection_path_segments(p1.x(), p1.y(), p2.x(), p2.y()))
+
+
+def recompute_connections(items):
+    """Recomputes many connection items at once, e.g. after moving a selection (see FlowView.bulk_move()).
+    The default paths of all of them are computed in one batch, items with custom paths are recomputed
+    one by one."""
+
+    batch = []
+    for item in items:
+        if item.connection_path is ConnectionItem.connection_path:
+            batch.append(item)
+        else:
+            item.recompute()
+    if not batch:
+        return
+
+    out_pos = [item.out_pos() for item in batch]
+    ends = [item.inp_pos() - pos for item, pos in zip(batch, out_pos)]
+    zeros = [0] * len(batch)
+    segments = bulk_connection_path_segments(zeros, zeros, [e.x() for e in ends], [e.y() for e in ends])
+
+    for item, pos, item_segments in zip(batch, out_pos, segments):
+        item.set_path(pos, path_from_segments(0, 0, item_segments))
@@ -0,0 +1,249 @@
+from math import floor
+
+from qtpy.QtCore import Qt, QRectF, QPointF
+from qtpy.QtGui import QPainterPath, QPainterPathStroker, QPen
+from qtpy.QtWidgets import QGraphicsItem
+
+from .ConnectionItem import DataConnectionItem, ExecConnectionItem
+
+
+class LayerConnection:
+    """
+    A connection drawn by a ConnectionLayer. It stands in for a ConnectionItem in the flow view,
+    but only stores its path in scene coordinates and its bounding rect.
+    """
+
+    __slots__ = ('connection', 'out_item', 'inp_item', 'layer', 'is_data', 'connection_path', 'path', 'rect',
+                 'cells', 'highlighted')
+
+    def __init__(self, connection, layer):
+        self.connection = connection
+        out, inp = connection
+        self.out_item = out.node.gui.item.outputs[out.node.outputs.index(out)]
+        self.inp_item = inp.node.gui.item.inputs[inp.node.inputs.index(inp)]
+        self.layer = layer
+        self.is_data = inp.type_ == 'data'
+        self.connection_path = (DataConnectionItem if self.is_data else ExecConnectionItem).connection_path
+        self.path = QPainterPath()
+        self.rect = QRectF()
+        self.cells = None  # grid cells of the layer's spatial index, None if not indexed
+        self.highlighted = False
+
+    def out_pos(self) -> QPointF:
+        return self.out_item.pin.get_scene_center_pos()
+
+    def inp_pos(self) -> QPointF:
+        return self.inp_item.pin.get_scene_center_pos()
+
+    def recompute(self):
+        """Recomputes the path after the pins moved"""
+
+        pos = self.out_pos()
+        self.set_path(pos, self.connection_path(QPointF(0, 0), self.inp_pos() - pos))
+
+    def set_path(self, pos: QPointF, path: QPainterPath):
+        """Sets the path, relative to the scene position pos"""
+
+        path.translate(pos)
+        self.path = path
+
+        m = self.layer.pen(self.is_data, True).widthF()
+        self.layer.edge_changed(self, path.controlPointRect().adjusted(-m, -m, m, m))
+
+    def set_highlighted(self, b: bool):
+        self.highlighted = b
+        self.update()
+
+    def update(self):
+        self.layer.update(self.rect)
+
+    def sceneBoundingRect(self) -> QRectF:
+        return QRectF(self.rect)
+
+    def release(self):
+        pass
+
+
+class ConnectionLayer(QGraphicsItem):
+    """
+    Draws all connections of a flow view in one item, see Design.set_connection_layer_threshold().
+
+    Instead of one QGraphicsPathItem with its own pen, gradient and device coordinate cache per connection,
+    the layer keeps the paths of LayerConnections and paints the ones intersecting the exposed rect in one
+    pass, grouped by pen. The connections are drawn without gradients. A uniform grid over the scene serves
+    as spatial index for culling and for finding the hovered connection; connections spanning more than
+    MAX_CELLS cells are kept in a separate list instead.
+    The layer itself has an empty shape, so it never takes mouse events or selections from other items.
+    """
+
+    CELL_SIZE = 256
+    MAX_CELLS = 64
+
+    def __init__(self, flow_view, design):
+        super().__init__()
+
+        self.flow_view = flow_view
+        self.design = design
+        self.edges = {}  # {LayerConnection: None}, used as ordered set
+        self._cells = {}  # {(column, row): {LayerConnection: None}}
+        self._large_edges = {}  # {LayerConnection: None}, edges spanning too many cells
+        self._rect = QRectF()
+        self._pens = {}  # {(is data, highlighted): QPen}
+        self._hovered: LayerConnection = None
+
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+        self.setAcceptedMouseButtons(Qt.NoButton)
+        self.setZValue(10)  # like connection items
+
+        self.design.flow_theme_changed.connect(self._theme_changed)
+
+    def release(self):
+        """Disconnects the layer from the design, so it can be dropped for good"""
+        self.design.flow_theme_changed.disconnect(self._theme_changed)
+
+    def _theme_changed(self, _):
+        self._pens.clear()
+        for edge in self.edges:
+            edge.recompute()
+        self.update()
+
+    def pen(self, is_data: bool, highlighted: bool) -> QPen:
+        key = (is_data, highlighted)
+        pen = self._pens.get(key)
+        if pen is None:
+            theme = self.design.flow_theme
+            if is_data:
+                pen = QPen(theme.data_conn_color, theme.data_conn_width)
+                pen.setStyle(theme.data_conn_pen_style)
+            else:
+                pen = QPen(theme.exec_conn_color, theme.exec_conn_width)
+                pen.setStyle(theme.exec_conn_pen_style)
+            pen.setCapStyle(Qt.RoundCap)
+            if highlighted:
+                pen.setWidthF(pen.widthF() * 2)
+            self._pens[key] = pen
+        return pen
+
+    # EDGES
+
+    def add(self, edge: LayerConnection):
+        self.edges[edge] = None
+        edge.recompute()
+
+    def remove(self, edge: LayerConnection):
+        if self._hovered is edge:
+            self._hovered = None
+        self.edges.pop(edge, None)
+        self._unindex(edge)
+        self.update(edge.rect)
+
+    def edge_changed(self, edge: LayerConnection, rect: QRectF):
+        """Called by the edge when its path changed"""
+
+        self.update(edge.rect)
+        self._unindex(edge)
+        edge.rect = rect
+        self._index(edge)
+        self.update(rect)
+
+        if not self._rect.contains(rect):
+            self.prepareGeometryChange()
+            self._rect = self._rect.united(rect)
+
+    def _cell_range(self, rect: QRectF):
+        """Returns the (columns, rows) of the grid cells rect covers, or None if they are too many"""
+
+        s = self.CELL_SIZE
+        columns = range(floor(rect.left() / s), floor(rect.right() / s) + 1)
+        rows = range(floor(rect.top() / s), floor(rect.bottom() / s) + 1)
+        if len(columns) * len(rows) > self.MAX_CELLS:
+            return None
+        return columns, rows
+
+    def _index(self, edge: LayerConnection):
+        cell_range = self._cell_range(edge.rect)
+        if cell_range is None:
+            self._large_edges[edge] = None
+            edge.cells = None
+            return
+
+        columns, rows = cell_range
+        edge.cells = [(c, r) for c in columns for r in rows]
+        for cell in edge.cells:
+            edges = self._cells.get(cell)
+            if edges is None:
+                edges = self._cells[cell] = {}
+            edges[edge] = None
+
+    def _unindex(self, edge: LayerConnection):
+        if edge.cells is None:
+            self._large_edges.pop(edge, None)
+            return
+
+        for cell in edge.cells:
+            edges = self._cells[cell]
+            del edges[edge]
+            if not edges:
+                del self._cells[cell]
+        edge.cells = None
+
+    def edges_in(self, rect: QRectF) -> list:
+        """Returns the edges whose bounding rects intersect rect"""
+
+        cell_range = self._cell_range(rect)
+        if cell_range is None:
+            candidates = self.edges
+        else:
+            candidates = dict(self._large_edges)
+            columns, rows = cell_range
+            for c in columns:
+                for r in rows:
+                    candidates.update(self._cells.get((c, r), ()))
+
+        return [e for e in candidates if e.rect.intersects(rect)]
+
+    def edge_at(self, pos: QPointF) -> LayerConnection:
+        """Returns the topmost edge at the scene position pos, or None"""
+
+        stroker = QPainterPathStroker()
+        for edge in reversed(self.edges_in(QRectF(pos.x(), pos.y(), 1, 1))):
+            stroker.setWidth(self.pen(edge.is_data, False).widthF() + 4)
+            if stroker.createStroke(edge.path).contains(pos):
+                return edge
+        return None
+
+    def hover(self, pos: QPointF = None):
+        """Highlights the edge at the scene position pos, like connection items do when hovered;
+        called by the flow view on mouse moves"""
+
+        edge = self.edge_at(pos) if pos is not None else None
+        if edge is self._hovered:
+            return
+        if self._hovered is not None:
+            self._hovered.set_highlighted(False)
+        self._hovered = edge
+        if edge is not None:
+            edge.set_highlighted(True)
+
+    # ITEM
+
+    def boundingRect(self):
+        return self._rect
+
+    def shape(self):
+        return QPainterPath()
+
+    def paint(self, painter, option, widget=None):
+        groups = {}  # {(is data, highlighted): [LayerConnection]}
+        for edge in self.edges_in(option.exposedRect):
+            key = (edge.is_data, edge.highlighted)
+            edges = groups.get(key)
+            if edges is None:
+                edges = groups[key] = []
+            edges.append(edge)
+
+        painter.setBrush(Qt.NoBrush)
+        for key in sorted(groups, key=lambda k: k[1]):  # highlighted ones on top
+            painter.setPen(self.pen(*key))
+            for edge in groups[key]:
+                painter.drawPath(edge.path)
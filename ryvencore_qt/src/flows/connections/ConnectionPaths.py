@@ -0,0 +1,86 @@
+"""
+The routing of the default connection paths, for single connections and for many at once.
+
+A path from (x1, y1) to (x2, y2) consists of one or two cubic segments, each given as
+(c1x, c1y, c2x, c2y, end x, end y). Bulk computations use numpy if it's installed (the 'fast' extra),
+and otherwise compute the paths one by one.
+"""
+
+from math import sqrt
+
+from qtpy.QtGui import QPainterPath
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def connection_path_segments(x1: float, y1: float, x2: float, y2: float) -> tuple:
+    """Returns the cubic segments of the default connection path from (x1, y1) to (x2, y2)"""
+
+    dx = x2 - x1
+    adx = abs(dx)
+    dy = y2 - y1
+    ady = abs(dy)
+    distance = sqrt((dx ** 2) + (dy ** 2))
+
+    if ((x1 < x2 - 30) or distance < 100) and (x1 < x2):
+        # STANDARD FORWARD
+        return (
+            (x1 + ((x2 - x1) / 2), y1, x1 + ((x2 - x1) / 2), y2, x2, y2),
+        )
+    elif x2 < x1 - 100 and adx > ady * 2:
+        # STRONG BACKWARDS
+        return (
+            (x1 + 100 + (x1 - x2) / 10, y1, x1 + 100 + (x1 - x2) / 10, y1 + (dy / 2), x1 + (dx / 2), y1 + (dy / 2)),
+            (x2 - 100 - (x1 - x2) / 10, y2 - (dy / 2), x2 - 100 - (x1 - x2) / 10, y2, x2, y2),
+        )
+    else:
+        # STANDARD BACKWARDS
+        return (
+            (x1 + 100 + (x1 - x2) / 3, y1, x2 - 100 - (x1 - x2) / 3, y2, x2, y2),
+        )
+
+
+def bulk_connection_path_segments(x1: list, y1: list, x2: list, y2: list) -> list:
+    """Returns the segments of the default connection paths of many connections at once, see
+    connection_path_segments()"""
+
+    if numpy is None or len(x1) < 2:
+        return [connection_path_segments(*p) for p in zip(x1, y1, x2, y2)]
+
+    x1, y1, x2, y2 = (numpy.asarray(a, dtype=float) for a in (x1, y1, x2, y2))
+    dx = x2 - x1
+    dy = y2 - y1
+    distance = numpy.sqrt(dx ** 2 + dy ** 2)
+
+    forward = ((x1 < x2 - 30) | (distance < 100)) & (x1 < x2)
+    strong_backwards = ~forward & (x2 < x1 - 100) & (numpy.abs(dx) > numpy.abs(dy) * 2)
+
+    # the first segment; standard backwards where neither of the other cases applies
+    bend = numpy.where(strong_backwards, 100 + (x1 - x2) / 10, 100 + (x1 - x2) / 3)
+    c1x = numpy.where(forward, x1 + dx / 2, x1 + bend)
+    c2x = numpy.where(forward, x1 + dx / 2, numpy.where(strong_backwards, x1 + bend, x2 - bend))
+    c2y = numpy.where(strong_backwards, y1 + dy / 2, y2)
+    ex = numpy.where(strong_backwards, x1 + dx / 2, x2)
+    ey = numpy.where(strong_backwards, y1 + dy / 2, y2)
+
+    # the second segment of strong backwards paths
+    c3x = x2 - bend
+    c3y = y2 - dy / 2
+
+    first = zip(*(a.tolist() for a in (c1x, y1, c2x, c2y, ex, ey)))
+    second = zip(*(a.tolist() for a in (c3x, c3y, c3x, y2, x2, y2)))
+    return [
+        (s1, s2) if strong else (s1,)
+        for s1, s2, strong in zip(first, second, strong_backwards.tolist())
+    ]
+
+
+def path_from_segments(x1: float, y1: float, segments: tuple) -> QPainterPath:
+    path = QPainterPath()
+    path.moveTo(x1, y1)
+    for segment in segments:
+        path.cubicTo(*segment)
+    return path
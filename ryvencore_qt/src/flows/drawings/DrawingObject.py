@@ -163,6 +163,9 @@ class DrawingObject(QGraphicsItem):
             if self.movement_state == MovementEnum.mouse_clicked:
                 self.movement_state = MovementEnum.position_changed
 
+        elif change == QGraphicsItem.ItemScenePositionHasChanged:
+            self.flow_view.drawing_geometry_changed(self)
+
         return QGraphicsItem.itemChange(self, change, value)
 
     def mousePressEvent(self, event):
@@ -1,7 +1,7 @@
-from queue import Queue
+from collections import deque
 from typing import List, Dict, Tuple, Optional, Union
 
-from qtpy.QtCore import QObject, Signal
+from qtpy.QtCore import QObject, QThread, Signal
 
 
 class NodeGUI(QObject):
@@ -36,7 +36,7 @@ class NodeGUI(QObject):
 
         node, session_gui = params
         self.node = node
-        self.item = None   # set by the node item directly after this __init__ call
+        self.item = None   # set by the node item directly after this __init__ call, None while virtualized
         self.session_gui = session_gui
         setattr(node, 'gui', self)
 
@@ -50,17 +50,29 @@ class NodeGUI(QObject):
             self.input_widgets[self.node.inputs[i]] = widget_data
         # using attach_input_widgets() one can buffer input widget
         # names for inputs that are about to get created
-        self._next_input_widgets = Queue()
+        self._next_input_widgets = deque()
 
         self.error_during_update = False
 
-        # turn ryvencore signals into Qt signals
-        self.node.updating.sub(self._on_updating)
-        self.node.update_error.sub(self._on_update_error)
-        self.node.input_added.sub(self._on_new_input_added)
-        self.node.output_added.sub(self._on_new_output_added)
-        self.node.input_removed.sub(self._on_input_removed)
-        self.node.output_removed.sub(self._on_output_removed)
+        # turn ryvencore signals into Qt signals, in the GUI thread (the RefreshScheduler is thread safe)
+        in_gui_thread = self.session_gui.in_gui_thread
+        self._node_subscriptions = [  # [(event, callback)], see release()
+            (self.node.updating, self._on_updating),
+            (self.node.update_error, in_gui_thread(self._on_update_error)),
+            (self.node.input_added, in_gui_thread(self._on_new_input_added)),
+            (self.node.output_added, in_gui_thread(self._on_new_output_added)),
+            (self.node.input_removed, in_gui_thread(self._on_input_removed)),
+            (self.node.output_removed, in_gui_thread(self._on_output_removed)),
+        ]
+        for event, callback in self._node_subscriptions:
+            event.sub(callback)
+
+    def release(self):
+        """Unsubscribes from the node's events, called once the node got deleted for good"""
+
+        for event, callback in self._node_subscriptions:
+            event.unsub(callback)
+        self._node_subscriptions.clear()
 
     def initialized(self):
         """
@@ -94,17 +106,26 @@ class NodeGUI(QObject):
         self.update_error.emit(e)
 
     def _on_updating(self, inp: int):
-        # update input widget
-        if inp != -1 and self.item.inputs[inp].widget is not None:
-            o = self.node.flow.connected_output(self.node.inputs[inp])
-            if o is not None:
-                self.item.inputs[inp].widget.val_update_event(o.val)
+        # the GUI gets refreshed by the session's refresh scheduler, at most at the max GUI refresh rate
+        self.session_gui.refresh_scheduler.node_updating(self, self.node.inputs[inp] if inp != -1 else None)
+
+    def refresh(self, inputs: set):
+        """Shows the latest values of the updated inputs in their widgets and emits updating,
+        called by the RefreshScheduler"""
+
+        # update input widgets
+        if inputs and self.item is not None:
+            for inp_item in self.item.inputs:
+                if inp_item.port in inputs and inp_item.widget is not None:
+                    o = self.node.flow.connected_output(inp_item.port)
+                    if o is not None:
+                        inp_item.widget.val_update_event(o.val)
 
         self.updating.emit()
 
     def _on_new_input_added(self, _, index, inp):
-        if not self._next_input_widgets.empty():
-            self.input_widgets[inp] = self._next_input_widgets.get()
+        if self._next_input_widgets:
+            self.input_widgets[inp] = self._next_input_widgets.popleft()
         self.input_added.emit(index, inp)
 
     def _on_new_output_added(self, _, index, out):
@@ -206,21 +227,33 @@ class NodeGUI(QObject):
         return self.item.flow_view
 
     def main_widget(self):
-        """Returns the main_widget object, or None if the item doesn't exist (yet)"""
+        """Returns the main_widget object, or None if the item doesn't exist (yet).
+        Creates it if its creation was deferred, see Design.set_widget_creation_scale()."""
 
+        if self.item is None:
+            return None
+        self._create_deferred_widgets()
         return self.item.main_widget
 
     def attach_input_widgets(self, widget_names: List[str]):
         """Attaches the input widget to the next created input."""
 
         for w in widget_names:
-            self._next_input_widgets.queue(w)
+            self._next_input_widgets.append(w)
 
     def input_widget(self, index: int):
-        """Returns a reference to the widget of the corresponding input"""
+        """Returns a reference to the widget of the corresponding input, or None if the item doesn't exist (yet)"""
 
+        if self.item is None:
+            return None
+        self._create_deferred_widgets()
         return self.item.inputs[index].widget
 
+    def _create_deferred_widgets(self):
+        # widgets can only be created in the GUI thread
+        if self.item.widgets_deferred and QThread.currentThread() == self.thread():
+            self.item.create_widgets()
+
     def session_stylesheet(self):
         return self.session_gui.design.global_stylesheet
 
@@ -1,9 +1,9 @@
 import traceback
 from typing import Optional, Tuple
 
-from qtpy.QtWidgets import QGraphicsItem, QGraphicsObject, QMenu, QGraphicsDropShadowEffect
-from qtpy.QtCore import Qt, QRectF, QObject, QPointF
-from qtpy.QtGui import QColor
+from qtpy.QtWidgets import QGraphicsItem, QGraphicsObject, QMenu
+from qtpy.QtCore import Qt, QRectF, QObject, QPointF, QTimer
+from qtpy.QtGui import QColor, QPainter, QPixmap
 
 from .NodeErrorIndicator import NodeErrorIndicator
 from .NodeGUI import NodeGUI
@@ -11,6 +11,7 @@ from ...GUIBase import GUIBase
 from ryvencore.NodePort import NodeInput, NodeOutput
 from .NodeItemAction import NodeItemAction
 from .NodeItemAnimator import NodeItemAnimator
+from .NodeItemShadow import NodeItemShadow
 from .NodeItemWidget import NodeItemWidget
 from .PortItem import InputPortItem, OutputPortItem
 from ...utils import serialize, deserialize
@@ -21,6 +22,9 @@ class NodeItem(GUIBase, QGraphicsObject):  # QGraphicsItem, QObject):
     """The GUI representative for nodes. Unlike the Node class, this class is not subclassed individually and works
     the same for every node."""
 
+    # margin around the bounding rect of bodies drawn from the shared render cache, see _paint_cached()
+    RENDER_CACHE_MARGIN = 3
+
     def __init__(self, node, node_gui, flow_view, design):
         # QGraphicsItem.__init__(self)
         # QObject.__init__(self)
@@ -37,12 +41,16 @@ class NodeItem(GUIBase, QGraphicsObject):  # QGraphicsItem, QObject):
         self.painted_once = False
         self.inputs = []
         self.outputs = []
+        self.connection_items = {}  # {ConnectionItem: None}, used as ordered set, maintained by the flow view
         self.color = QColor(self.node_gui.color)  # manipulated by self.animator
 
         self.collapsed = False
         self.hovered = False
         self.hiding_unconnected_ports = False
         self.displaying_error = False
+        self.lod = 'full'  # level of detail, set by the flow view according to its scale
+        self._render_cache_key = None  # key of the shared render cache entry currently shown
+        self._update_shape_timer: QTimer = None  # see update_shape_later()
 
         self.personal_logs = []
 
@@ -70,12 +78,15 @@ class NodeItem(GUIBase, QGraphicsObject):  # QGraphicsItem, QObject):
         )
 
         self.setAcceptHoverEvents(True)
-        self.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
+        self.update_cache_mode()
 
         # UI
-        self.shadow_effect = None
+        self.shadow: NodeItemShadow = None  # see update_shadow()
         self.main_widget = None
-        if self.node_gui.main_widget_class is not None:
+        # main and input widgets might only be created once the item gets shown, see create_widgets()
+        self.widgets_deferred = self.session_design.widget_creation_scale > 0
+        self._main_widget_data = None  # serialized state of the deferred main widget
+        if self.node_gui.main_widget_class is not None and not self.widgets_deferred:
             self.main_widget = self.node_gui.main_widget_class((self.node, self, self.node_gui))
         self.widget = NodeItemWidget(self.node_gui, self)  # QGraphicsWidget(self)
         self.animator = NodeItemAnimator(self)  # needs self.title_label
@@ -99,13 +110,12 @@ class NodeItem(GUIBase, QGraphicsObject):  # QGraphicsItem, QObject):
         """All ports and the main widget get finally created here."""
 
         # LOADING DATA
-        if self.init_data is not None:
+        # the node might have been loaded without GUI data, e.g. if its flow was never opened before saving
+        if self.init_data is not None and 'main widget data' in self.init_data:
             if self.main_widget:
-                try:
-                    self.main_widget.set_state(deserialize(self.init_data['main widget data']))
-                except Exception as e:
-                    print('Exception while setting data in', self.node.title, 'Node\'s main widget:', e,
-                          ' (was this intended?)')
+                self._load_main_widget_state(self.init_data['main widget data'])
+            elif self.widgets_deferred:
+                self._main_widget_data = self.init_data['main widget data']
 
         # catch up on init ports
         for inp in self.node.inputs:
@@ -135,6 +145,65 @@ class NodeItem(GUIBase, QGraphicsObject):  # QGraphicsItem, QObject):
 
         self.update()  # ... not sure if I need that
 
+    def _load_main_widget_state(self, data):
+        try:
+            self.main_widget.set_state(deserialize(data))
+        except Exception as e:
+            print('Exception while setting data in', self.node.title, 'Node\'s main widget:', e,
+                  ' (was this intended?)')
+
+    def create_widgets(self):
+        """Creates the main widget and input widgets if their creation was deferred,
+        see Design.set_widget_creation_scale()"""
+
+        if not self.widgets_deferred:
+            return
+        self.widgets_deferred = False
+
+        if self.node_gui.main_widget_class is not None:
+            self.main_widget = self.node_gui.main_widget_class((self.node, self, self.node_gui))
+            if self._main_widget_data is not None:
+                self._load_main_widget_state(self._main_widget_data)
+                self._main_widget_data = None
+            self.widget.set_main_widget(self.main_widget)
+
+        for inp in self.inputs:
+            inp.create_deferred_widget()
+
+        if not self.initializing:
+            self.update_shape()
+
+    def release(self):
+        """Disconnects the item from its NodeGUI and the design, so it can be dropped for good while
+        the NodeGUI lives on (used by virtualized flow views)."""
+
+        self.animator.stop()
+        self._set_render_cache_key(None)
+        if self._update_shape_timer is not None:
+            self._update_shape_timer.stop()
+
+        self.node_gui.updating.disconnect(self.node_updating)
+        self.node_gui.update_shape_triggered.disconnect(self.update_shape)
+        self.node_gui.hide_unconnected_ports_triggered.disconnect(self.hide_unconnected_ports_triggered)
+        self.node_gui.show_unconnected_ports_triggered.disconnect(self.show_unconnected_ports_triggered)
+        self.node_gui.input_added.disconnect(self.on_node_input_added)
+        self.node_gui.output_added.disconnect(self.on_node_output_added)
+        self.node_gui.input_removed.disconnect(self.on_node_input_removed)
+        self.node_gui.output_removed.disconnect(self.on_node_output_removed)
+
+        self.session_design.flow_theme_changed.disconnect(self.update_design)
+        self.session_design.performance_mode_changed.disconnect(self.update_design)
+
+        if self.node_gui.item is self:
+            self.node_gui.item = None
+
+        self.unregister()
+
+    def unregister(self):
+        GUIBase.unregister(self)
+        for port_item in self.inputs + self.outputs:
+            port_item.unregister()
+
     # --------------------------------------------------------------------------------------
     # UI STUFF -------------------------#---------------
 
@@ -172,7 +241,7 @@ class NodeItem(GUIBase, QGraphicsObject):  # QGraphicsItem, QObject):
         self.setCursor(Qt.SizeAllCursor)
 
     def on_node_input_added(self, index, inp: NodeInput):
-        insert = index if index == len(self.node.inputs) - 1 else None
+        insert = index if index < len(self.node.inputs) - 1 else None
         self.add_new_input(inp, insert)
 
     def add_new_input(self, inp: NodeInput, insert: int = None):
@@ -186,7 +255,7 @@ class NodeItem(GUIBase, QGraphicsObject):  # QGraphicsItem, QObject):
             widget = None
 
         # create item
-        item = InputPortItem(self.node_gui, self, inp, input_widget=widget)
+        item = InputPortItem(self.node_gui, self, inp, input_widget=widget, defer_widget=self.widgets_deferred)
 
         if insert is not None:
             self.inputs.insert(insert, item)
@@ -196,7 +265,7 @@ class NodeItem(GUIBase, QGraphicsObject):  # QGraphicsItem, QObject):
             self.widget.add_input_to_layout(item)
 
         if not self.initializing:
-            self.update_shape()
+            self.update_shape_later()
             self.update()
 
     def on_node_input_removed(self, index, inp: NodeInput):
@@ -212,22 +281,21 @@ class NodeItem(GUIBase, QGraphicsObject):  # QGraphicsItem, QObject):
         # index = self.node.inputs.index(inp)
         # item = self.inputs[index]
 
-        # for some reason, I have to remove all widget items manually from the scene too. setting the items to
-        # ownedByLayout(True) does not work, I don't know why.
-        self.scene().removeItem(item.pin)
-        self.scene().removeItem(item.label)
-        if item.proxy is not None:
-            self.scene().removeItem(item.proxy)
-
         self.inputs.remove(item)
         self.widget.remove_input_from_layout(item)
 
+        # the port item's layout made it the parent of the pin, label and widget, which therefore
+        # get removed and deleted along with it
+        self.scene().removeItem(item)
+        item.unregister()
+        item.deleteLater()
+
         if not self.initializing:
-            self.update_shape()
+            self.update_shape_later()
             self.update()
 
     def on_node_output_added(self, index, out: NodeOutput):
-        insert = index if index == len(self.node.outputs) - 1 else None
+        insert = index if index < len(self.node.outputs) - 1 else None
         self.add_new_output(out, insert)
 
     def add_new_output(self, out: NodeOutput, insert: int = None):
@@ -244,7 +312,7 @@ class NodeItem(GUIBase, QGraphicsObject):  # QGraphicsItem, QObject):
             self.widget.add_output_to_layout(item)
 
         if not self.initializing:
-            self.update_shape()
+            self.update_shape_later()
             self.update()
 
     def on_node_output_removed(self, index, out: NodeOutput):
@@ -260,40 +328,87 @@ class NodeItem(GUIBase, QGraphicsObject):  # QGraphicsItem, QObject):
         # index = self.node.outputs.index(out)
         # item = self.outputs[index]
 
-        # see remove_input() for info!
-        self.scene().removeItem(item.pin)
-        self.scene().removeItem(item.label)
-
         self.outputs.remove(item)
         self.widget.remove_output_from_layout(item)
 
+        # see remove_input()
+        self.scene().removeItem(item)
+        item.unregister()
+        item.deleteLater()
+
         if not self.initializing:
-            self.update_shape()
+            self.update_shape_later()
             self.update()
 
     def update_shape(self):
-        self.widget.update_shape()
-        self.update_conn_pos()
+        if self._update_shape_timer is not None:
+            self._update_shape_timer.stop()
+
+        with self.flow_view.bulk_move():  # the pins move too
+            self.widget.update_shape()
+            if self.shadow is not None:
+                self.shadow.update_geometry()
+            self.update_conn_pos()
         self.flow_view.viewport().update()
+        self.flow_view.node_item_geometry_changed(self)
+
+    def update_shape_later(self):
+        """Schedules update_shape() for the next event loop iteration, so adding or removing many ports
+        at once only updates the layout once"""
+
+        if self._update_shape_timer is None:
+            self._update_shape_timer = QTimer(self)
+            self._update_shape_timer.setSingleShot(True)
+            self._update_shape_timer.setInterval(0)
+            self._update_shape_timer.timeout.connect(self.update_shape)
+        if not self._update_shape_timer.isActive():
+            self._update_shape_timer.start()
 
     def update_design(self):
-        """Loads the shadow effect option and causes redraw with active theme."""
-
-        if self.session_design.node_item_shadows_enabled:
-            self.shadow_effect = QGraphicsDropShadowEffect()
-            self.shadow_effect.setXOffset(12)
-            self.shadow_effect.setYOffset(12)
-            self.shadow_effect.setBlurRadius(20)
-            self.shadow_effect.setColor(self.session_design.flow_theme.node_item_shadow_color)
-            self.setGraphicsEffect(self.shadow_effect)
-        else:
-            self.setGraphicsEffect(None)
+        """Loads the shadow option and causes redraw with active theme."""
+
+        self.update_cache_mode()
 
+        self.widget.update_design()
         self.widget.update_shape()
+        self.update_shadow()
         self.animator.reload_values()
 
         QGraphicsItem.update(self)
 
+    def update_shadow(self):
+        # shadows are not drawn at lower levels of detail
+        if self.session_design.node_item_shadows_enabled and self.lod == 'full':
+            if self.shadow is None:
+                self.shadow = NodeItemShadow(self)
+            self.shadow.update_geometry()
+            self.shadow.show()
+            self.shadow.update()
+        elif self.shadow is not None:
+            self.shadow.hide()
+
+    def update_cache_mode(self):
+        """The item's own device coordinate cache is only used if the session's shared render cache is
+        disabled"""
+
+        if self.session_design.node_render_cache.enabled():
+            self.setCacheMode(QGraphicsItem.NoCache)
+        else:
+            self._set_render_cache_key(None)
+            self.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
+
+    def set_lod(self, lod: str):
+        """Sets the level of detail ('full', 'simplified' or 'flat'). In 'flat' mode, all ports, labels and
+        widgets are hidden."""
+
+        if lod == self.lod:
+            return
+
+        self.lod = lod
+        self.widget.setVisible(lod != 'flat')
+        self.update_shadow()
+        self.update()
+
     def boundingRect(self):
         # remember: (0, 0) shall be the NI's center!
         rect = QRectF()
@@ -357,24 +472,28 @@ class NodeItem(GUIBase, QGraphicsObject):  # QGraphicsItem, QObject):
             # self.update_design()
 
             self.update_shape()
-            self.update_conn_pos()
             self.error_indicator.setPos(self.boundingRect().bottomRight())
 
-        self.session_design.flow_theme.paint_NI(
-            node_gui=self.node_gui,
-            selected=self.isSelected(),
-            hovered=self.hovered,
-            node_style=self.node_gui.style,
-            painter=painter,
-            option=option,
-            color=self.color,
-            w=self.boundingRect().width(),
-            h=self.boundingRect().height(),
-            bounding_rect=self.boundingRect(),
-            title_rect=self.widget.header_widget.boundingRect()
-            if self.widget.header_widget
-            else self.widget.title_label.boundingRect()
-        )
+        if self.widgets_deferred and \
+                option.levelOfDetailFromTransform(painter.worldTransform()) >= \
+                self.session_design.widget_creation_scale:
+            # not right here while painting, the layout changes
+            self.flow_view.request_widgets(self)
+
+        if self.lod != 'full':
+            self.session_design.flow_theme.paint_NI_lod(
+                node_gui=self.node_gui,
+                selected=self.isSelected(),
+                painter=painter,
+                color=self.color,
+                bounding_rect=self.boundingRect(),
+                lod=self.lod,
+            )
+            self.painted_once = True
+            return
+
+        if not self._paint_cached(painter, option):
+            self._paint_body(painter, option)
 
         # useful for widget development:
 
@@ -400,6 +519,91 @@ class NodeItem(GUIBase, QGraphicsObject):  # QGraphicsItem, QObject):
 
         self.painted_once = True
 
+    def _paint_body(self, painter, option):
+        self.session_design.flow_theme.paint_NI(
+            node_gui=self.node_gui,
+            selected=self.isSelected(),
+            hovered=self.hovered,
+            node_style=self.node_gui.style,
+            painter=painter,
+            option=option,
+            color=self.color,
+            w=self.boundingRect().width(),
+            h=self.boundingRect().height(),
+            bounding_rect=self.boundingRect(),
+            title_rect=self.widget.header_widget.boundingRect()
+            if self.widget.header_widget
+            else self.widget.title_label.boundingRect()
+        )
+
+    def _paint_cached(self, painter, option) -> bool:
+        """Draws the body from the session's shared render cache, rendering it first if necessary.
+        Returns False if the body has to be painted directly."""
+
+        cache = self.session_design.node_render_cache
+        transform = painter.worldTransform()
+        if not cache.enabled() or self.animator.running() or transform.isRotating():
+            self._set_render_cache_key(None)
+            return False
+
+        # outlines may extend beyond the bounding rect
+        m = self.RENDER_CACHE_MARGIN
+        rect = self.boundingRect().adjusted(-m, -m, m, m)
+        title_rect = self.widget.header_widget.boundingRect() \
+            if self.widget.header_widget else self.widget.title_label.boundingRect()
+        sx, sy = abs(transform.m11()), abs(transform.m22())
+        device = painter.device()
+        dpr = device.devicePixelRatioF() if device is not None else 1
+        pixel_w = int(rect.width() * sx * dpr + 1)
+        pixel_h = int(rect.height() * sy * dpr + 1)
+        if not cache.fits(pixel_w, pixel_h):
+            self._set_render_cache_key(None)
+            return False
+
+        key = (
+            type(self.node),
+            self.session_design.flow_theme.name,
+            self.node_gui.style,
+            rect.width(), rect.height(),
+            title_rect.width(), title_rect.height(),
+            self.isSelected(),
+            self.hovered,
+            self.color.rgba(),
+            round(sx, 4), round(sy, 4),
+            dpr,
+        )
+        self._set_render_cache_key(key)
+
+        pixmap = cache.get(key)
+        if pixmap is None:
+            pixmap = QPixmap(pixel_w, pixel_h)
+            pixmap.setDevicePixelRatio(dpr)
+            pixmap.fill(Qt.transparent)
+            p = QPainter(pixmap)
+            p.scale(sx, sy)
+            p.translate(-rect.left(), -rect.top())
+            self._paint_body(p, option)
+            p.end()
+            cache.insert(key, pixmap)
+
+        # draw in device coordinates, aligned to full pixels like Qt's own device coordinate cache
+        top_left = transform.map(rect.topLeft())
+        painter.save()
+        painter.resetTransform()
+        painter.drawPixmap(QPointF(round(top_left.x()), round(top_left.y())), pixmap)
+        painter.restore()
+        return True
+
+    def _set_render_cache_key(self, key):
+        if key == self._render_cache_key:
+            return
+        cache = self.session_design.node_render_cache
+        if self._render_cache_key is not None:
+            cache.release(self._render_cache_key)
+        if key is not None:
+            cache.acquire(key)
+        self._render_cache_key = key
+
     # MOUSE INTERACTION
 
     def get_context_menu(self):
@@ -423,39 +627,28 @@ class NodeItem(GUIBase, QGraphicsObject):  # QGraphicsItem, QObject):
                 self.flow_view.viewport().update()
             if self.movement_state == MovementEnum.mouse_clicked:
                 self.movement_state = MovementEnum.position_changed
+                self.flow_view.items_move_started(len(self.scene().selectedItems()))
 
+        elif change == QGraphicsItem.ItemPositionHasChanged:
             self.update_conn_pos()
 
+        elif change == QGraphicsItem.ItemScenePositionHasChanged:
+            # also sent when moved as part of an item group
+            self.flow_view.node_item_geometry_changed(self)
+
+        elif change == QGraphicsItem.ItemSelectedHasChanged:
+            self.flow_view.node_item_selection_changed(self, bool(value))
+
         return QGraphicsItem.itemChange(self, change, value)
 
     def update_conn_pos(self):
         """Updates the scene positions of connections"""
-
-        for o in self.node.outputs:
-            for i in self.node.flow.connected_inputs(o):
-                # c.item.recompute()
-
-                if (o, i) not in self.flow_view.connection_items:
-                    # it can happen that the connection item hasn't been
-                    # created yet
-                    continue
-
-                item = self.flow_view.connection_items[(o,i)]
-                item.recompute()
-        for i in self.node.inputs:
-            o = self.node.flow.connected_output(i)
-            # c.item.recompute()
-
-            if (o, i) not in self.flow_view.connection_items:
-                # it can happen that the connection item hasn't been
-                # created yet
-                continue
-
-            item = self.flow_view.connection_items[(o,i)]
-            item.recompute()
+        self.flow_view.connection_items_moved(self.connection_items)
 
     def hoverEnterEvent(self, event):
         self.hovered = True
+        if self.widgets_deferred:
+            self.flow_view.request_widgets(self)
         self.widget.title_label.set_NI_hover_state(hovering=True)
         QGraphicsItem.hoverEnterEvent(self, event)
 
@@ -481,6 +674,7 @@ class NodeItem(GUIBase, QGraphicsObject):  # QGraphicsItem, QObject):
 
         if self.movement_state == MovementEnum.position_changed:
             self.flow_view.selected_components_moved(self.pos() - self.movement_pos_from)
+            self.flow_view.items_move_finished()
         self.movement_state = None
         return QGraphicsItem.mouseReleaseEvent(self, event)
 
@@ -518,6 +712,8 @@ class NodeItem(GUIBase, QGraphicsObject):  # QGraphicsItem, QObject):
         data['pos y'] = self.pos().y()
         if self.main_widget:
             data['main widget data'] = serialize(self.main_widget.get_state())
+        elif self._main_widget_data is not None:
+            data['main widget data'] = self._main_widget_data
 
         data['unconnected ports hidden'] = self.hiding_unconnected_ports
         data['collapsed'] = self.collapsed
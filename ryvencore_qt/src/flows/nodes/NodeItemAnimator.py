@@ -1,34 +1,38 @@
-from qtpy.QtCore import QObject, QPropertyAnimation, Property
 from qtpy.QtGui import QColor
 from qtpy.QtWidgets import QGraphicsItem
 
 
-class NodeItemAnimator(QObject):
+class NodeItemAnimator:
+    """Animates the title and body colors of a node item when the node updates. The animation is advanced
+    by the flow view's FlowViewClock, together with all other animations in the view."""
+
+    DURATION = 700  # ms
 
     def __init__(self, node_item):
-        super(NodeItemAnimator, self).__init__()
 
         self.node_item = node_item
         self.animation_running = False
+        self._start_time = 0
+
+        # key frames [(progress, color)], set in reload_values()
+        self._title_keys = []
+        self._body_keys = []
 
-        self.title_activation_animation = QPropertyAnimation(self, b"p_title_color")
-        self.title_activation_animation.setDuration(700)
-        self.title_activation_animation.finished.connect(self.finished)
-        self.body_activation_animation = QPropertyAnimation(self, b"p_body_color")
-        self.body_activation_animation.setDuration(700)
+    def clock(self):
+        return self.node_item.flow_view.clock
 
     def start(self):
         self.animation_running = True
-        self.title_activation_animation.start()
-        self.body_activation_animation.start()
+        self._start_time = self.clock().now()
+        self.clock().add(self.advance)
 
     def stop(self):
-        # reset color values. it would just freeze without
-        self.title_activation_animation.setCurrentTime(self.title_activation_animation.duration())
-        self.body_activation_animation.setCurrentTime(self.body_activation_animation.duration())
+        if self.animation_running:
+            # reset color values. it would just freeze without
+            self._apply(1)
 
-        self.title_activation_animation.stop()
-        self.body_activation_animation.stop()
+        self.clock().remove(self.advance)
+        self.animation_running = False
 
     def finished(self):
         self.animation_running = False
@@ -36,24 +40,47 @@ class NodeItemAnimator(QObject):
     def running(self):
         return self.animation_running
 
+    def advance(self, now: float) -> bool:
+        """Called by the clock every frame"""
+
+        progress = min(1, (now - self._start_time) / self.DURATION)
+        self._apply(progress)
+
+        if progress >= 1:
+            self.finished()
+            return False
+        return True
+
+    def _apply(self, progress: float):
+        if self._body_keys:
+            self.set_body_color(interpolate(self._body_keys, progress))
+        if self._title_keys:
+            self.set_title_color(interpolate(self._title_keys, progress))
+
     def reload_values(self):
         self.stop()
 
         # self.node_item.title_label.update_design()
-        self.title_activation_animation.setKeyValueAt(0, self.get_title_color())
-        self.title_activation_animation.setKeyValueAt(0.3, self.get_body_color().lighter().lighter())
-        self.title_activation_animation.setKeyValueAt(1, self.get_title_color())
+        self._title_keys = [
+            (0, self.get_title_color()),
+            (0.3, self.get_body_color().lighter().lighter()),
+            (1, self.get_title_color()),
+        ]
+
+        self._body_keys = [
+            (0, self.get_body_color()),
+            (0.3, self.get_body_color().lighter()),
+            (1, self.get_body_color()),
+        ]
 
-        self.body_activation_animation.setKeyValueAt(0, self.get_body_color())
-        self.body_activation_animation.setKeyValueAt(0.3, self.get_body_color().lighter())
-        self.body_activation_animation.setKeyValueAt(1, self.get_body_color())
+    def progress(self) -> float:
+        return min(1, (self.clock().now() - self._start_time) / self.DURATION)
 
     def fading_out(self):
-        return self.title_activation_animation.currentTime()/self.title_activation_animation.duration() >= 0.3
+        return self.progress() >= 0.3
 
     def set_animation_max(self):
-        self.title_activation_animation.setCurrentTime(0.3*self.title_activation_animation.duration())
-        self.body_activation_animation.setCurrentTime(0.3*self.body_activation_animation.duration())
+        self._start_time = self.clock().now() - 0.3 * self.DURATION
 
     def get_body_color(self):
         return self.node_item.color
@@ -62,9 +89,6 @@ class NodeItemAnimator(QObject):
         self.node_item.color = val
         QGraphicsItem.update(self.node_item)
 
-    p_body_color = Property(QColor, get_body_color, set_body_color)
-
-
     def get_title_color(self):
         return self.node_item.widget.title_label.color
 
@@ -72,4 +96,17 @@ class NodeItemAnimator(QObject):
         self.node_item.widget.title_label.color = val
         # QGraphicsItem.update(self.node_item)
 
-    p_title_color = Property(QColor, get_title_color, set_title_color)
\ No newline at end of file
+
+def interpolate(keys: list, progress: float) -> QColor:
+    """Linearly interpolates the colors of key frames [(progress, color)] at progress"""
+
+    for (p0, c0), (p1, c1) in zip(keys, keys[1:]):
+        if progress <= p1:
+            t = (progress - p0) / (p1 - p0)
+            return QColor.fromRgbF(
+                c0.redF() + (c1.redF() - c0.redF()) * t,
+                c0.greenF() + (c1.greenF() - c0.greenF()) * t,
+                c0.blueF() + (c1.blueF() - c0.blueF()) * t,
+                c0.alphaF() + (c1.alphaF() - c0.alphaF()) * t,
+            )
+    return QColor(keys[-1][1])
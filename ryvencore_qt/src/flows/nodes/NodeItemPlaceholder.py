@@ -0,0 +1,89 @@
+from qtpy.QtWidgets import QGraphicsItem
+from qtpy.QtCore import Qt, QRectF, QSizeF
+from qtpy.QtGui import QColor
+
+from ...GUIBase import GUIBase
+from ...utils import merge_node_frontend_data
+
+
+class NodeItemPlaceholder(GUIBase, QGraphicsItem):
+    """Lightweight stand-in for the NodeItem of a node in a virtualized flow view. It only draws a plain
+    rect in the node's color and keeps the node's frontend data (as generated by NodeItem.complete_data()),
+    from which the flow view builds the actual NodeItem once the node gets close to the visible area.
+    It can be selected and moved like a node item, so selections span all nodes of the flow."""
+
+    DEFAULT_SIZE = QSizeF(120, 60)
+
+    def __init__(self, node, flow_view, data: dict = None, size: QSizeF = None):
+        GUIBase.__init__(self, representing_component=node)
+        QGraphicsItem.__init__(self)
+
+        self.node = node
+        self.node_gui = node.gui
+        self.flow_view = flow_view
+        self.data = data
+        self.color = QColor(self.node_gui.color)
+        self.movement_pos_from = None
+
+        self.setFlags(
+            QGraphicsItem.ItemIsSelectable |
+            QGraphicsItem.ItemIsMovable |
+            QGraphicsItem.ItemSendsScenePositionChanges
+        )
+
+        size = size if size is not None else self.DEFAULT_SIZE
+        # remember: (0, 0) shall be the center, like for NodeItem
+        self._bounding_rect = QRectF(-size.width() / 2, -size.height() / 2, size.width(), size.height())
+
+        if data is not None and 'pos x' in data:
+            self.setPos(data['pos x'], data['pos y'])
+
+    def boundingRect(self):
+        return self._bounding_rect
+
+    def paint(self, painter, option, widget=None):
+        self.flow_view.session_gui.design.flow_theme.paint_NI_lod(
+            node_gui=self.node_gui,
+            selected=self.isSelected(),
+            painter=painter,
+            color=self.color,
+            bounding_rect=self._bounding_rect,
+            lod='flat' if self.flow_view.lod() == 'flat' else 'simplified',
+        )
+
+    def itemChange(self, change, value):
+        if change == QGraphicsItem.ItemScenePositionHasChanged:
+            self.flow_view.node_item_geometry_changed(self)
+
+        elif change == QGraphicsItem.ItemSelectedHasChanged:
+            self.flow_view.node_item_selection_changed(self, bool(value))
+
+        return QGraphicsItem.itemChange(self, change, value)
+
+    def mousePressEvent(self, event):
+        self.flow_view.mouse_event_taken = True
+
+        if event.button() == Qt.LeftButton:
+            self.movement_pos_from = self.pos()
+        return QGraphicsItem.mousePressEvent(self, event)
+
+    def mouseReleaseEvent(self, event):
+        self.flow_view.mouse_event_taken = True
+
+        if self.movement_pos_from is not None and self.pos() != self.movement_pos_from:
+            self.flow_view.selected_components_moved(self.pos() - self.movement_pos_from)
+        self.movement_pos_from = None
+        return QGraphicsItem.mouseReleaseEvent(self, event)
+
+    def complete_data(self, data: dict) -> dict:
+        """completes the node's data by the stored frontend info"""
+
+        if self.data is not None:
+            data = merge_node_frontend_data(data, self.data)
+
+        data['pos x'] = self.pos().x()
+        data['pos y'] = self.pos().y()
+
+        data = {**data, **self.node_gui.data()}
+
+        return data
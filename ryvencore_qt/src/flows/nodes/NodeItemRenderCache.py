@@ -0,0 +1,88 @@
+from collections import OrderedDict
+
+from qtpy.QtGui import QPixmap
+
+
+class NodeItemRenderCache:
+    """
+    Session wide cache of rendered node item bodies, see Design.set_node_render_cache_size().
+
+    Node items of the same node class look identical as long as theme, style, size, selection and hover
+    state, color and device scale are the same, so instead of every item keeping its own device coordinate
+    cache, they share one pixmap per appearance. Entries are reference counted by the node items currently
+    showing them. When the memory budget is exceeded, the least recently used entries get evicted,
+    unreferenced ones first.
+    """
+
+    # bodies larger than this (in device pixels) are painted directly
+    MAX_PIXMAP_SIZE = 2048
+
+    def __init__(self, budget: int = 0):
+        self.budget = budget  # bytes, 0 disables the cache
+        self.size = 0  # bytes
+        self._pixmaps = OrderedDict()  # {key: QPixmap}, least recently used first
+        self._refs = {}  # {key: number of node items showing it}
+
+    def enabled(self) -> bool:
+        return self.budget > 0
+
+    def set_budget(self, budget: int):
+        self.budget = budget
+        if budget <= 0:
+            self.clear()
+        else:
+            self._evict()
+
+    def get(self, key) -> QPixmap:
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+        return pixmap
+
+    def insert(self, key, pixmap: QPixmap):
+        if key in self._pixmaps:
+            self._remove(key)
+        self._pixmaps[key] = pixmap
+        self.size += self._pixmap_size(pixmap)
+        self._evict()
+
+    def fits(self, width: int, height: int) -> bool:
+        """Whether a body of the given size in device pixels should be cached"""
+        return max(width, height) <= self.MAX_PIXMAP_SIZE and width * height * 4 <= self.budget
+
+    def acquire(self, key):
+        self._refs[key] = self._refs.get(key, 0) + 1
+
+    def release(self, key):
+        refs = self._refs.get(key, 0) - 1
+        if refs > 0:
+            self._refs[key] = refs
+        else:
+            self._refs.pop(key, None)
+
+    def clear(self):
+        """Drops all pixmaps, e.g. when the flow theme changed; references are kept"""
+        self._pixmaps.clear()
+        self.size = 0
+
+    def __len__(self):
+        return len(self._pixmaps)
+
+    def _remove(self, key):
+        self.size -= self._pixmap_size(self._pixmaps.pop(key))
+
+    def _evict(self):
+        if self.size <= self.budget:
+            return
+
+        # unreferenced entries first, then the ones still shown by some item, which will re-render them
+        for referenced in (False, True):
+            for key in list(self._pixmaps):
+                if self.size <= self.budget:
+                    return
+                if (key in self._refs) == referenced:
+                    self._remove(key)
+
+    @staticmethod
+    def _pixmap_size(pixmap: QPixmap) -> int:
+        return pixmap.width() * pixmap.height() * pixmap.depth() // 8
@@ -0,0 +1,122 @@
+from qtpy.QtCore import Qt, QRectF, QPointF
+from qtpy.QtGui import QColor, QImage, QPainter, QPainterPath, QPixmap
+from qtpy.QtWidgets import QGraphicsItem, QGraphicsBlurEffect, QGraphicsPathItem, QGraphicsScene
+
+
+class NodeItemShadow(QGraphicsItem):
+    """
+    Drop shadow of a node item, drawn behind it from a pre-rendered nine-patch texture.
+
+    The texture is a blurred rounded rect, rendered once per corner radius and shadow color, whose
+    corners are drawn as they are and whose edges and center are stretched to the size of the node.
+    Unlike a QGraphicsDropShadowEffect, which blurs the whole item on every repaint and prevents item
+    caching, this costs a few pixmap blits per node.
+    """
+
+    OFFSET = QPointF(12, 12)
+    BLUR_RADIUS = 20
+
+    # textures are rendered at this scale, so zooming in a bit doesn't make them look pixelated
+    TEXTURE_SCALE = 2
+
+    _textures = {}  # {(corner radius, color rgba): (QPixmap, patch size)}
+
+    def __init__(self, node_item):
+        super().__init__(node_item)
+
+        self.node_item = node_item
+        self._rect = QRectF()
+
+        self.setFlag(QGraphicsItem.ItemStacksBehindParent)
+        self.setAcceptedMouseButtons(Qt.NoButton)
+
+    def update_geometry(self):
+        """Adapts to the node item's current bounding rect"""
+
+        m = self.BLUR_RADIUS
+        rect = self.node_item.boundingRect().translated(self.OFFSET).adjusted(-m, -m, m, m)
+        if rect != self._rect:
+            self.prepareGeometryChange()
+            self._rect = rect
+
+    def boundingRect(self):
+        return self._rect
+
+    def shape(self):
+        # never hit by mouse events or selections
+        return QPainterPath()
+
+    def paint(self, painter, option, widget=None):
+        theme = self.node_item.session_design.flow_theme
+        radius = theme.node_item_shadow_corner_radii.get(self.node_item.node_gui.style, 0)
+        pixmap, patch = self.texture(radius, theme.node_item_shadow_color)
+
+        # the patches may have to shrink for tiny nodes
+        rect = self._rect
+        cw = min(patch, rect.width() / 2)
+        ch = min(patch, rect.height() / 2)
+        s = self.TEXTURE_SCALE
+        src_w = pixmap.width() / pixmap.devicePixelRatio()
+        src_h = pixmap.height() / pixmap.devicePixelRatio()
+
+        # columns and rows of (target offset, target size, source offset, source size)
+        cols = (
+            (rect.left(), cw, 0, cw * s),
+            (rect.left() + cw, rect.width() - 2 * cw, patch * s, src_w - 2 * patch * s),
+            (rect.right() - cw, cw, src_w - cw * s, cw * s),
+        )
+        rows = (
+            (rect.top(), ch, 0, ch * s),
+            (rect.top() + ch, rect.height() - 2 * ch, patch * s, src_h - 2 * patch * s),
+            (rect.bottom() - ch, ch, src_h - ch * s, ch * s),
+        )
+
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        for x, w, sx, sw in cols:
+            if w <= 0:
+                continue
+            for y, h, sy, sh in rows:
+                if h <= 0:
+                    continue
+                painter.drawPixmap(QRectF(x, y, w, h), pixmap, QRectF(sx, sy, sw, sh))
+
+    @classmethod
+    def texture(cls, radius: float, color: QColor):
+        """Returns the nine-patch texture and the size of its corner patches in scene coordinates"""
+
+        key = (radius, color.rgba())
+        texture = cls._textures.get(key)
+        if texture is None:
+            texture = cls._textures[key] = cls._render_texture(radius, color)
+        return texture
+
+    @classmethod
+    def _render_texture(cls, radius: float, color: QColor):
+        # the corner patches must contain the rounded corner and the blur on both of its sides,
+        # so the blur of the stretched parts doesn't depend on the node's size
+        m = cls.BLUR_RADIUS
+        patch = int(radius + 2 * m + 1)
+        size = 2 * patch + 1
+        s = cls.TEXTURE_SCALE
+
+        path = QPainterPath()
+        path.addRoundedRect(QRectF(m, m, size - 2 * m, size - 2 * m), radius, radius)
+
+        # render the blurred shape with Qt's own blur, which is what QGraphicsDropShadowEffect uses
+        scene = QGraphicsScene()
+        item = QGraphicsPathItem(path)
+        item.setPen(Qt.NoPen)
+        item.setBrush(color)
+        blur = QGraphicsBlurEffect()
+        blur.setBlurRadius(m)  # scaled along with the item
+        item.setGraphicsEffect(blur)
+        item.setScale(s)
+        scene.addItem(item)
+
+        image = QImage(size * s, size * s, QImage.Format_ARGB32_Premultiplied)
+        image.fill(Qt.transparent)
+        painter = QPainter(image)
+        scene.render(painter, QRectF(image.rect()), QRectF(0, 0, size * s, size * s))
+        painter.end()
+
+        return QPixmap.fromImage(image), patch
@@ -7,6 +7,7 @@ from ..FlowViewProxyWidget import FlowViewProxyWidget
 from .NodeItem_Icon import NodeItem_Icon
 from .NodeItem_TitleLabel import TitleLabel
 from .PortItem import InputPortItem, OutputPortItem
+from .WidgetPlaceholder import WidgetPlaceholder
 
 
 class NodeItemWidget(QGraphicsWidget):
@@ -26,17 +27,23 @@ class NodeItemWidget(QGraphicsWidget):
         self.icon = NodeItem_Icon(node_gui, node_item) if node_gui.icon else None
         self.collapse_button = NodeItem_CollapseButton(node_gui, node_item) if node_gui.style == 'normal' else None
         self.title_label = TitleLabel(node_gui, node_item)
-        self.main_widget_proxy: FlowViewProxyWidget = None
+        self.main_widget_proxy: FlowViewProxyWidget = None  # or a WidgetPlaceholder, see set_main_widget()
         if self.node_item.main_widget:
             self.main_widget_proxy = FlowViewProxyWidget(self.flow_view)
             self.main_widget_proxy.setWidget(self.node_item.main_widget)
+            WidgetPlaceholder.widget_created(self.node_gui.main_widget_class, QSizeF(self.node_item.main_widget.size()))
+        elif self.node_gui.main_widget_class is not None:
+            self.main_widget_proxy = WidgetPlaceholder(self.node_gui.main_widget_class)
         self.header_layout: QGraphicsWidget = None
         self.header_widget: QGraphicsWidget = None
         self.body_layout: QGraphicsLinearLayout = None
         self.body_widget: QGraphicsWidget = None
         self.inputs_layout: QGraphicsLinearLayout = None
         self.outputs_layout: QGraphicsLinearLayout = None
+        self._body_outdated = False  # ports were inserted or removed, see rebuild_body()
         self.setLayout(self.setup_layout())
+        if self.main_widget_proxy:
+            self.add_main_widget_to_layout()
 
     def setup_layout(self) -> QGraphicsLinearLayout:
 
@@ -72,6 +79,18 @@ class NodeItemWidget(QGraphicsWidget):
         else:
             self.setZValue(self.title_label.zValue() + 1)
 
+        #   body
+        self.body_widget = QGraphicsWidget()
+        # self.body_widget.setContentsMargins(0, 0, 0, 0)
+        self.body_widget.setLayout(self.setup_body_layout())
+
+        # layout.addItem(self.body_layout)
+        layout.addItem(self.body_widget)
+
+        return layout
+
+    def setup_body_layout(self) -> QGraphicsLinearLayout:
+
         #   inputs
         self.inputs_layout = QGraphicsLinearLayout(Qt.Vertical)
         self.inputs_layout.setSpacing(2)
@@ -81,8 +100,6 @@ class NodeItemWidget(QGraphicsWidget):
         self.outputs_layout.setSpacing(2)
 
         #   body
-        self.body_widget = QGraphicsWidget()
-        # self.body_widget.setContentsMargins(0, 0, 0, 0)
         self.body_layout = QGraphicsLinearLayout(Qt.Horizontal)
         self.body_layout.setContentsMargins(
             self.body_padding,
@@ -98,52 +115,99 @@ class NodeItemWidget(QGraphicsWidget):
         self.body_layout.addItem(self.outputs_layout)
         self.body_layout.setAlignment(self.outputs_layout, Qt.AlignVCenter | Qt.AlignRight)
 
-        self.body_widget.setLayout(self.body_layout)
-
-        # layout.addItem(self.body_layout)
-        layout.addItem(self.body_widget)
-
-        return layout
+        return self.body_layout
 
     def rebuild_ui(self):
-        """Due to some really strange and annoying behaviour of these QGraphicsWidgets, they don't want to shrink
-        automatically when content is removed, they just stay large, even with a Minimum SizePolicy. I didn't find a
-        way around that yet, so for now I have to recreate the whole layout and make sure the widget uses the smallest
-        size possible."""
+        """Recreates the whole layout. Due to some really strange and annoying behaviour of these QGraphicsWidgets,
+        layouts don't shrink automatically when content is removed, and the stretches between the ports can't be
+        removed, so this is still needed for collapsing and expanding, see update_shape() for the usual updates."""
 
         # if I don't manually remove the ports from the layouts,
         # they get deleted when setting the widget's layout to None below
-        for i, inp in enumerate(self.node_item.inputs):
-            self.inputs_layout.removeAt(0)
-            # inp.rebuild_ui()
-        for i, out in enumerate(self.node_item.outputs):
-            self.outputs_layout.removeAt(0)
-            # out.rebuild_ui()
+        self._take_body_content()
 
         self.setLayout(None)
         self.resize(self.minimumSize())
         self.setLayout(self.setup_layout())
 
+        self._body_outdated = False
         if self.node_item.collapsed:
             return
 
+        self._add_body_content()
+
+        if self.main_widget_proxy and self.node_gui.main_widget_pos == 'below ports':
+            self.add_main_widget_to_layout()
+
+    def rebuild_body(self):
+        """Recreates only the layout of the ports (and a main widget between them), after ports have been
+        inserted or removed"""
+
+        self._take_body_content()
+        self.body_widget.setLayout(self.setup_body_layout())
+        self._body_outdated = False
+
+        if not self.node_item.collapsed:
+            self._add_body_content()
+
+    def _take_body_content(self):
+        for inp in self.node_item.inputs:
+            self.inputs_layout.removeItem(inp)
+        for out in self.node_item.outputs:
+            self.outputs_layout.removeItem(out)
+        if self.main_widget_proxy and self.node_gui.main_widget_pos == 'between ports':
+            self.body_layout.removeItem(self.main_widget_proxy)
+
+    def _add_body_content(self):
         for inp_item in self.node_item.inputs:
             self.add_input_to_layout(inp_item)
         for out_item in self.node_item.outputs:
             self.add_output_to_layout(out_item)
 
-        if self.node_item.main_widget:
+        if self.main_widget_proxy and self.node_gui.main_widget_pos == 'between ports':
             self.add_main_widget_to_layout()
 
+    def set_main_widget(self, main_widget):
+        """Replaces the placeholder by the main widget once it got created, see NodeItem.create_widgets()"""
+
+        placeholder = self.main_widget_proxy
+        between_ports = self.node_gui.main_widget_pos == 'between ports'
+        if self.node_item.collapsed:
+            pass  # not in the layout
+        elif between_ports:
+            self._take_body_content()
+        else:
+            self.layout().removeItem(placeholder)
+        if placeholder.scene() is not None:
+            placeholder.scene().removeItem(placeholder)
+
+        self.main_widget_proxy = FlowViewProxyWidget(self.flow_view)
+        self.main_widget_proxy.setWidget(main_widget)
+        WidgetPlaceholder.widget_created(self.node_gui.main_widget_class, QSizeF(main_widget.size()))
+
+        if self.node_item.collapsed:
+            self.main_widget_proxy.hide()
+        if between_ports:
+            # like rebuild_body(), the stretch that came with the placeholder can't be removed
+            self.body_widget.setLayout(self.setup_body_layout())
+            self._body_outdated = False
+            if not self.node_item.collapsed:
+                self._add_body_content()
+        elif not self.node_item.collapsed:
+            self.add_main_widget_to_layout()
+
+    def update_design(self):
+        header_padding = self.node_item.session_design.flow_theme.header_padding
+        if header_padding != self.header_padding:
+            self.header_padding = header_padding
+            if self.header_layout is not None:
+                self.header_layout.setContentsMargins(*header_padding)
+
     def update_shape(self):
+        """Updates the layout in place, applying insertions and removals of ports since the last call"""
 
         self.title_label.update_shape()
 
-        # makes extended node items shrink according to resizing input widgets
-        if not self.node_item.initializing:
-            self.rebuild_ui()
-        # strangely, this only works for small node items without this, not for normal ones
-
         mw = self.node_item.main_widget
         if mw is not None:  # maybe the main_widget got resized
             # self.main_widget_proxy.setMaximumSize(mw.size())
@@ -153,6 +217,23 @@ class NodeItemWidget(QGraphicsWidget):
             self.main_widget_proxy.setMaximumSize(QSizeF(mw.size()))
             self.main_widget_proxy.setMinimumSize(QSizeF(mw.size()))
 
+        # makes extended node items shrink according to resizing input widgets
+        if not self.node_item.initializing:
+            if self._body_outdated:
+                self.rebuild_body()
+            for inp in self.node_item.inputs:
+                if inp.proxy is not None or inp.placeholder is not None:
+                    # the input widget might have been resized; layouts of nested widgets would only
+                    # notice that on the next LayoutRequest event
+                    inp.layout().invalidate()
+            self.inputs_layout.invalidate()
+            self.outputs_layout.invalidate()
+            self.body_layout.invalidate()
+            self.layout().invalidate()
+            self.resize(self.minimumSize())
+        # strangely, this only works for small node items without this, not for normal ones
+
+        if self.main_widget_proxy is not None:
             self.adjustSize()
             self.adjustSize()
 
@@ -200,52 +281,52 @@ class NodeItemWidget(QGraphicsWidget):
             self.layout().setAlignment(self.main_widget_proxy, Qt.AlignHCenter)
 
     def add_input_to_layout(self, inp: InputPortItem):
+        if self._body_outdated or self.node_item.collapsed:
+            return  # added in rebuild_body()
         if self.inputs_layout.count() > 0:
             self.inputs_layout.addStretch()
         self.inputs_layout.addItem(inp)
         self.inputs_layout.setAlignment(inp, Qt.AlignLeft)
 
     def insert_input_into_layout(self, index: int, inp: InputPortItem):
-        self.inputs_layout.insertItem(index * 2 + 1, inp)  # *2 bcs of the stretches
-        self.inputs_layout.setAlignment(inp, Qt.AlignLeft)
-        if len(self.node_gui.node.inputs) > 1:
-            self.inputs_layout.insertStretch(index * 2 + 1)  # *2+1 because of the stretches, too
+        # the stretches between the ports can't be addressed, so the ports get re-added in rebuild_body()
+        self._body_outdated = True
 
     def remove_input_from_layout(self, inp: InputPortItem):
         self.inputs_layout.removeItem(inp)
 
-        # just a temporary workaround for the issues discussed here:
-        # https://forum.qt.io/topic/116268/qgraphicslayout-not-properly-resizing-to-change-of-content
-        self.rebuild_ui()
+        # the stretch that came with it can't be removed, see rebuild_ui()
+        self._body_outdated = True
 
     def add_output_to_layout(self, out: OutputPortItem):
+        if self._body_outdated or self.node_item.collapsed:
+            return  # added in rebuild_body()
         if self.outputs_layout.count() > 0:
             self.outputs_layout.addStretch()
         self.outputs_layout.addItem(out)
         self.outputs_layout.setAlignment(out, Qt.AlignRight)
 
     def insert_output_into_layout(self, index: int, out: OutputPortItem):
-        self.outputs_layout.insertItem(index * 2 + 1, out)  # *2 because of the stretches
-        self.outputs_layout.setAlignment(out, Qt.AlignRight)
-        if len(self.node_gui.node.outputs) > 1:
-            self.outputs_layout.insertStretch(index * 2 + 1)  # *2+1 because of the stretches, too
+        # see insert_input_into_layout()
+        self._body_outdated = True
 
     def remove_output_from_layout(self, out: OutputPortItem):
         self.outputs_layout.removeItem(out)
 
-        # just a temporary workaround for the issues discussed here:
-        # https://forum.qt.io/topic/116268/qgraphicslayout-not-properly-resizing-to-change-of-content
-        self.rebuild_ui()
+        # see remove_input_from_layout()
+        self._body_outdated = True
 
     def collapse(self):
         self.body_widget.hide()
         if self.main_widget_proxy:
             self.main_widget_proxy.hide()
+        self.rebuild_ui()
 
     def expand(self):
         self.body_widget.show()
         if self.main_widget_proxy:
             self.main_widget_proxy.show()
+        self.rebuild_ui()
 
     def hide_unconnected_ports(self):
         for inp in self.node_item.node.inputs:
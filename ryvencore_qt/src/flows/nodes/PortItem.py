@@ -1,8 +1,8 @@
 from typing import Tuple
 
-from qtpy.QtWidgets import QGraphicsGridLayout, QGraphicsWidget, QGraphicsLayoutItem
+from qtpy.QtWidgets import QGraphicsGridLayout, QGraphicsWidget, QGraphicsLayoutItem, QToolTip
 from qtpy.QtCore import Qt, QRectF, QPointF, QSizeF
-from qtpy.QtGui import QFontMetricsF, QFont
+from qtpy.QtGui import QFontMetricsF, QFont, QColor, QCursor
 
 from ...GUIBase import GUIBase
 from .PortItemInputWidgets import Data_IW_S, Data_IW_M, Data_IW_L, Float_IW, Integer_IW, \
@@ -10,8 +10,9 @@ from .PortItemInputWidgets import Data_IW_S, Data_IW_M, Data_IW_L, Float_IW, Int
 from ryvencore import serialize, Data
 from ryvencore.NodePort import NodeOutput, NodeInput, NodePort
 from ryvencore.utils import deserialize
-from ...utils import get_longest_line, shorten
+from ...utils import get_longest_line
 
+from .WidgetPlaceholder import WidgetPlaceholder
 from ..FlowViewProxyWidget import FlowViewProxyWidget
 
 #
@@ -25,16 +26,21 @@ def is_connected(port):
         is_connected = port.node.flow.connected_output(port) is not None
     return is_connected
 
-def val(port):
+def data(port):
+    """Returns the Data object currently held by the port, or None"""
     if isinstance(port, NodeOutput):
-        return port.val.payload if isinstance(port.val, Data) else None
+        return port.val if isinstance(port.val, Data) else None
     else:
         conn_out = port.node.flow.connected_output(port)
         if conn_out:
-            return conn_out.val.payload if conn_out.val is not None else None
+            return conn_out.val
         else:
             return None
 
+def val(port):
+    d = data(port)
+    return d.payload if d is not None else None
+
 def connections(port):
     if isinstance(port, NodeOutput):
         return [(port, i) for i in port.node.flow.connected_inputs(port)]
@@ -54,7 +60,7 @@ class PortItem(GUIBase, QGraphicsWidget):
 
     def __init__(self, node_gui, node_item, port, flow_view):
         GUIBase.__init__(self, representing_component=port)
-        QGraphicsWidget.__init__(self)
+        QGraphicsWidget.__init__(self, node_item)
 
         self.setGraphicsItem(self)
 
@@ -94,15 +100,26 @@ class PortItem(GUIBase, QGraphicsWidget):
     def port_disconnected(self):
         pass
 
+    def connection_items(self) -> list:
+        """Returns the items of the connections of the port"""
+        return [c for c in self.node_item.connection_items if self is c.out_item or self is c.inp_item]
+
 
 class InputPortItem(PortItem):
-    def __init__(self, node_gui, node_item, port, input_widget: Tuple[type, str] = None):
+    def __init__(self, node_gui, node_item, port, input_widget: Tuple[type, str] = None, defer_widget: bool = False):
         super().__init__(node_gui, node_item, port, node_gui.flow_view())
 
         self.proxy = None   # widget proxy
         self.widget = None  # widget
+        self.placeholder: WidgetPlaceholder = None  # stands in for a deferred widget, see create_deferred_widget()
+        self._deferred_widget: Tuple[type, str] = None
+        self._widget_data = None  # serialized state of the deferred widget
         if input_widget is not None:
-            self.create_widget(input_widget[0], input_widget[1])
+            if defer_widget and self.port.type_ == 'data':
+                self._deferred_widget = input_widget
+                self.placeholder = WidgetPlaceholder(input_widget[0])
+            else:
+                self.create_widget(input_widget[0], input_widget[1])
 
         self.update_widget_value = self.widget is not None  # modified by FlowView when performance mode changes
 
@@ -110,10 +127,13 @@ class InputPortItem(PortItem):
         if self.port.node.flow.connected_output(self.port) is not None:
             self.port_connected()
 
-        if self.port.type_ == 'data' and self.port.load_data is not None and self.port.load_data['has widget']:
+        if self.port.type_ == 'data' and self.port.load_data is not None and self.port.load_data.get('has widget'):
             c_d = self.port.load_data['widget data']
             if c_d is not None:
-                self.widget.set_state(deserialize(c_d))
+                if self._deferred_widget is not None:
+                    self._widget_data = c_d
+                else:
+                    self.widget.set_state(deserialize(c_d))
             else:
                 # this is a little feature that lets us prevent loading of input widgets
                 # which is occasionally useful, e.g. when changing an input widget class:
@@ -131,14 +151,20 @@ class InputPortItem(PortItem):
         l.addItem(self.label, 0, 1)
         l.setAlignment(self.label, Qt.AlignVCenter | Qt.AlignLeft)
         if self.widget:
-            if self.widget.position == 'below':
-                l.addItem(self.proxy, 1, 0, 1, 2)
-            elif self.widget.position == 'besides':
-                l.addItem(self.proxy, 0, 2)
-            else:
-                print('Unknown input widget position:', self.widget.position)
+            self._add_widget_to_layout(self.proxy, self.widget.position)
+        elif self.placeholder:
+            self._add_widget_to_layout(self.placeholder, self._deferred_widget[1])
+
+    def _add_widget_to_layout(self, item, position: str):
+        l = self._layout
+        if position == 'below':
+            l.addItem(item, 1, 0, 1, 2)
+        elif position == 'besides':
+            l.addItem(item, 0, 2)
+        else:
+            print('Unknown input widget position:', position)
 
-            l.setAlignment(self.proxy, Qt.AlignCenter)
+        l.setAlignment(item, Qt.AlignCenter)
 
     def create_widget(self, widget_class, widget_pos):
 
@@ -155,6 +181,36 @@ class InputPortItem(PortItem):
         self.widget = widget_class(params)
         self.proxy = FlowViewProxyWidget(self.flow_view, parent=self.node_item)
         self.proxy.setWidget(self.widget)
+        WidgetPlaceholder.widget_created(widget_class, self.proxy.effectiveSizeHint(Qt.PreferredSize))
+
+    def create_deferred_widget(self):
+        """Creates the widget whose creation was deferred, see Design.set_widget_creation_scale()"""
+
+        if self._deferred_widget is None:
+            return
+        widget_class, widget_pos = self._deferred_widget
+        self._deferred_widget = None
+
+        self._layout.removeItem(self.placeholder)
+        if self.placeholder.scene() is not None:
+            self.placeholder.scene().removeItem(self.placeholder)
+        self.placeholder = None
+
+        self.create_widget(widget_class, widget_pos)
+        if self._widget_data is not None:
+            self.widget.set_state(deserialize(self._widget_data))
+            self._widget_data = None
+        # like FlowView sets it for existing widgets when the performance mode changes
+        self.update_widget_value = self.node_item.session_design.performance_mode == 'pretty'
+
+        conn_out = self.port.node.flow.connected_output(self.port)
+        if conn_out is not None:
+            self.port_connected()
+            # it missed the updates so far
+            if conn_out.val is not None:
+                self.widget.val_update_event(conn_out.val)
+
+        self._add_widget_to_layout(self.proxy, widget_pos)
 
     def port_connected(self):
         """Disables the widget"""
@@ -179,6 +235,11 @@ class InputPortItem(PortItem):
                 data['widget name'] = self.node_gui.input_widgets[self.port]['name']
                 data['widget pos'] = self.node_gui.input_widgets[self.port]['pos']
                 data['widget data'] = serialize(self.widget.get_state())
+            elif self._deferred_widget is not None:
+                data['has widget'] = True
+                data['widget name'] = self.node_gui.input_widgets[self.port]['name']
+                data['widget pos'] = self.node_gui.input_widgets[self.port]['pos']
+                data['widget data'] = self._widget_data
             else:
                 data['has widget'] = False
 
@@ -221,6 +282,7 @@ class PortItemPin(QGraphicsWidget):
         self.hovered = False
         self.setCursor(Qt.CrossCursor)
         self.tool_tip_pos = None
+        self._waiting_for_preview = False
 
         self.padding = 2
         # self.painting_width = 17
@@ -247,7 +309,7 @@ class PortItemPin(QGraphicsWidget):
             node_gui=self.node_gui,
             painter=painter,
             option=option,
-            node_color=self.node_gui.color,
+            node_color=QColor(self.node_gui.color),
             type_=self.port.type_,
             connected=is_connected(self.port),
             rect=QRectF(self.padding, self.padding, self.width-2*self.padding, self.height-2*self.padding)
@@ -267,23 +329,16 @@ class PortItemPin(QGraphicsWidget):
         super().moveEvent(event)
 
         # update connections
-        conn_items = self.flow_view.connection_items
-        for c in self.port.connections:
-            i = conn_items[c]
-
-            # if the items are grouped (which means they move together), don't recompute
-            if i.out.group() is None or i.out.group() != i.inp.group():  # not entirely sure if this is working
-                i.recompute()
+        self.flow_view.connection_items_moved(self.port_item.connection_items())
 
 
     def hoverEnterEvent(self, event):
         if self.port.type_ == 'data':  # and self.parent_port_instance.io_pos == PortPos.OUTPUT:
-            self.setToolTip(shorten(str(val(self.port)), 1000, line_break=True))
+            self.update_tool_tip()
 
         # highlight connections
-        items = self.flow_view.connection_items
-        for c in connections(self.port):
-            items[c].set_highlighted(True)
+        for item in self.port_item.connection_items():
+            item.set_highlighted(True)
 
         self.hovered = True
 
@@ -292,14 +347,41 @@ class PortItemPin(QGraphicsWidget):
     def hoverLeaveEvent(self, event):
 
         # un-highlight connections
-        items = self.flow_view.connection_items
-        for c in connections(self.port):
-            items[c].set_highlighted(False)
+        for item in self.port_item.connection_items():
+            item.set_highlighted(False)
 
         self.hovered = False
+        self._wait_for_preview(False)
 
         QGraphicsWidget.hoverLeaveEvent(self, event)
 
+    def update_tool_tip(self):
+        """Shows a preview of the port's value, see ValuePreviewer"""
+
+        text = self.flow_view.session_gui.value_previewer.preview(self.port, val(self.port), data(self.port))
+        self._wait_for_preview(text is None)
+        self.setToolTip(text if text is not None else 'computing preview...')
+
+    def _wait_for_preview(self, wait: bool):
+        if wait == self._waiting_for_preview:
+            return
+        self._waiting_for_preview = wait
+
+        previewer = self.flow_view.session_gui.value_previewer
+        if wait:
+            previewer.preview_ready.connect(self._preview_ready)
+        else:
+            previewer.preview_ready.disconnect(self._preview_ready)
+
+    def _preview_ready(self, port, text):
+        if port is not self.port:
+            return
+
+        self._wait_for_preview(False)
+        self.setToolTip(text)
+        if QToolTip.isVisible():
+            QToolTip.showText(QCursor.pos(), text)
+
     def get_scene_center_pos(self):
         if not self.node_item.collapsed:
             return QPointF(self.scenePos().x() + self.boundingRect().width()/2,
@@ -345,6 +427,6 @@ class PortItemLabel(QGraphicsWidget):
             self.port.type_,
             is_connected(self.port),
             self.port.label_str,
-            self.node_gui.color,
+            QColor(self.node_gui.color),
             self.boundingRect()
         )
@@ -0,0 +1,33 @@
+from qtpy.QtCore import Qt, QRectF, QSizeF
+from qtpy.QtGui import QColor
+from qtpy.QtWidgets import QGraphicsWidget, QSizePolicy
+
+
+class WidgetPlaceholder(QGraphicsWidget):
+    """Takes the place of a main widget or input widget in the layout of a node item until the widget gets
+    created, see Design.set_widget_creation_scale(). It has the size of the last created widget of the same
+    class, so node items usually don't change their size when their widgets appear."""
+
+    # {widget class: QSizeF}
+    sizes = {}
+
+    DEFAULT_SIZE = QSizeF(60, 20)
+
+    def __init__(self, widget_class):
+        super().__init__()
+
+        self.widget_class = widget_class
+
+        size = self.sizes.get(widget_class, self.DEFAULT_SIZE)
+        self.setMinimumSize(size)
+        self.setMaximumSize(size)
+        self.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+
+    @classmethod
+    def widget_created(cls, widget_class, size: QSizeF):
+        cls.sizes[widget_class] = QSizeF(size)
+
+    def paint(self, painter, option, widget=None):
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(128, 128, 128, 40))
+        painter.drawRoundedRect(QRectF(self.rect()), 3, 3)
@@ -55,6 +55,21 @@ def shorten(s: str, max_chars: int, line_break: bool = False):
         return s
 
 
+def merge_node_frontend_data(data: dict, frontend_data: dict) -> dict:
+    """Returns the node data dict completed by the frontend info (incl. the input widgets' info) from
+    frontend_data, a former complete data dict of the node, e.g. the one it was loaded from"""
+
+    inputs_data = data['inputs']
+    frontend_inputs_data = frontend_data.get('inputs', [])
+
+    data = {**frontend_data, **data}
+    data['inputs'] = [
+        {**frontend_inputs_data[i], **inputs_data[i]} if i < len(frontend_inputs_data) else inputs_data[i]
+        for i in range(len(inputs_data))
+    ]
+    return data
+
+
 def pointF_mapped(p1, p2):
     """adds the floating part of p2 to p1"""
     p2.setX(p1.x() + p2.x()%1)
@@ -16,7 +16,7 @@ class FlowsListWidget(QWidget):
 
         self.setup_UI()
 
-        self.session_gui.flow_view_created.connect(self.add_new_flow)
+        self.session_gui.flow_created.connect(self.add_new_flow)
         self.session_gui.flow_deleted.connect(self.recreate_list)
 
 
@@ -76,8 +76,10 @@ class FlowsListWidget(QWidget):
         if self.session_gui.core_session.flow_title_valid(title):
             self.session_gui.core_session.create_flow(title=title)
 
-    def add_new_flow(self, flow, flow_view):
-        self.recreate_list()
+    def add_new_flow(self, flow):
+        new_widget = FlowsList_FlowWidget(self, self.session_gui, flow)
+        self.list_widgets.append(new_widget)
+        self.list_layout.addWidget(new_widget)
 
     def del_flow(self, flow, flow_widget):
         msg_box = QMessageBox(QMessageBox.Warning, 'sure about deleting flow?',
@@ -14,7 +14,6 @@ class FlowsList_FlowWidget(QWidget):
 
         self.session_gui = session_gui
         self.flow = flow
-        self.flow_view = self.session_gui.flow_views[flow]
         self.flows_list_widget = flows_list_widget
         self.previous_flow_title = ''
         self._thumbnail_source = ''
@@ -50,6 +49,10 @@ class FlowsList_FlowWidget(QWidget):
 
 
 
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.session_gui.request_flow_view(self.flow)
+
     def mouseDoubleClickEvent(self, event):
         if event.button() == Qt.LeftButton:
             if self.title_line_edit.geometry().contains(event.pos()):
@@ -60,8 +63,14 @@ class FlowsList_FlowWidget(QWidget):
     def event(self, event):
         if event.type() == QEvent.ToolTip:
 
+            flow_view = self.session_gui.flow_views.get(self.flow)
+            if flow_view is None:
+                # the flow hasn't been opened yet, don't build its view just for a preview
+                self.setToolTip(self.flow.title)
+                return QWidget.event(self, event)
+
             # generate preview img as QImage
-            img: QImage = self.flow_view.get_viewport_img().scaledToHeight(200)
+            img: QImage = flow_view.get_viewport_img().scaledToHeight(200)
 
             # store the img data in QBuffer to load it directly from memory
             buffer = QBuffer()